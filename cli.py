@@ -0,0 +1,559 @@
+# cli.py
+"""
+One entry point for the pipeline, with the performance settings as flags:
+
+    python cli.py crawl --threads 16                      # discover new URLs, fetch them through work_queue
+    python cli.py classify --workers 2 --concurrency 8 --profile auto --batch-size 500
+    python cli.py classify --mode queue --batch-size 32   # classify worker on work_queue
+    python cli.py replay --dead --concurrency 16          # (re)deliver pending/dead webhook events
+    python cli.py reclassify --stages topic --batch-size 1024   # re-run stale model stages on stored articles
+    python cli.py export dump articles --format parquet --out articles.parquet
+    python cli.py bench mongo --docs 5000 --compressors none,zstd
+    python cli.py indexes --verify --dry-run
+
+Every flag maps to the environment variable documented in the README (the
+flag wins over .env). Project modules read those variables when they are
+imported, so they are imported inside each command, after the flags have
+been applied. ``--dry-run`` prints the effective settings (or what would be
+written) and stops before touching models, feeds or data. Progress and
+throughput are drawn on stderr with rich; module output keeps going to stdout.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import typer
+from dotenv import load_dotenv
+from rich.console import Console
+from rich.progress import (BarColumn, MofNCompleteColumn, Progress, ProgressColumn, SpinnerColumn, Task, TextColumn,
+                           TimeElapsedColumn)
+from rich.table import Table
+from rich.text import Text
+
+load_dotenv()
+
+app = typer.Typer(help="News pipeline: crawl, classify, deliver, export and benchmark.", no_args_is_help=True)
+export_app = typer.Typer(help="Stream collections to JSONL/Parquet and run bulk updates.", no_args_is_help=True)
+bench_app = typer.Typer(help="Throughput benchmarks.", no_args_is_help=True)
+app.add_typer(export_app, name="export")
+app.add_typer(bench_app, name="bench")
+
+console = Console(stderr=True)
+
+
+class PipelineMode(str, Enum):
+    staged = "staged"
+    serial = "serial"
+    queue = "queue"
+
+
+class SummarizerProfile(str, Enum):
+    quality = "quality"
+    fast = "fast"
+    extractive = "extractive"
+    auto = "auto"
+
+
+class ExportFormat(str, Enum):
+    jsonl = "jsonl"
+    parquet = "parquet"
+
+
+class DispatchMode(str, Enum):
+    auto = "auto"
+    stream = "stream"
+    poll = "poll"
+
+
+# --- Helpers ---
+
+def apply_settings(settings: Dict[str, Any]) -> Dict[str, str]:
+    """Export the flags that were given as environment variables; returns them."""
+    applied = {name: str(value) for name, value in settings.items() if value is not None}
+    os.environ.update(applied)
+    return applied
+
+
+def show_settings(title: str, names: Iterable[str]) -> None:
+    table = Table(title=title, show_header=True, header_style="bold")
+    table.add_column("setting")
+    table.add_column("value")
+    for name in names:
+        table.add_row(name, os.environ.get(name, "[dim](default)[/dim]"))
+    console.print(table)
+
+
+class _RateColumn(ProgressColumn):
+    """Items per second (rich's speed column is for bytes)."""
+
+    def render(self, task: Task) -> Text:
+        speed = task.finished_speed or task.speed
+        return Text(f"{speed:,.1f}/s" if speed else "-/s", style="progress.data.speed")
+
+
+def make_progress() -> Progress:
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        _RateColumn(),
+        TimeElapsedColumn(),
+        TextColumn("{task.fields[info]}"),
+        console=console,
+    )
+
+
+@contextmanager
+def polling(update: Callable[[], None], interval: float = 0.5) -> Iterator[None]:
+    """Call ``update`` every ``interval`` seconds (and once at the end) while the block runs."""
+    stop = threading.Event()
+
+    def loop() -> None:
+        while not stop.wait(interval):
+            update()
+
+    thread = threading.Thread(target=loop, name="cli-progress", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        update()
+
+
+def _fields(raw: str) -> Optional[List[str]]:
+    return [f.strip() for f in raw.split(",") if f.strip()] or None
+
+
+@app.callback()
+def main(
+    log_level: Optional[str] = typer.Option(None, help="LOG_LEVEL (DEBUG, INFO, WARNING...)."),
+    log_format: Optional[str] = typer.Option(None, help="LOG_FORMAT: text or json."),
+) -> None:
+    apply_settings({"LOG_LEVEL": log_level.upper() if log_level else None, "LOG_FORMAT": log_format})
+    from utils.log import setup_logging
+
+    setup_logging()
+
+
+# --- crawl ---
+
+@app.command()
+def crawl(
+    threads: Optional[int] = typer.Option(None, "--threads", "-t", help="Fetch threads (WORK_QUEUE_FETCH_THREADS)."),
+    lease_seconds: Optional[float] = typer.Option(None, help="Lease per item (WORK_QUEUE_LEASE_SECONDS)."),
+    max_attempts: Optional[int] = typer.Option(None, help="Attempts before an item fails (WORK_QUEUE_MAX_ATTEMPTS)."),
+    discover: bool = typer.Option(True, "--discover/--no-discover", help="List new URLs before fetching."),
+    follow: bool = typer.Option(False, "--follow", help="Keep waiting for new URLs instead of exiting when idle."),
+    worker_id: Optional[str] = typer.Option(None, help="Worker id prefix (default: host-pid)."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Count new URLs per source without queueing or fetching."),
+) -> None:
+    """Discover new article URLs and download/extract them (work_queue: discovered -> fetched)."""
+    apply_settings({"WORK_QUEUE_FETCH_THREADS": threads, "WORK_QUEUE_LEASE_SECONDS": lease_seconds,
+                    "WORK_QUEUE_MAX_ATTEMPTS": max_attempts})
+    if dry_run:
+        from ingest.get_all_articles import discover_all_links
+
+        per_source: Counter = Counter()
+        with make_progress() as progress:
+            task = progress.add_task("discover", total=None, info="")
+            for item in discover_all_links():
+                per_source[item.get("source") or "?"] += 1
+                progress.update(task, advance=1, info=item.get("source") or "")
+        table = Table(title="New URLs (dry run, nothing queued)")
+        table.add_column("source")
+        table.add_column("urls", justify="right")
+        for source, count in per_source.most_common():
+            table.add_row(source, str(count))
+        console.print(table)
+        return
+
+    from ingest import work_queue
+    from lib.repositories.work_queue_repository import DISCOVERED
+
+    if discover:
+        with console.status("Discovering new URLs..."):
+            work_queue.discover()
+    stats: Counter = Counter()
+    total = work_queue.repo_queue.counts()[DISCOVERED]
+    with make_progress() as progress:
+        task = progress.add_task("fetch", total=None if follow else total, info="")
+
+        def update() -> None:
+            progress.update(task, completed=stats["fetched"] + stats["failed"],
+                            info=f"retry {stats['retry']} failed {stats['failed']}")
+
+        with polling(update):
+            try:
+                work_queue.run_fetch_workers(work_queue.WORK_QUEUE_FETCH_THREADS, worker_id,
+                                             exit_when_idle=not follow, stats=stats)
+            except KeyboardInterrupt:
+                work_queue.request_stop()
+
+
+# --- classify ---
+
+@app.command()
+def classify(
+    mode: PipelineMode = typer.Option(PipelineMode.staged, help="staged threads, serial loop, or a work_queue worker."),
+    workers: Optional[int] = typer.Option(None, "--workers", "-w",
+                                          help="Model threads per inference stage (staged) or forked inference processes (serial)."),
+    fetch_workers: Optional[int] = typer.Option(None, help="Download/extract threads (staged)."),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", "-c",
+                                              help="Concurrent LLM cleaning requests and clean-stage threads."),
+    batch_size: Optional[int] = typer.Option(None, "--batch-size", "-b",
+                                             help="Articles per MongoDB bulk write; articles per claim in queue mode."),
+    queue_size: Optional[int] = typer.Option(None, help="Bounded queue between stages (staged)."),
+    profile: Optional[SummarizerProfile] = typer.Option(None, help="Summarizer profile."),
+    model_dir: Optional[Path] = typer.Option(None, help="Local model snapshots (MODEL_SNAPSHOT_DIR)."),
+    hf_cache: Optional[Path] = typer.Option(None, help="HuggingFace download cache (TRANSFORMERS_CACHE)."),
+    inference_server: Optional[str] = typer.Option(None, help="Use a running inference server instead of loading models."),
+    follow: bool = typer.Option(False, "--follow", help="Queue mode: keep waiting for fetched items."),
+    worker_id: Optional[str] = typer.Option(None, help="Queue mode: worker id."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Print the effective settings and exit."),
+) -> None:
+    """Summarize, classify, clean and store the new articles of one sample."""
+    staged, serial, queue_mode = (mode == PipelineMode.staged, mode == PipelineMode.serial, mode == PipelineMode.queue)
+    applied = apply_settings({
+        "CLASSIFIER_PIPELINE": None if queue_mode else mode.value,
+        "PIPELINE_SUMMARIZE_WORKERS": workers if staged else None,
+        "PIPELINE_CLASSIFY_WORKERS": workers if staged else None,
+        "INFERENCE_WORKERS": workers if serial else None,
+        "PIPELINE_FETCH_WORKERS": fetch_workers,
+        "PIPELINE_CLEAN_WORKERS": concurrency if staged else None,
+        "CLEANING_CONCURRENCY": concurrency,
+        "WRITE_BUFFER_MAX_OPS": batch_size,
+        "WORK_QUEUE_CLASSIFY_BATCH": batch_size if queue_mode else None,
+        "PIPELINE_QUEUE_SIZE": queue_size,
+        "SUMMARIZER_PROFILE": profile.value if profile else None,
+        "MODEL_SNAPSHOT_DIR": model_dir,
+        "TRANSFORMERS_CACHE": hf_cache,
+        "INFERENCE_SERVER_URL": inference_server,
+    })
+    if dry_run:
+        names = ["CLASSIFIER_PIPELINE", "SUMMARIZER_PROFILE", "MODEL_SNAPSHOT_DIR", "TRANSFORMERS_CACHE",
+                 "INFERENCE_SERVER_URL", "CLEANING_CONCURRENCY", "WRITE_BUFFER_MAX_OPS"]
+        if staged:
+            names += ["PIPELINE_FETCH_WORKERS", "PIPELINE_SUMMARIZE_WORKERS", "PIPELINE_CLASSIFY_WORKERS",
+                      "PIPELINE_CLEAN_WORKERS", "PIPELINE_QUEUE_SIZE"]
+        elif serial:
+            names += ["INFERENCE_WORKERS"]
+        else:
+            names += ["WORK_QUEUE_CLASSIFY_BATCH"]
+        show_settings(f"classify --mode {mode.value} (dry run)", sorted(set(names) | set(applied)))
+        return
+
+    if queue_mode:
+        _classify_queue(worker_id, follow)
+    elif staged:
+        _classify_staged()
+    else:
+        from ingest.classifier import classify_articles_serial
+
+        # No spinner: its refresh thread would be running when the inference pool forks.
+        console.print("Classifying (serial)...")
+        sample = classify_articles_serial()
+        console.print(f"✅ Sample {sample}")
+
+
+def _classify_staged() -> None:
+    from ingest.staged_pipeline import classify_articles_staged
+
+    with make_progress() as progress:
+        tasks: Dict[str, Any] = {}
+
+        def on_progress(report: Dict[str, Any]) -> None:
+            # One row per stage: items through it, rate, utilization and inbox depth.
+            for name, stage in report["stages"].items():
+                if name not in tasks:
+                    tasks[name] = progress.add_task(name, total=None, info="")
+                marker = "  [red]◀ bottleneck[/red]" if name == report["bottleneck"] else ""
+                progress.update(tasks[name], completed=stage["processed"],
+                                info=f"util {stage['utilization']:.0%} queue {stage['queue_avg']}/{stage['queue_max']} "
+                                     f"failed {stage['failed']}{marker}")
+
+        sample = classify_articles_staged(on_progress=on_progress)
+    console.print(f"✅ Sample {sample}")
+
+
+def _classify_queue(worker_id: Optional[str], follow: bool) -> None:
+    from ingest import work_queue
+    from lib.repositories.work_queue_repository import FETCHED
+
+    worker = work_queue.ClassifyWorker(worker_id, work_queue.WORK_QUEUE_CLASSIFY_BATCH)
+    total = work_queue.repo_queue.counts()[FETCHED]
+    with make_progress() as progress:
+        task = progress.add_task("classify", total=None if follow else total, info="")
+
+        def update() -> None:
+            progress.update(task, completed=sum(worker.topic_counter.values()), info=f"failed {worker.failed}")
+
+        with polling(update):
+            try:
+                worker.run(exit_when_idle=not follow)
+            except KeyboardInterrupt:
+                work_queue.request_stop()
+
+
+# --- replay ---
+
+@app.command()
+def replay(
+    dead: bool = typer.Option(False, "--dead", help="Move dead letters back to pending first."),
+    target: Optional[str] = typer.Option(None, help="Restrict --dead to one target (embedding, thread_events)."),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", "-c", help="Parallel webhook requests."),
+    batch_size: Optional[int] = typer.Option(None, "--batch-size", "-b", help="Events claimed per target and round."),
+    follow: bool = typer.Option(False, "--follow", help="Keep running as the dispatcher instead of exiting when drained."),
+    mode: DispatchMode = typer.Option(DispatchMode.auto, help="With --follow: change stream, polling or auto."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Show outbox counts per target/status without sending."),
+) -> None:
+    """Deliver the webhook events waiting in the outbox (optionally retrying dead letters)."""
+    apply_settings({"WEBHOOK_DISPATCH_CONCURRENCY": concurrency, "WEBHOOK_DISPATCH_BATCH": batch_size})
+    from ingest.call_to_webhook import WEBHOOK_TARGETS
+    from lib.repositories.webhook_outbox_repository import IN_FLIGHT, PENDING, WebhookOutboxRepository
+
+    if target is not None and target not in WEBHOOK_TARGETS:
+        raise typer.BadParameter(f"unknown target '{target}' (known: {', '.join(WEBHOOK_TARGETS)})", param_hint="--target")
+    repo_outbox = WebhookOutboxRepository()
+    if dry_run:
+        table = Table(title="webhook_outbox (dry run, nothing sent)")
+        for column in ("target", "status", "events", "max attempts", "avg latency ms"):
+            table.add_column(column)
+        for row in repo_outbox.stats():
+            avg = row.get("avg_latency_ms")
+            table.add_row(row["_id"].get("target"), row["_id"].get("status"), str(row["count"]),
+                          str(row.get("max_attempts")), f"{avg:.0f}" if avg is not None else "-")
+        console.print(table)
+        return
+
+    if dead:
+        console.print(f"✅ Requeued {repo_outbox.requeue_dead(target)} dead letters")
+    from ingest.webhook_dispatcher import WebhookDispatcher
+
+    dispatcher = WebhookDispatcher()
+    with make_progress() as progress:
+        tasks = {}
+        for name in WEBHOOK_TARGETS:
+            due = repo_outbox.collection.count_documents({"target": name, "status": {"$in": [PENDING, IN_FLIGHT]}})
+            tasks[name] = progress.add_task(name, total=None if follow else due, info="")
+
+        def update() -> None:
+            for name, stats in dispatcher.report().items():
+                p95 = stats["latency_p95_ms"]
+                progress.update(tasks[name], completed=stats["delivered"] + stats["dead"],
+                                info=f"failed {stats['failed']} dead {stats['dead']} "
+                                     f"p95 {p95 if p95 is not None else '-'} ms")
+
+        with polling(update):
+            try:
+                if follow:
+                    dispatcher.run(mode.value)
+                else:
+                    dispatcher.drain()
+                    dispatcher.close()
+            except KeyboardInterrupt:
+                dispatcher.stop()
+
+
+# --- reclassify ---
+
+@app.command()
+def reclassify(
+    stages: str = typer.Option("summary,topic,sentiment", help="Stages that may be re-run (comma-separated)."),
+    batch_size: Optional[int] = typer.Option(None, "--batch-size", "-b", help="Articles per read and bulk update."),
+    inference_batch: Optional[int] = typer.Option(None, help="Rows per model forward pass (RECLASSIFY_INFERENCE_BATCH)."),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", "-c",
+                                              help="Parallel requests to the inference server (RECLASSIFY_CONCURRENCY)."),
+    profile: Optional[SummarizerProfile] = typer.Option(None, help="Summarizer profile for re-summarized articles."),
+    model_dir: Optional[Path] = typer.Option(None, help="Local model snapshots (MODEL_SNAPSHOT_DIR)."),
+    hf_cache: Optional[Path] = typer.Option(None, help="HuggingFace download cache (TRANSFORMERS_CACHE)."),
+    inference_server: Optional[str] = typer.Option(None, help="Use a running inference server instead of loading models."),
+    reset: bool = typer.Option(False, "--reset", help="Ignore the checkpoint and start from the beginning."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Show the version groups and the stages that would be re-run."),
+) -> None:
+    """Re-run only the model stages an upgrade made stale on already stored articles."""
+    apply_settings({
+        "RECLASSIFY_BATCH": batch_size,
+        "RECLASSIFY_INFERENCE_BATCH": inference_batch,
+        "RECLASSIFY_CONCURRENCY": concurrency,
+        "SUMMARIZER_PROFILE": profile.value if profile else None,
+        "MODEL_SNAPSHOT_DIR": model_dir,
+        "TRANSFORMERS_CACHE": hf_cache,
+        "INFERENCE_SERVER_URL": inference_server,
+    })
+    from ingest import reclassify as job
+
+    allowed = _fields(stages) or []
+    unknown = set(allowed) - set(job.STAGES)
+    if unknown:
+        raise typer.BadParameter(f"unknown stages: {sorted(unknown)}", param_hint="--stages")
+    groups = job.plan(allowed)
+    table = Table(title="Version groups" + (" (dry run)" if dry_run else ""))
+    for column in ("pipeline_version", "model_version", "articles", "re-run"):
+        table.add_column(column)
+    for group in groups:
+        action = ",".join(group["stages"]) or ("up to date" if not group["stale"] else "skipped (--stages)")
+        table.add_row(str(group["pipeline_version"]), str(group["model_version"]), str(group["articles"]), action)
+    console.print(table)
+    if dry_run:
+        return
+
+    with make_progress() as progress:
+        task = progress.add_task("reclassify", total=sum(g["articles"] for g in groups if g["stages"]), info="")
+        job.reclassify(allowed, job.RECLASSIFY_BATCH, reset, on_progress=lambda n: progress.advance(task, n))
+
+
+# --- export ---
+
+@export_app.command("dump")
+def export_dump(
+    collection: str = typer.Argument(..., help="Collection to export."),
+    fmt: ExportFormat = typer.Option(ExportFormat.jsonl, "--format", help="jsonl or parquet."),
+    out: str = typer.Option("-", help="Output path ('-' = stdout, jsonl only)."),
+    fields: str = typer.Option("", help="Comma-separated projection."),
+    query: str = typer.Option("{}", help="JSON filter."),
+    batch_size: Optional[int] = typer.Option(None, "--batch-size", "-b", help="Documents per round trip and per write."),
+    limit: int = typer.Option(0, help="Stop after this many documents (0 = all)."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only count the matching documents."),
+) -> None:
+    """Stream a collection to a file with bounded memory."""
+    from outputs import export
+    from lib.db.mongo_client import get_analytics_db
+
+    if fmt == ExportFormat.parquet and out == "-":
+        raise typer.BadParameter("--out is required for parquet", param_hint="--out")
+    selector = json.loads(query)
+    source = get_analytics_db()[collection]
+    if selector:
+        total = source.count_documents(selector, **({"limit": limit} if limit else {}))
+    else:
+        total = source.estimated_document_count()
+        total = min(total, limit) if limit else total
+    if dry_run:
+        console.print(f"{total} documents of '{collection}' match {selector} (dry run, nothing written)")
+        return
+
+    with make_progress() as progress:
+        task = progress.add_task(f"export {collection}", total=total, info=out)
+
+        def counted(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+            for batch in batches:
+                yield batch
+                progress.advance(task, len(batch))
+
+        started = time.perf_counter()
+        batches = counted(export.iter_batches(collection, selector, _fields(fields),
+                                              batch_size or export.EXPORT_BATCH_SIZE, limit))
+        if fmt == ExportFormat.jsonl:
+            rows = export.write_jsonl(batches, out)
+        else:
+            rows = export.write_parquet(batches, out)
+    console.print(f"✅ Exported {rows} documents from '{collection}' in {time.perf_counter() - started:.1f}s")
+
+
+@export_app.command("set")
+def export_set(
+    collection: str = typer.Argument(..., help="Collection to update."),
+    field: str = typer.Argument(..., help="Field to set."),
+    value: str = typer.Argument(..., help="JSON value (bare strings are accepted)."),
+    query: str = typer.Option("{}", help="JSON filter."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only count the documents that would be updated."),
+) -> None:
+    """Set one field on every matching document with a single update_many."""
+    from outputs import export
+    from lib.db.mongo_client import get_db
+
+    selector = json.loads(query)
+    if dry_run:
+        matched = get_db()[collection].count_documents(selector)
+        console.print(f"{matched} documents of '{collection}' would get {field}={export.parse_value(value)!r} (dry run)")
+        return
+    modified = export.set_field(collection, field, export.parse_value(value), selector)
+    console.print(f"✅ Updated {modified} documents in '{collection}'")
+
+
+# --- bench ---
+
+@bench_app.command("mongo")
+def bench_mongo(
+    docs: int = typer.Option(2000, help="Synthetic articles per setting."),
+    batch_size: int = typer.Option(500, "--batch-size", "-b", help="Documents per insert_many."),
+    text_words: int = typer.Option(900, help="Words per article text (~6 KB)."),
+    pool: Optional[int] = typer.Option(None, help="maxPoolSize (default MONGO_MAX_POOL_SIZE or 100)."),
+    compressors: str = typer.Option("none,snappy,zstd,zlib", help="Comma-separated wire compressors."),
+    write_concerns: str = typer.Option("1", help="Comma-separated write concerns (1, majority...)."),
+    uri: Optional[str] = typer.Option(None, help="Throwaway mongod to run against (BENCH_MONGO_URI)."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="List the settings that would be measured."),
+) -> None:
+    """Insert throughput and bytes on the wire per MongoDB client setting."""
+    apply_settings({"BENCH_MONGO_URI": uri})
+    from scripts import bench_mongo as bench
+
+    settings = [(w, c) for w in _fields(write_concerns) or [] for c in _fields(compressors) or []]
+    pool = pool or int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+    if dry_run:
+        console.print(f"{len(settings)} settings x {docs} docs (batch {batch_size}, pool {pool}) "
+                      f"against {bench.BENCH_MONGO_URI}/{bench.BENCH_DB}: {settings}")
+        return
+
+    articles = bench.make_articles(docs, text_words)
+    table = Table(title=f"{docs} docs, batch {batch_size}, pool {pool}")
+    for column in ("compressor", "w", "docs/s", "secs", "wire MB", "bson MB", "ratio"):
+        table.add_column(column, justify="left" if column in ("compressor", "w") else "right")
+    with make_progress() as progress:
+        task = progress.add_task("bench", total=len(settings), info="")
+        for w, compressor in settings:
+            progress.update(task, info=f"{compressor} w={w}")
+            r = bench.run_setting(articles, batch_size, compressor, w, pool)
+            if "error" in r:
+                table.add_row(compressor, w, r["error"], "", "", "", "")
+            else:
+                table.add_row(r["compressor"], r["w"], str(r["docs_per_s"]), str(r["seconds"]), str(r["wire_mb"]),
+                              str(r["bson_mb"]), str(r["wire_ratio"]))
+            progress.advance(task)
+    console.print(table)
+
+
+@bench_app.command("trends")
+def bench_trends() -> None:
+    """Incremental daily_trends update vs a full recompute (into a scratch collection)."""
+    from ingest.trends_materializer import bench
+
+    with console.status("Benchmarking trend materialization..."):
+        bench()
+
+
+# --- indexes ---
+
+@app.command()
+def indexes(
+    verify: bool = typer.Option(False, "--verify", help="explain() the known query shapes; fail on COLLSCAN."),
+    drop_extra: bool = typer.Option(False, "--drop-extra", help="Drop indexes that are not declared in INDEX_SPECS."),
+    skip_ensure: bool = typer.Option(False, "--skip-ensure", help="Only verify, do not create indexes."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Report what would be created/rebuilt/dropped."),
+) -> None:
+    """Create/reconcile the declared MongoDB indexes and check the query plans."""
+    from lib.db.indexes import ensure_indexes, verify_query_plans
+
+    if not skip_ensure:
+        results = ensure_indexes(drop_extra=drop_extra, dry_run=dry_run)
+        if any("error" in r for r in results.values()):
+            raise typer.Exit(1)
+    if verify:
+        failures = verify_query_plans()
+        if failures:
+            console.print(f"❌ {len(failures)} query shape(s) fall back to a collection scan")
+            raise typer.Exit(1)
+        console.print("✅ Every known query shape uses an index")
+
+
+if __name__ == "__main__":
+    app()
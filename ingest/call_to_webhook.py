@@ -1,20 +1,46 @@
-import json
+import logging
 import os
-from typing import Any, Dict, Iterable, Optional
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
 
 import requests
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from utils.log import get_logger, log_sampled, truncate
+
 load_dotenv()
 
+logger = get_logger(__name__)
+
 # Separate credentials for fetching article data and signing webhook calls.
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY", "eyJAdminK3y-2025!zXt9fGHEMPLq4RsVm7DwuJXeb6u")
 WEBHOOK_SIGNATURE = os.getenv("WEBHOOK_SIGNATURE", NEWSAPI_KEY)
 
 DEFAULT_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", 30))
 FETCH_TIMEOUT = float(os.getenv("NEWS_FETCH_TIMEOUT", 10))
+# Opt-in: also read the article back through the public API and compare it with the local payload.
+WEBHOOK_VERIFY_REMOTE = os.getenv("WEBHOOK_VERIFY_REMOTE", "0").strip().lower() in ("1", "true", "yes")
+
+# Fields of the article document needed to build webhook payloads.
+WEBHOOK_PROJECTION = {"url": 1, "title": 1, "text": 1, "topic": 1, "source": 1, "sentiment": 1, "scraped_at": 1}
+_PAYLOAD_FIELDS = ["url", "title", "text", "topic", "source", "sentiment", "scraped_at"]
+
+# Webhook targets and the fields each one requires.
+WEBHOOK_TARGETS = ("embedding", "thread_events")
+_REQUIRED_FIELDS = {
+    "embedding": ["article_id", "url", "title", "text", "topic", "source", "sentiment", "scraped_at"],
+    "thread_events": ["article_id", "source", "scraped_at"],
+}
+# Batch endpoints: when set, the outbox worker POSTs {"events": [...]} with up to
+# WEBHOOK_BATCH_MAX payloads; when empty, events are sent one per request.
+_BATCH_URL_ENV = {"embedding": "WEBHOOK_URL_BATCH", "thread_events": "WEBHOOK_URL_THREAD_EVENTS_BATCH"}
+WEBHOOK_BATCH_MAX = int(os.getenv("WEBHOOK_BATCH_MAX", 50))
+
+
+class WebhookDeliveryError(Exception):
+    """A webhook POST that did not get a 2xx answer (or no answer at all)."""
 
 
 def _build_session(total_retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
@@ -37,6 +63,8 @@ def _build_session(total_retries: int = 3, backoff_factor: float = 0.5) -> reque
 
 
 SESSION = _build_session()
+# The outbox worker retries with its own backoff, so its requests are not retried here.
+DELIVERY_SESSION = _build_session(total_retries=0)
 
 
 def _validate_payload(payload: Dict[str, Any], required_fields: Iterable[str]) -> Optional[str]:
@@ -47,13 +75,12 @@ def _validate_payload(payload: Dict[str, Any], required_fields: Iterable[str]) -
 
 
 def _log_outgoing(target_url: str, headers: Dict[str, Any], payload: Dict[str, Any]) -> None:
-    try:
-        redacted_headers = {**headers, "X-Signature": "***redacted***"} if "X-Signature" in headers else headers
-        print(f"Sending webhook POST to: {target_url}")
-        print(f"Headers: {redacted_headers}")
-        print("Payload:", json.dumps(payload, ensure_ascii=False))
-    except Exception:
-        print("Payload (repr):", repr(payload))
+    # Payloads carry the full article text: only rendered (truncated) at DEBUG.
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    redacted_headers = {**headers, "X-Signature": "***redacted***"} if "X-Signature" in headers else headers
+    logger.debug("Sending webhook POST to %s", target_url,
+                 extra={"fields": {"headers": redacted_headers, "payload": truncate(payload)}})
 
 
 def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: float) -> Optional[Dict[str, Any]]:
@@ -61,51 +88,165 @@ def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeo
     response = SESSION.post(url, json=payload, headers=headers, timeout=timeout)
     try:
         response.raise_for_status()
-        print(f"Webhook POST succeeded: {response.status_code} Body: {response.text}")
+        log_sampled(logger, "webhook_post_ok", logging.INFO, "Webhook POST succeeded: %s %s",
+                    response.status_code, url)
         try:
             return response.json()
         except Exception:
             return None
     except requests.HTTPError as http_err:
-        print(f"Error sending to webhook: {http_err} Status: {response.status_code} Body: {response.text}")
+        logger.warning("Error sending to webhook: %s Status: %s Body: %s", http_err, response.status_code,
+                       response.text)
         return None
 
 
-def send_to_webhook_to_embedding(insert_id, webhook_url=None):
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def build_news_payload(article: Dict[str, Any], insert_id: Optional[str] = None) -> Dict[str, Any]:
+    """Webhook payload (same shape get_news_data returns) built from the stored article document."""
+    payload: Dict[str, Any] = {"article_id": str(insert_id if insert_id is not None else article.get("_id"))}
+    for field in _PAYLOAD_FIELDS:
+        payload[field] = _json_value(article.get(field))
+    return payload
+
+
+def get_local_news_data(insert_id: str) -> Optional[Dict[str, Any]]:
+    """One projected read of the article from our own MongoDB."""
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    from lib.repositories.articles_repository import ArticlesRepository
+
+    try:
+        selector = {"_id": ObjectId(insert_id)}
+    except (InvalidId, TypeError):
+        selector = {"_id": insert_id}
+    article = ArticlesRepository().collection.find_one(selector, WEBHOOK_PROJECTION)
+    if not article:
+        logger.warning("No local article found for ID: %s", insert_id)
+        return None
+    return build_news_payload(article, insert_id)
+
+
+def _verify_against_remote(payload: Dict[str, Any]) -> None:
+    remote = get_news_data(payload["article_id"])
+    if remote is None:
+        logger.warning("⚠️ Consistency check: article %s not available through the API yet", payload["article_id"])
+        return
+    mismatched = [f for f in ("url", "title", "topic", "source") if remote.get(f) != payload.get(f)]
+    if mismatched:
+        logger.warning("⚠️ Consistency check: article %s differs from the API in %s", payload["article_id"], mismatched)
+
+
+def resolve_news_payload(insert_id, article: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Payload for the webhooks of one article: from the in-memory document when
+    given, else from one local MongoDB read. The remote API is only queried
+    when WEBHOOK_VERIFY_REMOTE is on.
+    """
+    payload = build_news_payload(article, insert_id) if article is not None else get_local_news_data(insert_id)
+    if payload is not None and WEBHOOK_VERIFY_REMOTE:
+        _verify_against_remote(payload)
+    return payload
+
+
+def target_url(target: str) -> str:
+    if target == "embedding":
+        return os.getenv("WEBHOOK_URL", "https://servicesemantic.newsapi.one/webhook/news")
+    return os.getenv("WEBHOOK_URL_THREAD_EVENTS", "https://www.servicete.newsapi.one/webhooks/article-vectorized")
+
+
+def target_batch_url(target: str) -> Optional[str]:
+    return os.getenv(_BATCH_URL_ENV[target], "").strip() or None
+
+
+def _target_headers(target: str) -> Dict[str, str]:
+    headers = {"Content-Type": "application/json"}
+    if target == "embedding":
+        headers["X-Signature"] = WEBHOOK_SIGNATURE
+    return headers
+
+
+def target_payload(target: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    if target == "embedding":
+        return dict(data)
+    return {"article_id": data.get("article_id"), "source": data.get("source"), "scraped_at": data.get("scraped_at")}
+
+
+def outbox_events_for(article: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One outbox event per webhook target for a classified article (used as the articles buffer companion)."""
+    from lib.repositories.webhook_outbox_repository import WebhookOutboxRepository
+
+    data = build_news_payload(article)
+    events = []
+    for target in WEBHOOK_TARGETS:
+        payload = target_payload(target, data)
+        error = _validate_payload(payload, _REQUIRED_FIELDS[target])
+        events.append(WebhookOutboxRepository.new_event(article["_id"], target, payload, error))
+    return events
+
+
+def post_events(target: str, payloads: List[Dict[str, Any]], timeout: float = DEFAULT_TIMEOUT) -> None:
+    """
+    Deliver payloads of one target: a single POST to the batch endpoint when
+    there is more than one, else a plain POST. Raises WebhookDeliveryError.
+    """
+    if len(payloads) > 1:
+        url = target_batch_url(target)
+        if not url:
+            raise ValueError(f"No batch endpoint configured for '{target}' ({_BATCH_URL_ENV[target]})")
+        body: Dict[str, Any] = {"events": payloads}
+    else:
+        url = target_url(target)
+        body = payloads[0]
+    _log_outgoing(url, _target_headers(target), body)
     try:
-        payload = get_news_data(insert_id)
+        response = DELIVERY_SESSION.post(url, json=body, headers=_target_headers(target), timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        raise WebhookDeliveryError(f"{target}: {e}") from e
+    if response.status_code >= 300:
+        raise WebhookDeliveryError(f"{target}: HTTP {response.status_code} {response.text[:200]}")
+
+
+def send_to_webhook_to_embedding(insert_id, webhook_url=None, payload: Optional[Dict[str, Any]] = None):
+    try:
+        payload = payload if payload is not None else resolve_news_payload(insert_id)
         if not payload:
-            print("No data found to send to webhook.")
+            logger.warning("No data found to send to webhook.")
             return None
 
-        required_fields = ["article_id", "url", "title", "text", "topic", "source", "sentiment", "scraped_at"]
-        validation_error = _validate_payload(payload, required_fields)
+        validation_error = _validate_payload(payload, _REQUIRED_FIELDS["embedding"])
         if validation_error:
-            print(validation_error)
+            logger.warning(validation_error)
             return None
 
-        headers = {
-            "Content-Type": "application/json",
-            "X-Signature": WEBHOOK_SIGNATURE,
-        }
-
-        target_url = webhook_url or os.getenv("WEBHOOK_URL", "https://servicesemantic.newsapi.one/webhook/news")
-        return _post_json(target_url, payload, headers, timeout=DEFAULT_TIMEOUT)
+        url = webhook_url or target_url("embedding")
+        return _post_json(url, payload, _target_headers("embedding"), timeout=DEFAULT_TIMEOUT)
 
     except requests.exceptions.RequestException as e:
         # Network-level errors, timeouts, DNS, etc.
-        print(f"Error sending to webhook (network): {e}")
+        logger.warning("Error sending to webhook (network): %s", e)
         return None
 
 
-def send_to_all_webhooks(insert_id, webhook_url=None):
-    """Send to both embedding and thread-event webhooks; returns a result map."""
+def send_to_all_webhooks(insert_id, webhook_url=None, article: Optional[Dict[str, Any]] = None):
+    """
+    Send to both embedding and thread-event webhooks; returns a result map.
+    The payload is assembled once, from ``article`` when the caller has it.
+    """
     webhook_urls = webhook_url or {}
     embedding_url = webhook_urls.get("embedding") if isinstance(webhook_urls, dict) else webhook_urls
     thread_url = webhook_urls.get("thread_events") if isinstance(webhook_urls, dict) else None
 
-    embedding_resp = send_to_webhook_to_embedding(insert_id, webhook_url=embedding_url)
-    thread_resp = send_to_webhook_thread_events(insert_id, webhook_url=thread_url)
+    payload = resolve_news_payload(insert_id, article)
+    if not payload:
+        logger.warning("No data found to send to webhooks.")
+        return {"embedding": None, "thread_events": None}
+    embedding_resp = send_to_webhook_to_embedding(insert_id, webhook_url=embedding_url, payload=payload)
+    thread_resp = send_to_webhook_thread_events(insert_id, webhook_url=thread_url, payload=payload)
 
     return {
         "embedding": embedding_resp,
@@ -113,33 +254,27 @@ def send_to_all_webhooks(insert_id, webhook_url=None):
     }
 
 
-def send_to_webhook_thread_events(insert_id, webhook_url=None):
-    data = get_news_data(insert_id)
+def send_to_webhook_thread_events(insert_id, webhook_url=None, payload: Optional[Dict[str, Any]] = None):
+    data = payload if payload is not None else resolve_news_payload(insert_id)
     if not data:
-        print("No data found to send to webhooks.")
+        logger.warning("No data found to send to webhooks.")
         return None
     try:
-        required_fields = ["article_id", "source", "scraped_at"]
-        validation_error = _validate_payload(data, required_fields)
+        validation_error = _validate_payload(data, _REQUIRED_FIELDS["thread_events"])
         if validation_error:
-            print(validation_error)
+            logger.warning(validation_error)
             return None
-        payload = {
-            "article_id": data.get("article_id"),
-            "source": data.get("source"),
-            "scraped_at": data.get("scraped_at"),
-        }
-        target_url = webhook_url or os.getenv("WEBHOOK_URL_THREAD_EVENTS",
-                                              "https://www.servicete.newsapi.one/webhooks/article-vectorized")
-        headers = {"Content-Type": "application/json"}
-        return _post_json(target_url, payload, headers, timeout=DEFAULT_TIMEOUT)
+        payload = target_payload("thread_events", data)
+        url = webhook_url or target_url("thread_events")
+        return _post_json(url, payload, _target_headers("thread_events"), timeout=DEFAULT_TIMEOUT)
     except requests.exceptions.RequestException as e:
         # Network-level errors, timeouts, DNS, etc.
-        print(f"Error sending to webhook (network): {e}")
+        logger.warning("Error sending to webhook (network): %s", e)
         return None
 
 
 def get_news_data(insert_id: str, timeout: float = FETCH_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """Read the article back through the public API (only used for WEBHOOK_VERIFY_REMOTE checks)."""
     base_url = f"https://newsapi.one/v1/news/{insert_id}?apiKey={NEWSAPI_KEY}"
     try:
         response = SESSION.get(base_url, timeout=timeout)
@@ -147,7 +282,7 @@ def get_news_data(insert_id: str, timeout: float = FETCH_TIMEOUT) -> Optional[Di
         data_raw = response.json()
         data = data_raw.get("data", {})
         if not data:
-            print(f"No news data found for ID: {insert_id}")
+            logger.warning("No news data found for ID: %s", insert_id)
             return None
         data_to_return: Dict[str, Any] = {
             "article_id": data.get("id"),
@@ -160,12 +295,10 @@ def get_news_data(insert_id: str, timeout: float = FETCH_TIMEOUT) -> Optional[Di
             "scraped_at": data.get("scraped_at"),
         }
         # Log fetched data summary for debugging without leaking raw response
-        try:
-            print(f"Fetched news data for {insert_id}:", json.dumps(data_to_return, ensure_ascii=False))
-        except Exception:
-            print(f"Fetched news data for {insert_id} (repr):", repr(data_to_return))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetched news data for %s", insert_id, extra={"fields": {"data": truncate(data_to_return)}})
         return data_to_return
     except (requests.exceptions.RequestException, ValueError) as e:
         # ValueError catches JSON decode errors
-        print(f"Error fetching news data: {e}")
+        logger.warning("Error fetching news data: %s", e)
         return None
@@ -3,31 +3,45 @@ import os
 
 from dotenv import load_dotenv
 
-from ingest.call_to_webhook import send_to_all_webhooks
-
 load_dotenv()
 from collections import Counter
 from datetime import datetime, timezone
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 import re
+import hashlib
+import json
 from bson import ObjectId
-from ingest.get_all_articles import get_all_articles
-from ingest.summarizer import smart_summarize
+from ingest.call_to_webhook import outbox_events_for
+from ingest.custom_scrapers import fetch_discovered
+from ingest.get_all_articles import discover_all_links
+from ingest.inference_client import InferenceClient
+from ingest.models import (HYPOTHESIS_TEMPLATE, MODEL_NAME as SENTIMENT_MODEL_NAME, MODEL_NAME_TOPIC, classify_topic,
+                           describe_device, get_sentiment_pipeline, get_topic_pipeline)
+from ingest.summarizer import SUMMARIZER_PROFILES, load_summarizer, select_profile, summarize_with_profile
 from lib.repositories.articles_repository import ArticlesRepository
 from lib.repositories.link_pool_repository import LinkPoolRepository
 from lib.repositories.metadata_repository import MetadataRepository
-from lib.repositories.global_metadata_repository import GlobalMetadataRepository
+from lib.repositories.webhook_outbox_repository import WebhookOutboxRepository
+from ingest.global_counters import GlobalCounters
+from ingest.inference_pool import INFERENCE_THREADS_PER_WORKER, INFERENCE_WORKERS, InferencePool
+from ingest.rule_cleaner import FAST_CLEAN_ENABLED, FAST_CLEAN_MIN_CONFIDENCE, FastCleanStats, fast_clean
+from ingest.tokenization import article_token_cache
+from ingest.topic_prefilter import TopicPrefilterStats, propose_labels
+from ingest.text_cleaner import OLLAMA_URL, AsyncTextCleaner, build_cleaning_payload
+from utils.log import get_logger, log_sampled, setup_logging
+from concurrent.futures import Future, as_completed
+from contextlib import nullcontext
+import logging
 import requests
 import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 load_dotenv()
 
-CACHE_DIR_FROM_ENV = os.getenv('TRANSFORMERS_CACHE')
-
 # tzinfo constant for UTC
 TZ_UTC = timezone.utc
 
+logger = get_logger(__name__)
+
 
 def generate_uuid4():
     return str(uuid.uuid4())
@@ -42,7 +56,6 @@ _rx = re.compile(_PATTERN)
 repo_articles = ArticlesRepository()
 repo_link_pool = LinkPoolRepository()
 repo_metadata = MetadataRepository()
-repo_global_metadata = GlobalMetadataRepository()
 
 # Define your candidate labels (topics)
 CANDIDATE_TOPICS = [
@@ -69,109 +82,30 @@ SKIP_TITLE_PHRASES = [
     "Accessibility statement"
 ]
 
-# Load HuggingFace sentiment_pipeline
-MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
-CACHE_DIR = CACHE_DIR_FROM_ENV if CACHE_DIR_FROM_ENV else "/home/christianfita/news-scrawler-ai/models/transformers"
-
-# Device detection: prefer CUDA, then MPS (Apple), else CPU
-# For transformers.pipeline pass an integer device index (0 for first CUDA GPU, -1 for CPU)
-TORCH_DEVICE = torch.device("cpu")
-PIPELINE_DEVICE = -1
-if torch.cuda.is_available():
-    TORCH_DEVICE = torch.device("cuda:0")
-    PIPELINE_DEVICE = 0
-elif getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
-    TORCH_DEVICE = torch.device("mps")
-    # some HF pipeline versions don't accept 'mps' as device arg; use CPU device index (-1)
-    PIPELINE_DEVICE = -1
-
-print(f"Using torch device: {TORCH_DEVICE}  | pipeline device index: {PIPELINE_DEVICE}")
-
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, cache_dir=CACHE_DIR)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, cache_dir=CACHE_DIR)
-# move model weights to torch device when possible
-try:
-    model.to(TORCH_DEVICE)
-except Exception:
-    pass
-
-# Debug: report where model parameters live and torch/CUDA info
-try:
-    param_device = next(model.parameters()).device
-    print(f"Model 1 first parameter device: {param_device}")
-except Exception:
-    print("Model 1 device: unknown")
-
-print(
-    f"torch version: {torch.__version__}, torch.cuda.is_available: {torch.cuda.is_available()}, torch.version.cuda: {torch.version.cuda}")
-
-# Create sentiment pipeline robustly; fall back to CPU if GPU pipeline creation fails
-try:
-    sentiment_pipeline = pipeline(
-        "sentiment-analysis",
-        model=model,
-        tokenizer=tokenizer,
-        device=PIPELINE_DEVICE,
-        max_length=512,
-        truncation=True,
-    )
-except Exception as e:
-    print(
-        f"Warning: failed to create sentiment pipeline on device {PIPELINE_DEVICE}: {e}. Falling back to CPU pipeline.")
-    try:
-        sentiment_pipeline = pipeline(
-            "sentiment-analysis",
-            model=model,
-            tokenizer=tokenizer,
-            device=-1,
-            max_length=512,
-            truncation=True,
-        )
-    except Exception as e2:
-        print(f"Error: failed to create fallback CPU sentiment pipeline: {e2}")
-        sentiment_pipeline = None
-
-# Load HuggingFace topic_pipeline
-MODEL_NAME_TOPIC = "facebook/bart-large-mnli"
-CACHE_DIR_TOPIC = CACHE_DIR_FROM_ENV if CACHE_DIR_FROM_ENV else "/home/christianfita/news-scrawler-ai/models/transformers"
-
-tokenizer_topic = AutoTokenizer.from_pretrained(MODEL_NAME_TOPIC, cache_dir=CACHE_DIR_TOPIC)
-model_topic = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME_TOPIC, cache_dir=CACHE_DIR_TOPIC)
-try:
-    model_topic.to(TORCH_DEVICE)
-except Exception:
-    pass
-
-# Debug: report where topic model parameters live
-try:
-    param_device_topic = next(model_topic.parameters()).device
-    print(f"Model topic first parameter device: {param_device_topic}")
-except Exception:
-    print("Model topic device: unknown")
-
-try:
-    topic_pipeline = pipeline(
-        "zero-shot-classification",
-        model=model_topic,
-        tokenizer=tokenizer_topic,
-        device=PIPELINE_DEVICE,
-        max_length=512,
-        truncation=True
-    )
-except Exception as e:
-    print(f"Warning: failed to create topic pipeline on device {PIPELINE_DEVICE}: {e}. Falling back to CPU pipeline.")
-    try:
-        topic_pipeline = pipeline(
-            "zero-shot-classification",
-            model=model_topic,
-            tokenizer=tokenizer_topic,
-            device=-1,
-            max_length=512,
-            truncation=True
-        )
-    except Exception as e2:
-        print(f"Error: failed to create fallback CPU topic pipeline: {e2}")
-        topic_pipeline = None
+INFERENCE_SERVER_URL = os.getenv("INFERENCE_SERVER_URL", "").strip()
+CLASSIFIER_PIPELINE = os.getenv("CLASSIFIER_PIPELINE", "staged").strip().lower()  # staged | serial
+# Serial mode: crawled articles are classified this many at a time.
+CLASSIFY_CHUNK_SIZE = int(os.getenv("CLASSIFY_CHUNK_SIZE", 256))
+
+# Stored on every article so ingest/reclassify.py can find what an upgrade made stale.
+# Bump PIPELINE_VERSION when the stage logic itself changes (not just a model):
+# articles with an older one get every stage re-run.
+PIPELINE_VERSION = 1
+
+# With INFERENCE_SERVER_URL set, summarization/topic/sentiment go to the shared
+# local model server (ingest/inference_server.py) and no weights are loaded here.
+if INFERENCE_SERVER_URL:
+    inference_client = InferenceClient(INFERENCE_SERVER_URL)
+    sentiment_pipeline = None
+    topic_pipeline = None
+    print(f"Using inference server at {INFERENCE_SERVER_URL}")
+else:
+    inference_client = None
+    describe_device()
+    # Load eagerly so forked inference workers share the weights.
+    load_summarizer()
+    sentiment_pipeline = get_sentiment_pipeline()
+    topic_pipeline = get_topic_pipeline()
 
 
 def is_valid_sample(sample: str) -> bool:
@@ -186,95 +120,118 @@ def is_valid_sample(sample: str) -> bool:
         return False
 
 
-def classify_articles():
+def summarize_text(text: str, queue_depth: Optional[int] = None) -> Tuple[str, Optional[str]]:
+    """Summary stage: (summary, profile used). Short texts are their own summary."""
+    if len(text) <= 200:
+        return text, None
+    if inference_client is not None:
+        return inference_client.summarize_with_profile(text, select_profile(queue_depth))
+    return summarize_with_profile(text, queue_depth=queue_depth)
+
+
+def classify_summary(summary: str) -> Dict[str, Any]:
+    """Topic + sentiment stage on the summary."""
+    # Stage 1: cheap lexicon proposes the top-k labels (or all, when unsure);
+    # stage 2: NLI only scores those hypotheses.
+    topic_labels, _ = propose_labels(summary, CANDIDATE_TOPICS)
+    if inference_client is not None:
+        topic = inference_client.classify_topic(summary, topic_labels)
+        sentiment = inference_client.sentiment(summary)
+    else:
+        topic = classify_topic(summary, topic_labels)
+        sentiment = sentiment_pipeline(summary)[0]
+    return {
+        "topic": topic["labels"][0],
+        "topic_labels_scored": len(topic_labels),
+        "sentiment": {
+            "label": sentiment["label"],
+            "score": float(sentiment["score"]),
+        },
+    }
+
+
+def analyze_text(text: str, queue_depth: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run the model stages (summary, topic, sentiment) for one article text.
+    ``queue_depth`` (articles still waiting) drives the 'auto' summarizer profile.
+    """
+    # One token cache per article: the summarizer fills it and the topic
+    # stage reuses the summary's BART token ids as its NLI premise.
+    with article_token_cache():
+        summary, summary_profile = summarize_text(text, queue_depth)
+        return {"summary": summary, "summary_profile": summary_profile, **classify_summary(summary)}
+
+
+def _analyze_task(payload: Tuple[str, int]) -> Dict[str, Any]:
+    text, queue_depth = payload
+    return analyze_text(text, queue_depth)
+
+
+def inference_pool() -> Any:
+    """
+    Fork pool for _iter_analyses when INFERENCE_WORKERS > 1, else a no-op context (yields None).
+    Enter it before anything starts threads (AsyncTextCleaner, write buffers):
+    a forked child inherits their locks in whatever state they were in.
+    """
+    if INFERENCE_WORKERS > 1 and inference_client is None:
+        return InferencePool(_analyze_task, INFERENCE_WORKERS, INFERENCE_THREADS_PER_WORKER or None)
+    return nullcontext()
+
+
+def _iter_analyses(tasks: List[Tuple[int, str]], pool: Optional[InferencePool] = None,
+                   waiting: int = 0) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Yield (index, analysis, error); runs on ``pool`` (see inference_pool) when one is given.
+    ``waiting`` is the number of articles of the run queued behind these tasks.
+    """
+    # Queue depth seen by each article = articles still waiting behind it, in this batch and after it.
+    payloads = [(i, (text, waiting + len(tasks) - pos)) for pos, (i, text) in enumerate(tasks)]
+    if pool is not None and len(tasks) > 1:
+        yield from pool.imap(payloads)
+        return
+
+    for i, payload in payloads:
+        try:
+            yield i, _analyze_task(payload), None
+        except Exception as e:
+            yield i, None, str(e)
+
+
+def _iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def start_sample() -> Tuple[str, str, int]:
+    """Open a sample (metadata document); returns (sample id, sample_date, sample_seq)."""
     id_for_metadata = generate_uuid4()
-    # Initialize counters
-    sentiment_counter = Counter()
-    topic_counter = Counter()
-    num_well_classified = 0
-    num_failed_classified = 0
+    # Structured, indexed replacement for the old "batch-YYYY-MM-DD" sample naming.
+    sample_date = datetime.now(TZ_UTC).strftime("%Y-%m-%d")
+    sample_seq = repo_metadata.next_sample_seq(sample_date)
     try:
         repo_metadata.insert_metadata(
             {
                 "_id": id_for_metadata,
+                "sample_date": sample_date,
+                "sample_seq": sample_seq,
                 "gathering_sample_startedAt": datetime.now(TZ_UTC),
             }
         )
     except Exception as e:
         # Log and continue; do not recurse on failure
         print(f"Error inserting metadata: {e}")
+    return id_for_metadata, sample_date, sample_seq
 
-    for i, article in enumerate(get_all_articles(), start=1):
-        title = (article.get("title") or "").strip()
-        # Skip undesired static pages by title
-        title_lower = title.lower()
-        if any(phrase in title_lower for phrase in SKIP_TITLE_PHRASES):
-            # mark link as processed to avoid re-processing
-            try:
-                repo_link_pool.update_link_in_pool({"url": article.get("url")},
-                                                   {"$set": {"is_articles_processed": True, "sample": id_for_metadata}})
-            except Exception:
-                pass
-            print(f"[{i}] ⏭️ Skipping static/boilerplate article: {title}")
-            continue
-
-        text = article.get("text", "")
-        text_len = len(text)
-        if not text:
-            continue
-
-        try:
-            if text_len > 200:
-                summary = smart_summarize(text)
-            else:
-                summary = text
-
-            topic = topic_pipeline(summary, candidate_labels=CANDIDATE_TOPICS)
-            sentiment = sentiment_pipeline(summary)[0]
-            try:
-                text_cleaned = call_to_gpt_api(article.get("text"), timeout=60)  # 60 second timeout
-            except Exception as e:
-                print(f"[{i}] ⚠️ Text cleaning failed: {e}, using original text")
-                text_cleaned = article.get("text", "")
-
-            classified_article = {
-                "title": article.get("title"),
-                "url": article.get("url"),
-                "summary": summary,
-                "text": text_cleaned,
-                "source": article.get("source"),
-                "sample": id_for_metadata,
-                "scraped_at": article.get("scraped_at"),
-                "topic": topic["labels"][0],
-                "isCleaned": False,
-                "sentiment": {
-                    "label": sentiment["label"],
-                    "score": sentiment["score"]
-                },
-            }
-            # set data for metadata
-            num_well_classified += 1
-            topic_label = topic["labels"][0]
-            sentiment_label = sentiment["label"]
-            topic_counter[topic_label] += 1
-            sentiment_counter[sentiment_label] += 1
-
-            # inserting data into mongoDB
-            insert_id = repo_articles.create_articles(classified_article)
-            send_to_all_webhooks(insert_id)
-            add_one_to_total_articles_in_documents()
-            add_one_to_topic_data_in_documents(topic_label)
-            repo_link_pool.update_link_in_pool({"url": article.get("url")},
-                                               {"$set": {"is_articles_processed": True, "sample": id_for_metadata}})
-
-            print(f"[{i}] ✅ {classified_article['title']}")
-
-        except Exception as e:
-            num_failed_classified += 1
-            repo_link_pool.update_link_in_pool({"url": article.get("url")},
-                                               {"$set": {"is_articles_processed": True, "sample": id_for_metadata}})
-            print(f"[{i}] ❌ Error classifying article: {e}")
 
+def finish_sample(id_for_metadata: str, topic_counter: Counter, sentiment_counter: Counter,
+                  num_well_classified: int, num_failed_classified: int, extra: Optional[Dict[str, Any]] = None) -> None:
+    """Store the run's counts and topic/sentiment distributions on the sample's metadata document."""
     # Total number of successfully classified articles
     total_classified = sum(topic_counter.values())
 
@@ -296,32 +253,239 @@ def classify_articles():
             },
             "topic_distribution": topic_percentages,
             "sentiment_distribution": sentiment_percentages,
+            **(extra or {}),
             "gathering_sample_finishedAt": datetime.now(TZ_UTC)
         }
     })
 
+
+def stage_versions(summary_profile: Optional[str]) -> Dict[str, str]:
+    """
+    Version of each model stage as it runs today. ``summary`` depends on the
+    profile that produced the summary (None = short text kept as its own summary);
+    ``topic`` also changes with the candidate labels and the NLI hypothesis.
+    """
+    if summary_profile is None:
+        summary = "identity"
+    else:
+        spec = SUMMARIZER_PROFILES.get(summary_profile, {})
+        summary = f"{summary_profile}:" + ",".join(f"{k}={v}" for k, v in sorted(spec.items()))
+    labels = hashlib.sha1("\n".join([HYPOTHESIS_TEMPLATE, *CANDIDATE_TOPICS]).encode("utf-8")).hexdigest()[:10]
+    return {"summary": summary, "topic": f"{MODEL_NAME_TOPIC}#{labels}", "sentiment": SENTIMENT_MODEL_NAME}
+
+
+def model_fingerprint(versions: Dict[str, Optional[str]]) -> str:
+    """Short, indexable id of a set of stage versions (the article's ``model_version``)."""
+    return hashlib.sha1(json.dumps(versions, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def build_classified_article(article: Dict[str, Any], analysis: Dict[str, Any], id_for_metadata: str,
+                             sample_date: str, sample_seq: int) -> Dict[str, Any]:
+    """Article document as stored in ``articles``; ``text`` is filled in once cleaning finishes."""
+    versions = stage_versions(analysis["summary_profile"])
+    return {
+        "title": article.get("title"),
+        "url": article.get("url"),
+        "summary": analysis["summary"],
+        "summary_profile": analysis["summary_profile"],
+        "text": None,
+        "source": article.get("source"),
+        "sample": id_for_metadata,
+        "sample_date": sample_date,
+        "sample_seq": sample_seq,
+        "scraped_at": article.get("scraped_at"),
+        "topic": analysis["topic"],
+        "isCleaned": False,
+        "sentiment": analysis["sentiment"],
+        "pipeline_version": PIPELINE_VERSION,
+        "model_version": model_fingerprint(versions),
+        "model_versions": versions,
+    }
+
+
+def submit_cleaning(cleaner: AsyncTextCleaner, text: str, stats: FastCleanStats) -> Future:
+    """Rule-based cleaning when it is confident enough, else the LLM cleaner; returns a Future of the text."""
+    fast_text, confidence = fast_clean(text) if FAST_CLEAN_ENABLED else ("", 0.0)
+    if confidence >= FAST_CLEAN_MIN_CONFIDENCE:
+        # Clean enough after the rule-based pass; skip the LLM round trip.
+        future: Future = Future()
+        future.set_result(fast_text)
+        stats.record(bypassed=True)
+        return future
+    stats.record(bypassed=False)
+    return cleaner.submit(text)
+
+
+def classify_articles():
+    """
+    Crawl and classify one sample. By default the stages run concurrently
+    (ingest/staged_pipeline.py); CLASSIFIER_PIPELINE=serial keeps the
+    single-loop version below, which can also fork INFERENCE_WORKERS processes.
+    """
+    if CLASSIFIER_PIPELINE == "serial":
+        return classify_articles_serial()
+    from ingest.staged_pipeline import classify_articles_staged
+    return classify_articles_staged()
+
+
+def classify_articles_serial():
+    # The fork pool is started before the cleaner loop and the write-buffer timers start their threads.
+    with inference_pool() as pool:
+        return _classify_articles_serial(pool)
+
+
+def _skip_or_task(i: int, article: Dict[str, Any], id_for_metadata: str) -> Optional[Tuple[int, str]]:
+    title = (article.get("title") or "").strip()
+    # Skip undesired static pages by title
+    title_lower = title.lower()
+    if any(phrase in title_lower for phrase in SKIP_TITLE_PHRASES):
+        # mark link as processed to avoid re-processing
+        try:
+            repo_link_pool.update_link_in_pool_buffered(
+                {"url": article.get("url")},
+                {"$set": {"is_articles_processed": True, "sample": id_for_metadata}})
+        except Exception:
+            pass
+        log_sampled(logger, "skip_boilerplate", logging.INFO, "[%d] ⏭️ Skipping static/boilerplate article: %s", i, title)
+        return None
+
+    text = article.get("text", "")
+    if not text:
+        return None
+    return i, text
+
+
+def _fetch_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Download and extract the discovered links of one chunk; links without text are left out."""
+    fetched = []
+    for i, link in chunk:
+        try:
+            article = fetch_discovered(link)
+        except Exception as e:
+            log_sampled(logger, "fetch_failed", logging.WARNING, "[%d] Fetch failed for %s: %s", i, link.get("url"), e)
+            continue
+        if article is not None:
+            fetched.append((i, article))
+    return fetched
+
+
+def _classify_articles_serial(pool: Optional[InferencePool]):
+    # Global total/topic counters are accumulated and applied as one $inc.
+    # Created first: without GLOBAL_METADATA_ID the run stops before opening a sample.
+    global_counters = GlobalCounters()
+    id_for_metadata, sample_date, sample_seq = start_sample()
+    # Initialize counters
+    sentiment_counter = Counter()
+    topic_counter = Counter()
+    num_well_classified = 0
+    num_failed_classified = 0
+    topic_by_insert_id: Dict[str, str] = {}
+
+    def on_articles_flushed(inserted_ids: List[str]) -> None:
+        # Count only articles whose batch was actually stored.
+        for insert_id in inserted_ids:
+            global_counters.add_article(topic_by_insert_id.pop(insert_id, None))
+
+    # Articles and link_pool updates are written in batches; each article's
+    # webhook events go into the outbox with it (ingest/webhook_dispatcher.py delivers them).
+    repo_articles.write_buffer(on_flush=on_articles_flushed,
+                               companion=(WebhookOutboxRepository().collection, outbox_events_for))
+    repo_link_pool.write_buffer()
+
+    def mark_failed(i: int, article: Dict[str, Any], error: Any) -> None:
+        nonlocal num_failed_classified
+        num_failed_classified += 1
+        repo_link_pool.update_link_in_pool_buffered({"url": article.get("url")},
+                                                    {"$set": {"is_articles_processed": True, "sample": id_for_metadata}})
+        logger.error("[%d] ❌ Error classifying article: %s", i, error)
+
+    def persist(future: Future) -> None:
+        nonlocal num_well_classified
+        i, article, classified_article = pending.pop(future)
+        try:
+            try:
+                text_cleaned = future.result()
+            except Exception as e:
+                logger.warning("[%d] ⚠️ Text cleaning failed: %s, using original text", i, e)
+                text_cleaned = article.get("text", "")
+            classified_article["text"] = text_cleaned
+
+            # set data for metadata
+            num_well_classified += 1
+            topic_label = classified_article["topic"]
+            sentiment_label = classified_article["sentiment"]["label"]
+            topic_counter[topic_label] += 1
+            sentiment_counter[sentiment_label] += 1
+
+            # inserting data into mongoDB (buffered, together with its outbox events)
+            # The id is assigned up front so the flush callback can find the topic
+            # even when this insert is the one that fills the batch.
+            classified_article["_id"] = ObjectId()
+            topic_by_insert_id[str(classified_article["_id"])] = topic_label
+            repo_articles.create_articles_buffered(classified_article)
+            repo_link_pool.update_link_in_pool_buffered({"url": article.get("url")},
+                                                        {"$set": {"is_articles_processed": True, "sample": id_for_metadata}})
+
+            logger.info("[%d] ✅ %s", i, classified_article["title"],
+                        extra={"fields": {"topic": topic_label, "sentiment": sentiment_label}})
+
+        except Exception as e:
+            mark_failed(i, article, e)
+
+    # Cleaning runs concurrently on the LLM endpoint; each article is persisted
+    # as soon as its cleaning finishes while inference moves on to the next one.
+    pending: Dict[Future, Tuple[int, Dict[str, Any], Dict[str, Any]]] = {}
+    cleaning_stats = FastCleanStats()
+    topic_stats = TopicPrefilterStats(len(CANDIDATE_TOPICS))
+    with AsyncTextCleaner() as cleaner:
+        # Only the discovered URLs are listed up front; the pages are fetched
+        # CLASSIFY_CHUNK_SIZE at a time, so article texts never pile up in memory.
+        links = list(discover_all_links())
+        print(f"[INFO] Total articles discovered: {len(links)}")
+        for link_chunk in _iter_chunks(enumerate(links, start=1), CLASSIFY_CHUNK_SIZE):
+            chunk = _fetch_chunk(link_chunk)
+            articles_by_index = dict(chunk)
+            tasks = [task for task in (_skip_or_task(i, article, id_for_metadata) for i, article in chunk) if task]
+            # Links after this chunk count toward the depth the 'auto' summarizer profile sees.
+            for i, analysis, error in _iter_analyses(tasks, pool, len(links) - link_chunk[-1][0]):
+                article = articles_by_index.pop(i)
+                if error:
+                    mark_failed(i, article, error)
+                    continue
+
+                topic_stats.record(analysis["topic_labels_scored"])
+                classified_article = build_classified_article(article, analysis, id_for_metadata, sample_date,
+                                                              sample_seq)
+                future = submit_cleaning(cleaner, article.get("text", ""), cleaning_stats)
+                pending[future] = (i, article, classified_article)
+
+                for future in [f for f in pending if f.done()]:
+                    persist(future)
+
+        for future in as_completed(list(pending)):
+            persist(future)
+
+        cleaning_report = cleaning_stats.report(cleaner.llm_calls, cleaner.llm_seconds)
+    print(f"Text cleaning: {cleaning_report}")
+    topic_report = topic_stats.report()
+    print(f"Topic prefilter: {topic_report}")
+
+    repo_articles.flush_writes()
+    repo_link_pool.flush_writes()
+    global_counters.close()
+
+    finish_sample(id_for_metadata, topic_counter, sentiment_counter, num_well_classified, num_failed_classified,
+                  {"text_cleaning": cleaning_report, "topic_prefilter": topic_report})
+
     return id_for_metadata
 
 
 def call_to_gpt_api(prompt: str, timeout: int = 60) -> str:
-    prompt_final = """You are a professional text cleaner.
-Your task:
-- Remove any reference to news outlets, authors, publication names, URLs, or web layout artifacts.
-- Discard malformed, incomplete, or irrelevant fragments.
-- Do not include explanations, comments, or formatting — only return the clean text.
-Text to rewrite:
-""" + prompt
-
-    api_url = "http://localhost:11434/api/generate"
-
-    payload = {
-        "model": "gpt-oss:20b",
-        "prompt": prompt_final,
-        "stream": False
-    }
+    """Blocking single-article cleaning; the classification loop uses AsyncTextCleaner instead."""
+    payload = build_cleaning_payload(prompt)
 
     try:
-        response = requests.post(api_url, json=payload, timeout=timeout)
+        response = requests.post(OLLAMA_URL, json=payload, timeout=timeout)
         data = response.json()
         return data["response"].strip()
     except requests.exceptions.Timeout:
@@ -331,18 +495,6 @@ Text to rewrite:
         print(f"GPT API error: {e}, using original text")
         return prompt  # Return original text as fallback
 
-def add_one_to_total_articles_in_documents():
-    selector = {"_id": ObjectId("6923b800f3d19f7c28f53a6d")}
-    update_data = {"$inc": {"total_articles": 1}}
-    repo_global_metadata.update_metadata(selector, update_data)
-    total_articles = repo_articles.count_articles({})
-    print(f"Total documents in the database: {total_articles}")
-
-def add_one_to_topic_data_in_documents(topic: str):
-    selector = {"_id": ObjectId("6923b800f3d19f7c28f53a6d"), "topics_data.topic": topic}
-    update_data = {"$inc": {"topics_data.$.document_count": 1}}
-    repo_global_metadata.update_metadata(selector, update_data)
-    print(f"Incremented topic count for topic: {topic}")
-
 if __name__ == "__main__":
+    setup_logging()
     classify_articles()
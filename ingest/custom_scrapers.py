@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict, Iterable, cast
+from typing import Any, Dict, Iterable, Optional, cast
 
 import feedparser
 import requests
@@ -33,7 +33,23 @@ def get_title_from_dw_url(url: str) -> str:
     return "DW Article"
 
 
-def scrape_bbc_stream() -> Iterable[Dict]:
+def _discovered(url: str, title: Optional[str], source: str, text: Optional[str] = None) -> Dict[str, Any]:
+    """Item yielded in discover_only mode: the article is fetched later by fetch_discovered."""
+    return {"title": title, "url": url, "text": text, "source": source, "scraped_at": datetime.now(timezone.utc)}
+
+
+def fetch_discovered(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Fetch stage for an item yielded with discover_only=True; None when no text could be extracted."""
+    text = item.get("text") or fetch_and_extract(item["url"])
+    if not text:
+        return None
+    title = item.get("title")
+    if not title and item.get("source") == "dw":
+        title = get_title_from_dw_url(item["url"])
+    return {**item, "title": title, "text": text, "scraped_at": datetime.now(timezone.utc)}
+
+
+def scrape_bbc_stream(discover_only: bool = False) -> Iterable[Dict]:
     """Yield BBC articles. No DB writes, no link_pool checks."""
     url_bbc = "https://www.bbc.com/news"
     try:
@@ -52,6 +68,9 @@ def scrape_bbc_stream() -> Iterable[Dict]:
             continue
         if is_urls_processed_already(full_url):
             continue
+        if discover_only:
+            yield _discovered(full_url, title, "bbc-news")
+            continue
         full_text = fetch_and_extract(full_url)
         if not full_text:
             continue
@@ -65,7 +84,7 @@ def scrape_bbc_stream() -> Iterable[Dict]:
         }
 
 
-def scrape_cnn_stream() -> Iterable[Dict]:
+def scrape_cnn_stream(discover_only: bool = False) -> Iterable[Dict]:
     url_cnn = "https://edition.cnn.com/world"
     try:
         res = requests.get(url_cnn, timeout=10)
@@ -86,6 +105,9 @@ def scrape_cnn_stream() -> Iterable[Dict]:
         title = title_tag.get_text(strip=True)
         if is_urls_processed_already(full_url):
             continue
+        if discover_only:
+            yield _discovered(full_url, title, "cnn")
+            continue
         full_text = fetch_and_extract(full_url)
         if not full_text:
             continue
@@ -99,7 +121,7 @@ def scrape_cnn_stream() -> Iterable[Dict]:
         }
 
 
-def scrape_wsj_stream() -> Iterable[Dict]:
+def scrape_wsj_stream(discover_only: bool = False) -> Iterable[Dict]:
     rss_url = "https://feeds.a.dj.com/rss/RSSWorldNews.xml"
     try:
         feed = feedparser.parse(rss_url)
@@ -115,6 +137,10 @@ def scrape_wsj_stream() -> Iterable[Dict]:
             continue
         if is_urls_processed_already(url):
             continue
+        if discover_only:
+            # The feed summary is the article text; nothing to fetch.
+            yield _discovered(url, title, "the-wall-street-journal", summary)
+            continue
         repo.insert_link({"url": url})
         yield {
             "title": title,
@@ -125,7 +151,7 @@ def scrape_wsj_stream() -> Iterable[Dict]:
         }
 
 
-def scrape_aljazeera() -> Iterable[Dict]:
+def scrape_aljazeera(discover_only: bool = False) -> Iterable[Dict]:
     import feedparser
     from datetime import datetime, timezone
     feed = feedparser.parse("https://www.aljazeera.com/xml/rss/all.xml")
@@ -136,6 +162,9 @@ def scrape_aljazeera() -> Iterable[Dict]:
             continue
         if is_urls_processed_already(url):
             continue
+        if discover_only:
+            yield _discovered(url, title, "aljazeera")
+            continue
         text = fetch_and_extract(url)
         if not text:
             continue
@@ -149,7 +178,7 @@ def scrape_aljazeera() -> Iterable[Dict]:
         }
 
 
-def scrape_dw_stream() -> Iterable[Dict]:
+def scrape_dw_stream(discover_only: bool = False) -> Iterable[Dict]:
     # crawler_dw was imported as a function (from crawler_dw import main as crawler_dw)
     # call it to get the iterable of links. Add defensive checks and logging.
     try:
@@ -173,6 +202,10 @@ def scrape_dw_stream() -> Iterable[Dict]:
         try:
             if is_urls_processed_already(link):
                 continue
+            if discover_only:
+                # The title needs a page fetch too; fetch_discovered does it.
+                yield _discovered(link, None, "dw")
+                continue
             full_text = fetch_and_extract(link)
             if not full_text:
                 continue
@@ -17,3 +17,15 @@ def get_all_articles():
                 unique_articles.append(article)
     print(f"[INFO] Total articles fetched: {len(unique_articles)}")
     return unique_articles
+
+
+def discover_all_links():
+    """Like get_all_articles, but only lists new URLs (no page fetches, no link_pool writes)."""
+    seen_urls = set()
+    for scrape_func in [scrape_bbc_stream, scrape_cnn_stream,
+                        scrape_wsj_stream, scrape_aljazeera, scrape_dw_stream]:
+        for item in scrape_func(discover_only=True):
+            url = item.get("url")
+            if url and url not in seen_urls:
+                seen_urls.add(url)
+                yield item
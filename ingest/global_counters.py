@@ -0,0 +1,108 @@
+# ingest/global_counters.py
+"""
+In-memory accumulation of the global_metadata counters.
+
+Incrementing ``total_articles`` and ``topics_data.$.document_count`` once per
+article costs two round trips each time. Counts are accumulated here and
+applied as one combined ``$inc`` (topic counters via arrayFilters). That update
+runs every GLOBAL_COUNTERS_FLUSH_INTERVAL seconds, on ``flush()``, and at exit.
+"""
+import atexit
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Union
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from dotenv import load_dotenv
+
+from lib.repositories.global_metadata_repository import GlobalMetadataRepository
+
+load_dotenv()
+
+# No default: counting into the wrong document would go unnoticed.
+GLOBAL_METADATA_ID = os.getenv("GLOBAL_METADATA_ID", "").strip()
+GLOBAL_COUNTERS_FLUSH_INTERVAL = float(os.getenv("GLOBAL_COUNTERS_FLUSH_INTERVAL", 30))
+
+
+def _document_id(raw: str) -> Union[ObjectId, str]:
+    try:
+        return ObjectId(raw)
+    except (InvalidId, TypeError):
+        return raw
+
+
+class GlobalCounters:
+    """Accumulates total/per-topic article counts and flushes them in one update."""
+
+    def __init__(self, repo: Optional[GlobalMetadataRepository] = None, document_id: str = GLOBAL_METADATA_ID,
+                 flush_interval: float = GLOBAL_COUNTERS_FLUSH_INTERVAL) -> None:
+        if not document_id:
+            raise RuntimeError("GLOBAL_METADATA_ID is empty; set it to the _id of the global_metadata document.")
+        self.repo = repo or GlobalMetadataRepository()
+        self.document_id = _document_id(document_id)
+        self.flush_interval = flush_interval
+        self.flushed_articles = 0
+        self._total = 0
+        self._topics: Counter = Counter()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._timer = threading.Thread(target=self._timer_loop, name="global-counters", daemon=True)
+            self._timer.start()
+        atexit.register(self.flush)
+
+    def add_article(self, topic: Optional[str]) -> None:
+        with self._lock:
+            self._total += 1
+            if topic:
+                self._topics[topic] += 1
+
+    def move_article(self, old_topic: Optional[str], new_topic: Optional[str]) -> None:
+        """A stored article was re-classified into another topic (the total is unchanged)."""
+        if old_topic == new_topic:
+            return
+        with self._lock:
+            if old_topic:
+                self._topics[old_topic] -= 1
+            if new_topic:
+                self._topics[new_topic] += 1
+
+    def flush(self) -> Dict[str, Any]:
+        """Apply the pending counts as one $inc; on failure they are kept for the next flush."""
+        with self._lock:
+            total, topics = self._total, Counter({t: c for t, c in self._topics.items() if c})
+            self._total, self._topics = 0, Counter()
+        if not total and not topics:
+            return {}
+
+        increments: Dict[str, int] = {}
+        if total:
+            increments["total_articles"] = total
+        array_filters = []
+        for n, (topic, count) in enumerate(sorted(topics.items())):
+            increments[f"topics_data.$[t{n}].document_count"] = count
+            array_filters.append({f"t{n}.topic": topic})
+        try:
+            self.repo.increment_counters({"_id": self.document_id}, increments, array_filters or None)
+        except Exception as e:
+            print(f"❌ Failed to update global counters, will retry: {e}")
+            with self._lock:
+                self._total += total
+                self._topics.update(topics)
+            return {}
+        self.flushed_articles += total
+        print(f"Global counters updated: +{total} articles, topics {dict(topics)}")
+        return {"total_articles": total, "topics": dict(topics)}
+
+    def _timer_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        self._closed.set()
+        self.flush()
+        # Closed counters hold nothing more to write; don't keep them alive until exit.
+        atexit.unregister(self.flush)
@@ -0,0 +1,52 @@
+# ingest/inference_client.py
+"""Thin HTTP client for the local inference server (ingest/inference_server.py)."""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", 300))
+
+
+class InferenceClient:
+    def __init__(self, base_url: str, timeout: float = INFERENCE_TIMEOUT) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # One keep-alive connection pool shared by every call from this process.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+
+    def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.post(f"{self.base_url}/{endpoint}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise RuntimeError(f"Inference server error on /{endpoint}: {data['error']}")
+        return data
+
+    def health(self) -> bool:
+        try:
+            return self.session.get(f"{self.base_url}/health", timeout=5).ok
+        except requests.exceptions.RequestException:
+            return False
+
+    def summarize(self, text: str, profile: Optional[str] = None) -> str:
+        return self.summarize_with_profile(text, profile)[0]
+
+    def summarize_with_profile(self, text: str, profile: Optional[str] = None) -> Tuple[str, str]:
+        """Return (summary, profile_used); the server's configured profile applies when None."""
+        payload: Dict[str, Any] = {"text": text}
+        if profile:
+            payload["profile"] = profile
+        data = self._post("summarize", payload)
+        return data["summary"], data["profile"]
+
+    def classify_topic(self, text: str, candidate_labels: List[str]) -> Dict[str, Any]:
+        """Same shape as the zero-shot pipeline output: {"sequence", "labels", "scores"}."""
+        return self._post("classify_topic", {"text": text, "candidate_labels": list(candidate_labels)})
+
+    def sentiment(self, text: str) -> Dict[str, Any]:
+        """Same shape as one sentiment pipeline result: {"label", "score"}."""
+        return self._post("sentiment", {"text": text})
@@ -0,0 +1,103 @@
+# ingest/inference_pool.py
+"""
+Fork-based worker pool for model inference.
+
+The parent process loads the models once; workers are forked afterwards so the
+weights are shared copy-on-write instead of being loaded again per process.
+Each worker pins its own torch thread count so N workers do not oversubscribe
+the cores of the host.
+"""
+import gc
+import multiprocessing as mp
+import os
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+# 0 or 1 keeps the classic in-process loop. Only the serial classifier and the
+# work_queue classify worker fork; the staged pipeline ignores it (and warns).
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 0))
+# 0 means "split the available cores evenly between workers"
+INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER", 0))
+
+# Set in the parent right before forking; children inherit it through fork.
+_worker_fn: Optional[Callable[[Any], Any]] = None
+
+
+def default_threads_per_worker(num_workers: int) -> int:
+    cores = os.cpu_count() or 1
+    return max(1, cores // max(1, num_workers))
+
+
+def _init_worker(num_threads: int) -> None:
+    import torch
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already initialised in this process; the intra-op setting is what matters.
+        pass
+
+
+def _run_task(task: Tuple[int, Any]) -> Tuple[int, Any, Optional[str]]:
+    index, payload = task
+    try:
+        return index, _worker_fn(payload), None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+class InferencePool:
+    """
+    Usage:
+        with InferencePool(analyze_text, num_workers=8) as pool:
+            for index, result, error in pool.imap(enumerate(texts)):
+                ...
+
+    ``fn`` must only touch state that already exists in the parent (loaded
+    pipelines, tokenizers). Do not run inference in the parent before
+    entering the pool: forking after torch has spun up its OpenMP threads
+    can deadlock the children.
+    """
+
+    def __init__(self, fn: Callable[[Any], Any], num_workers: int, threads_per_worker: Optional[int] = None) -> None:
+        if num_workers < 1:
+            raise ValueError("num_workers must be >= 1")
+        self.fn = fn
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(num_workers)
+        self._pool = None
+
+    def __enter__(self) -> "InferencePool":
+        global _worker_fn
+        _worker_fn = self.fn
+        # Move everything allocated so far into the permanent generation so the
+        # children's garbage collector does not write to (and thus copy) the
+        # pages holding the parent's objects.
+        gc.collect()
+        gc.freeze()
+        ctx = mp.get_context("fork")
+        self._pool = ctx.Pool(
+            processes=self.num_workers,
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,),
+        )
+        print(f"InferencePool: {self.num_workers} workers x {self.threads_per_worker} torch threads")
+        return self
+
+    def imap(self, tasks: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, Optional[str]]]:
+        """Yield (index, result, error) as soon as each task finishes, in completion order."""
+        if self._pool is None:
+            raise RuntimeError("InferencePool must be used as a context manager")
+        return self._pool.imap_unordered(_run_task, tasks, chunksize=1)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        global _worker_fn
+        if self._pool is not None:
+            if exc_type is None:
+                self._pool.close()
+            else:
+                self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        _worker_fn = None
+        gc.unfreeze()
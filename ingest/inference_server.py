@@ -0,0 +1,204 @@
+# ingest/inference_server.py
+"""
+Local model server shared by every pipeline process on the host.
+
+Loads the summarizer, topic and sentiment models once and exposes them over
+localhost HTTP:
+
+    POST /summarize       {"text": ..., "profile"?: ...}          -> {"summary": ..., "profile": ...}
+    POST /classify_topic  {"text": ..., "candidate_labels": [...]} -> {"sequence", "labels", "scores"}
+    POST /sentiment       {"text": ...}                          -> {"label", "score"}
+    GET  /health
+
+Requests from all clients are grouped per endpoint into micro-batches (up to
+INFERENCE_MAX_BATCH items or INFERENCE_MAX_WAIT_MS of waiting) before hitting
+the model. Run with:
+
+    python -m ingest.inference_server
+
+and point the pipeline at it with INFERENCE_SERVER_URL=http://127.0.0.1:8765.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SERVER_HOST = os.getenv("INFERENCE_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("INFERENCE_SERVER_PORT", 8765))
+MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 16))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 10))
+
+
+class MicroBatcher:
+    """Collects single requests from many handler threads and runs them as one batch."""
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS) -> None:
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Any:
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.items += len(batch)
+
+
+def _build_batchers() -> Dict[str, MicroBatcher]:
+    from ingest.models import describe_device, get_sentiment_pipeline, get_topic_pipeline
+    from ingest.summarizer import load_summarizer, select_profile, smart_summarize_batch
+
+    describe_device()
+    load_summarizer()
+    sentiment_pipeline = get_sentiment_pipeline()
+    topic_pipeline = get_topic_pipeline()
+
+    def summarize_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Each profile is its own model/decoding setup; batch per profile.
+        results: List[Any] = [None] * len(items)
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for idx, item in enumerate(items):
+            groups[select_profile(profile=item.get("profile"))].append(idx)
+        for profile, indexes in groups.items():
+            summaries = smart_summarize_batch([items[i]["text"] for i in indexes], profile=profile)
+            for i, summary in zip(indexes, summaries):
+                results[i] = {"summary": summary, "profile": profile}
+        return results
+
+    def topic_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # The zero-shot pipeline takes one label set per call; group by it.
+        results: List[Any] = [None] * len(items)
+        groups: Dict[tuple, List[int]] = defaultdict(list)
+        for idx, item in enumerate(items):
+            groups[tuple(item["candidate_labels"])].append(idx)
+        for labels, indexes in groups.items():
+            outputs = topic_pipeline([items[i]["text"] for i in indexes], candidate_labels=list(labels))
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            for i, out in zip(indexes, outputs):
+                results[i] = {"sequence": out["sequence"], "labels": out["labels"],
+                              "scores": [float(s) for s in out["scores"]]}
+        return results
+
+    def sentiment_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        outputs = sentiment_pipeline([item["text"] for item in items])
+        return [{"label": out["label"], "score": float(out["score"])} for out in outputs]
+
+    return {
+        "summarize": MicroBatcher("summarize", summarize_batch),
+        "classify_topic": MicroBatcher("classify_topic", topic_batch),
+        "sentiment": MicroBatcher("sentiment", sentiment_batch),
+    }
+
+
+_REQUIRED_FIELDS = {
+    "summarize": ("text",),
+    "classify_topic": ("text", "candidate_labels"),
+    "sentiment": ("text",),
+}
+
+
+def make_handler(batchers: Dict[str, MicroBatcher]):
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for pooled client connections
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/health":
+                stats = {name: {"batches": b.batches, "items": b.items} for name, b in batchers.items()}
+                self._send(200, {"status": "ok", "batchers": stats})
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self) -> None:
+            endpoint = self.path.strip("/")
+            batcher = batchers.get(endpoint)
+            if batcher is None:
+                self._send(404, {"error": f"unknown endpoint {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                self._send(400, {"error": f"invalid JSON: {e}"})
+                return
+            if not isinstance(payload, dict):
+                self._send(400, {"error": f"expected a JSON object, got {type(payload).__name__}"})
+                return
+            missing = [f for f in _REQUIRED_FIELDS[endpoint] if payload.get(f) in (None, "")]
+            if missing:
+                self._send(400, {"error": f"missing fields {missing}"})
+                return
+            try:
+                self._send(200, batcher.submit(payload))
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # Per-request access logs would dominate stdout under load.
+            pass
+
+    return InferenceHandler
+
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT) -> None:
+    batchers = _build_batchers()
+    server = ThreadingHTTPServer((host, port), make_handler(batchers))
+    server.daemon_threads = True
+    print(f"Inference server listening on http://{host}:{port} "
+          f"(max_batch={MAX_BATCH}, max_wait_ms={MAX_WAIT_MS})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
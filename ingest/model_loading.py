@@ -0,0 +1,164 @@
+# ingest/model_loading.py
+"""
+Model loading from local safetensors snapshots.
+
+``scripts/bootstrap_models.py`` writes each model as a safetensors snapshot
+(optionally cast to bf16) under MODEL_SNAPSHOT_DIR. Loading a snapshot reads
+the weights through a memory map instead of unpickling them, so cold start is
+mostly page-cache reads and processes on the same host share those pages.
+When no snapshot exists the Hugging Face cache is used as before.
+
+Every load is timed and its RSS growth recorded; see ``load_reports``.
+"""
+import json
+import os
+import resource
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+from dotenv import load_dotenv
+from transformers import AutoTokenizer
+
+load_dotenv()
+
+_BASE_DIR = Path(__file__).resolve().parent.parent
+MODEL_SNAPSHOT_DIR = Path(os.getenv("MODEL_SNAPSHOT_DIR", str(_BASE_DIR / "models" / "snapshots"))).expanduser()
+# "", "fp32", "bf16" or "fp16"; bf16 runs natively on CPUs with AMX/AVX512-BF16.
+MODEL_DTYPE = os.getenv("MODEL_DTYPE", "").strip().lower()
+
+_DTYPES = {
+    "fp32": torch.float32,
+    "float32": torch.float32,
+    "bf16": torch.bfloat16,
+    "bfloat16": torch.bfloat16,
+    "fp16": torch.float16,
+    "float16": torch.float16,
+}
+
+# Written next to the weights by write_snapshot: {"model": ..., "dtype": ...}.
+SNAPSHOT_MANIFEST = "snapshot.json"
+
+_load_reports: List[Dict[str, Any]] = []
+
+
+def resolve_dtype(name: str = MODEL_DTYPE) -> Optional[torch.dtype]:
+    if not name:
+        return None
+    if name not in _DTYPES:
+        raise ValueError(f"Unsupported MODEL_DTYPE '{name}'. Use one of {sorted(_DTYPES)}")
+    return _DTYPES[name]
+
+
+def snapshot_path(model_name: str, dtype: str = "") -> Path:
+    suffix = f"-{dtype}" if dtype and dtype not in ("fp32", "float32") else ""
+    return MODEL_SNAPSHOT_DIR / f"{model_name.replace('/', '--')}{suffix}"
+
+
+def _has_snapshot(path: Path) -> bool:
+    return (path / "model.safetensors").exists() or (path / "model.safetensors.index.json").exists()
+
+
+def snapshot_dtype(path: Path) -> str:
+    """dtype the snapshot was written in, from its manifest (older snapshots: from the directory suffix)."""
+    try:
+        return json.loads((path / SNAPSHOT_MANIFEST).read_text())["dtype"]
+    except (OSError, ValueError, KeyError):
+        suffix = path.name.rsplit("-", 1)[-1]
+        return suffix if suffix in _DTYPES else "fp32"
+
+
+def find_snapshot(model_name: str, dtype: str = MODEL_DTYPE) -> Optional[Path]:
+    """
+    With a dtype, prefer a snapshot already in it, then a full-precision one.
+    Without one, prefer full precision, then whatever dtype bootstrap_models wrote.
+    """
+    if dtype:
+        candidates = [snapshot_path(model_name, dtype), snapshot_path(model_name)]
+    else:
+        candidates = [snapshot_path(model_name)] + [snapshot_path(model_name, name) for name in _DTYPES]
+    for candidate in candidates:
+        if _has_snapshot(candidate):
+            return candidate
+    return None
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (Linux /proc, else peak RSS)."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if peak > 1 << 32 else peak / 1024.0
+
+
+def load_model(model_cls, model_name: str, cache_dir: Optional[str] = None, **kwargs) -> Any:
+    """
+    ``model_cls.from_pretrained`` that prefers the local snapshot (memory-mapped
+    safetensors, optional bf16) and records load time and RSS growth.
+    """
+    dtype = resolve_dtype()
+    snapshot = find_snapshot(model_name)
+    started = time.perf_counter()
+    rss_before = current_rss_mb()
+
+    if snapshot is not None:
+        model = model_cls.from_pretrained(
+            str(snapshot),
+            local_files_only=True,
+            use_safetensors=True,
+            # Without MODEL_DTYPE the snapshot is used in the dtype it was written in.
+            torch_dtype=dtype or resolve_dtype(snapshot_dtype(snapshot)),
+            low_cpu_mem_usage=True,
+            **kwargs,
+        )
+        source = str(snapshot)
+    else:
+        if dtype is not None:
+            kwargs.setdefault("torch_dtype", dtype)
+        model = model_cls.from_pretrained(model_name, cache_dir=cache_dir, **kwargs)
+        source = "hf-cache"
+    model.eval()
+
+    report = {
+        "model": model_name,
+        "source": source,
+        "dtype": str(next(model.parameters()).dtype).replace("torch.", ""),
+        "load_seconds": round(time.perf_counter() - started, 2),
+        "rss_delta_mb": round(current_rss_mb() - rss_before, 1),
+    }
+    _load_reports.append(report)
+    print(f"Loaded {model_name} from {source} as {report['dtype']} in {report['load_seconds']}s "
+          f"(RSS +{report['rss_delta_mb']} MB)")
+    return model
+
+
+def load_tokenizer(model_name: str, cache_dir: Optional[str] = None, **kwargs) -> Any:
+    snapshot = find_snapshot(model_name)
+    if snapshot is not None:
+        return AutoTokenizer.from_pretrained(str(snapshot), local_files_only=True, **kwargs)
+    return AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir, **kwargs)
+
+
+def load_reports() -> List[Dict[str, Any]]:
+    return list(_load_reports)
+
+
+def write_snapshot(model, tokenizer, model_name: str, dtype: str = "") -> Tuple[Path, float]:
+    """Save model (cast to ``dtype`` if given) and tokenizer as a safetensors snapshot."""
+    target = snapshot_path(model_name, dtype)
+    target.mkdir(parents=True, exist_ok=True)
+    torch_dtype = resolve_dtype(dtype)
+    if torch_dtype is not None:
+        model = model.to(torch_dtype)
+    model.save_pretrained(str(target), safe_serialization=True)
+    tokenizer.save_pretrained(str(target))
+    (target / SNAPSHOT_MANIFEST).write_text(json.dumps({"model": model_name, "dtype": dtype or "fp32"}))
+    size_mb = sum(f.stat().st_size for f in target.glob("*.safetensors")) / (1024.0 * 1024.0)
+    return target, size_mb
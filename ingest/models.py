@@ -0,0 +1,183 @@
+# ingest/models.py
+"""
+Sentiment and zero-shot topic pipelines, loaded lazily and cached per process.
+
+Kept separate from classifier.py so the inference server (and anything else
+that only needs the models) can load them without pulling in the scrapers
+or MongoDB repositories.
+"""
+import os
+from typing import Any, Dict, List
+
+import torch
+from dotenv import load_dotenv
+from transformers import AutoModelForSequenceClassification, pipeline
+
+from ingest.model_loading import load_model, load_tokenizer
+from ingest.tokenization import current_token_cache
+
+load_dotenv()
+
+CACHE_DIR_FROM_ENV = os.getenv('TRANSFORMERS_CACHE')
+
+# Load HuggingFace sentiment_pipeline
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+CACHE_DIR = CACHE_DIR_FROM_ENV if CACHE_DIR_FROM_ENV else "/home/christianfita/news-scrawler-ai/models/transformers"
+
+# Load HuggingFace topic_pipeline
+MODEL_NAME_TOPIC = "facebook/bart-large-mnli"
+CACHE_DIR_TOPIC = CACHE_DIR_FROM_ENV if CACHE_DIR_FROM_ENV else "/home/christianfita/news-scrawler-ai/models/transformers"
+
+# Device detection: prefer CUDA, then MPS (Apple), else CPU
+# For transformers.pipeline pass an integer device index (0 for first CUDA GPU, -1 for CPU)
+TORCH_DEVICE = torch.device("cpu")
+PIPELINE_DEVICE = -1
+if torch.cuda.is_available():
+    TORCH_DEVICE = torch.device("cuda:0")
+    PIPELINE_DEVICE = 0
+elif getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+    TORCH_DEVICE = torch.device("mps")
+    # some HF pipeline versions don't accept 'mps' as device arg; use CPU device index (-1)
+    PIPELINE_DEVICE = -1
+
+_sentiment_pipeline = None
+_topic_pipeline = None
+
+
+def _build_pipeline(task: str, model, tokenizer, label: str):
+    """Create a pipeline on PIPELINE_DEVICE; fall back to CPU if that fails."""
+    try:
+        return pipeline(
+            task,
+            model=model,
+            tokenizer=tokenizer,
+            device=PIPELINE_DEVICE,
+            max_length=512,
+            truncation=True,
+        )
+    except Exception as e:
+        print(f"Warning: failed to create {label} pipeline on device {PIPELINE_DEVICE}: {e}. "
+              f"Falling back to CPU pipeline.")
+        try:
+            return pipeline(
+                task,
+                model=model,
+                tokenizer=tokenizer,
+                device=-1,
+                max_length=512,
+                truncation=True,
+            )
+        except Exception as e2:
+            print(f"Error: failed to create fallback CPU {label} pipeline: {e2}")
+            return None
+
+
+def _load_classifier(name: str, cache_dir: str, label: str):
+    # Prefers the memory-mapped safetensors snapshot written by scripts/bootstrap_models.py
+    tokenizer = load_tokenizer(name, cache_dir=cache_dir)
+    model = load_model(AutoModelForSequenceClassification, name, cache_dir=cache_dir)
+    # move model weights to torch device when possible
+    try:
+        model.to(TORCH_DEVICE)
+    except Exception:
+        pass
+
+    # Debug: report where model parameters live
+    try:
+        param_device = next(model.parameters()).device
+        print(f"Model {label} first parameter device: {param_device}")
+    except Exception:
+        print(f"Model {label} device: unknown")
+    return model, tokenizer
+
+
+def get_sentiment_pipeline():
+    global _sentiment_pipeline
+    if _sentiment_pipeline is None:
+        model, tokenizer = _load_classifier(MODEL_NAME, CACHE_DIR, "sentiment")
+        _sentiment_pipeline = _build_pipeline("sentiment-analysis", model, tokenizer, "sentiment")
+    return _sentiment_pipeline
+
+
+def get_topic_pipeline():
+    global _topic_pipeline
+    if _topic_pipeline is None:
+        model, tokenizer = _load_classifier(MODEL_NAME_TOPIC, CACHE_DIR_TOPIC, "topic")
+        _topic_pipeline = _build_pipeline("zero-shot-classification", model, tokenizer, "topic")
+    return _topic_pipeline
+
+
+def describe_device() -> None:
+    print(f"Using torch device: {TORCH_DEVICE}  | pipeline device index: {PIPELINE_DEVICE}")
+    print(
+        f"torch version: {torch.__version__}, torch.cuda.is_available: {torch.cuda.is_available()}, "
+        f"torch.version.cuda: {torch.version.cuda}")
+
+
+# -------------------------------------------------------------------
+# ZERO-SHOT TOPIC SCORING ON CACHED TOKENS
+# -------------------------------------------------------------------
+
+HYPOTHESIS_TEMPLATE = "This example is {}."
+TOPIC_MAX_LENGTH = 512
+
+# Hypotheses are the same for every article; tokenize each label once per process.
+_hypothesis_ids: Dict[str, List[int]] = {}
+
+
+def _entailment_id(config) -> int:
+    for label, idx in config.label2id.items():
+        if label.lower().startswith("entail"):
+            return int(idx)
+    return -1
+
+
+def classify_topic(text: str, candidate_labels: List[str]) -> Dict[str, Any]:
+    """
+    Equivalent of ``topic_pipeline(text, candidate_labels=...)`` (single-label
+    mode) that builds the premise/hypothesis pairs from cached token ids: the
+    premise is taken from the per-article token cache (already filled by the
+    summarizer, which shares BART's vocabulary) and hypotheses are tokenized
+    once per process. Falls back to the pipeline for slow tokenizers.
+    """
+    topic_pipeline = get_topic_pipeline()
+    tokenizer = topic_pipeline.tokenizer
+    model = topic_pipeline.model
+    entail_id = _entailment_id(model.config)
+    if not getattr(tokenizer, "is_fast", False) or entail_id < 0:
+        return topic_pipeline(text, candidate_labels=candidate_labels)
+
+    premise_ids = current_token_cache().encode(tokenizer, text)
+    missing = [lbl for lbl in candidate_labels if lbl not in _hypothesis_ids]
+    if missing:
+        encoded = tokenizer([HYPOTHESIS_TEMPLATE.format(lbl) for lbl in missing], add_special_tokens=False)
+        for lbl, ids in zip(missing, encoded["input_ids"]):
+            _hypothesis_ids[lbl] = list(ids)
+
+    rows = []
+    for label in candidate_labels:
+        hyp = _hypothesis_ids[label]
+        # Same "only_first" truncation the pipeline applies: cut the premise, keep the hypothesis.
+        budget = TOPIC_MAX_LENGTH - len(hyp) - tokenizer.num_special_tokens_to_add(pair=True)
+        rows.append(tokenizer.build_inputs_with_special_tokens(premise_ids[:max(budget, 0)], hyp))
+
+    width = max(len(r) for r in rows)
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+    input_ids = torch.full((len(rows), width), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, row in enumerate(rows):
+        input_ids[i, :len(row)] = torch.tensor(row, dtype=torch.long)
+        attention_mask[i, :len(row)] = 1
+
+    device = next(model.parameters()).device
+    with torch.inference_mode():
+        logits = model(input_ids=input_ids.to(device), attention_mask=attention_mask.to(device)).logits
+
+    # Single-label zero-shot: softmax of the entailment logits across labels.
+    scores = torch.softmax(logits[:, entail_id].float(), dim=0).tolist()
+    order = sorted(range(len(candidate_labels)), key=lambda i: scores[i], reverse=True)
+    return {
+        "sequence": text,
+        "labels": [candidate_labels[i] for i in order],
+        "scores": [scores[i] for i in order],
+    }
@@ -0,0 +1,280 @@
+# ingest/reclassify.py
+"""
+Re-annotate stored articles after a model or topic-list change, without a new crawl.
+
+    python -m ingest.reclassify --plan            # stale version groups, stages to re-run, article counts
+    python -m ingest.reclassify                   # re-run them (resumes from the last checkpoint)
+    python -m ingest.reclassify --stages topic    # only some stages
+    python -m ingest.reclassify --reset           # forget the checkpoint
+
+Every article carries ``pipeline_version``, ``model_version`` (fingerprint of
+its stage versions) and ``model_versions`` ({summary, topic, sentiment}), see
+classifier.build_classified_article. Articles are grouped by the two indexed
+fields and each group only re-runs the stages whose version differs from the
+current one. A new summary also re-runs topic and sentiment, which read it.
+An older pipeline_version, or no versions at all (articles stored before
+they existed), re-runs every stage.
+
+Each group is streamed in _id order over the 'pipeline_model_version' index,
+RECLASSIFY_BATCH articles at a time. A batch goes through the models in
+batches of RECLASSIFY_INFERENCE_BATCH (or as RECLASSIFY_CONCURRENCY parallel
+requests to the inference server, which batches them). It is then written
+back with one unordered bulk_write. Updates only apply if the article still
+has the version it was read with, and the last _id of every group is
+checkpointed in ``consumer_checkpoints`` after each batch, so a stopped run
+resumes where it was.
+
+Topic changes are applied to the global per-topic counters, only for the
+updates that matched (read back by their ``reclassified_at`` stamp), so an
+article changed by another run meanwhile is not counted twice. daily_trends is
+not touched: run ``python -m ingest.trends_materializer --rebuild`` afterwards.
+"""
+import argparse
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from ingest import classifier
+from ingest.global_counters import GlobalCounters
+from ingest.summarizer import select_profile, smart_summarize_batch
+from ingest.topic_prefilter import propose_labels
+from lib.repositories.checkpoint_repository import CheckpointRepository
+from utils.log import get_logger, setup_logging
+
+load_dotenv()
+
+RECLASSIFY_BATCH = int(os.getenv("RECLASSIFY_BATCH", 512))
+RECLASSIFY_INFERENCE_BATCH = int(os.getenv("RECLASSIFY_INFERENCE_BATCH", 32))
+RECLASSIFY_CONCURRENCY = int(os.getenv("RECLASSIFY_CONCURRENCY", 8))
+
+CONSUMER_NAME = "reclassify"
+STAGES = ("summary", "topic", "sentiment")
+
+repo_articles = classifier.repo_articles
+repo_state = CheckpointRepository()
+logger = get_logger(__name__)
+
+
+def stale_stages(pipeline_version: Any, versions: Optional[Dict[str, Any]], summary_profile: Optional[str]) -> List[str]:
+    """Stages of an article that no longer match what the classifier would run today."""
+    if pipeline_version != classifier.PIPELINE_VERSION or not versions:
+        return list(STAGES)
+    current = classifier.stage_versions(summary_profile)
+    stale = [stage for stage in STAGES if versions.get(stage) != current[stage]]
+    # Topic and sentiment are computed on the summary.
+    return list(STAGES) if "summary" in stale else stale
+
+
+def plan(allowed: Sequence[str] = STAGES) -> List[Dict[str, Any]]:
+    """One entry per stored version group: its stale stages, the ones this run re-runs, and its size."""
+    groups = []
+    for group in repo_articles.model_version_groups():
+        sample = repo_articles.get_one_article({"_id": group["first_id"]}) or {}
+        stale = stale_stages(group["pipeline_version"], sample.get("model_versions"), sample.get("summary_profile"))
+        selector = {"pipeline_version": group["pipeline_version"], "model_version": group["model_version"]}
+        groups.append({**group, "stale": stale, "stages": [s for s in stale if s in allowed],
+                       "articles": repo_articles.count_articles(selector)})
+    return groups
+
+
+def _target() -> str:
+    """Identifies the model set being migrated to; a checkpoint of another target is ignored."""
+    return f"{classifier.PIPELINE_VERSION}:{classifier.model_fingerprint(classifier.stage_versions(select_profile()))}"
+
+
+def _group_key(group: Dict[str, Any]) -> str:
+    return f"{group['pipeline_version']}:{group['model_version']}"
+
+
+# --- Batched inference ---
+
+def _remote_map(fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+    # The inference server micro-batches concurrent requests.
+    with ThreadPoolExecutor(max_workers=max(1, RECLASSIFY_CONCURRENCY)) as pool:
+        return list(pool.map(fn, items))
+
+
+def summarize_batch(texts: List[str], profile: str) -> List[str]:
+    if classifier.inference_client is not None:
+        return _remote_map(lambda text: classifier.inference_client.summarize(text, profile), texts)
+    return smart_summarize_batch(texts, batch_size=RECLASSIFY_INFERENCE_BATCH, profile=profile)
+
+
+def topic_batch(summaries: List[str]) -> List[str]:
+    """Top topic of each summary; summaries with the same prefiltered label set share pipeline calls."""
+    labels = [tuple(propose_labels(summary, classifier.CANDIDATE_TOPICS)[0]) for summary in summaries]
+    if classifier.inference_client is not None:
+        outputs = _remote_map(lambda pair: classifier.inference_client.classify_topic(pair[0], list(pair[1])),
+                              list(zip(summaries, labels)))
+        return [out["labels"][0] for out in outputs]
+
+    topics: List[Any] = [None] * len(summaries)
+    groups: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+    for idx, label_set in enumerate(labels):
+        groups[label_set].append(idx)
+    for label_set, indexes in groups.items():
+        outputs = classifier.topic_pipeline([summaries[i] for i in indexes], candidate_labels=list(label_set),
+                                            batch_size=RECLASSIFY_INFERENCE_BATCH)
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        for i, out in zip(indexes, outputs):
+            topics[i] = out["labels"][0]
+    return topics
+
+
+def sentiment_batch(summaries: List[str]) -> List[Dict[str, Any]]:
+    if classifier.inference_client is not None:
+        outputs = _remote_map(classifier.inference_client.sentiment, summaries)
+    else:
+        outputs = classifier.sentiment_pipeline(summaries, batch_size=RECLASSIFY_INFERENCE_BATCH)
+    return [{"label": out["label"], "score": float(out["score"])} for out in outputs]
+
+
+def _now() -> datetime:
+    # BSON dates keep milliseconds; a truncated stamp can be matched when read back.
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def reannotate(batch: List[Dict[str, Any]], group: Dict[str, Any], now: Optional[datetime] = None
+               ) -> Tuple[List[UpdateOne], Dict[Any, Tuple[Optional[str], str]]]:
+    """
+    Re-run ``group['stages']`` on a batch of articles. Returns the conditional
+    updates (stamped ``reclassified_at=now``) and the topic changes they carry, by _id.
+    """
+    stages = group["stages"]
+    now = now or _now()
+    moves: Dict[Any, Tuple[Optional[str], str]] = {}
+    summaries = [doc.get("summary") or "" for doc in batch]
+    profiles = [doc.get("summary_profile") for doc in batch]
+    fields: List[Dict[str, Any]] = [{} for _ in batch]
+
+    if "summary" in stages:
+        profile = select_profile()
+        # Same rule as classifier.summarize_text: short texts are their own summary.
+        long = [i for i, doc in enumerate(batch) if len(doc.get("text") or "") > 200]
+        summaries = [doc.get("text") or "" for doc in batch]
+        profiles = [None] * len(batch)
+        for i, summary in zip(long, summarize_batch([batch[i]["text"] for i in long], profile)):
+            summaries[i], profiles[i] = summary, profile
+        for i in range(len(batch)):
+            fields[i].update({"summary": summaries[i], "summary_profile": profiles[i]})
+    if "topic" in stages:
+        for i, topic in enumerate(topic_batch(summaries)):
+            fields[i]["topic"] = topic
+            if batch[i].get("topic") != topic:
+                moves[batch[i]["_id"]] = (batch[i].get("topic"), topic)
+    if "sentiment" in stages:
+        for i, sentiment in enumerate(sentiment_batch(summaries)):
+            fields[i]["sentiment"] = sentiment
+
+    ops = []
+    for i, doc in enumerate(batch):
+        current = classifier.stage_versions(profiles[i])
+        versions = dict(doc.get("model_versions") or {})
+        for stage in group["stale"]:
+            # Stale stages left out of this run (--stages) stay marked as stale.
+            versions[stage] = current[stage] if stage in stages else None
+        fields[i].update({"pipeline_version": classifier.PIPELINE_VERSION, "model_versions": versions,
+                          "model_version": classifier.model_fingerprint(versions), "reclassified_at": now})
+        ops.append(UpdateOne({"_id": doc["_id"], "pipeline_version": group["pipeline_version"],
+                              "model_version": group["model_version"]}, {"$set": fields[i]}))
+    return ops, moves
+
+
+def apply_topic_moves(moves: Dict[Any, Tuple[Optional[str], str]], reclassified_at: datetime,
+                      counters: GlobalCounters) -> int:
+    """Move the counters of the articles whose update matched, i.e. that carry this run's stamp."""
+    if not moves:
+        return 0
+    applied = repo_articles.get_articles({"_id": {"$in": list(moves)}, "reclassified_at": reclassified_at}, {"_id": 1})
+    moved = 0
+    for doc in applied:
+        counters.move_article(*moves[doc["_id"]])
+        moved += 1
+    return moved
+
+
+def reclassify(allowed: Sequence[str] = STAGES, batch_size: int = RECLASSIFY_BATCH, reset: bool = False,
+               on_progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """Re-run the stale stages of every version group; ``on_progress`` gets the size of each stored batch."""
+    target = _target()
+    state = repo_state.get_state(CONSUMER_NAME)
+    if reset or state.get("target") != target:
+        repo_state.save_state(CONSUMER_NAME, {"target": target, "last_ids": {}})
+        last_ids: Dict[str, Any] = {}
+    else:
+        last_ids = state.get("last_ids") or {}
+
+    totals: Counter = Counter()
+    started = time.perf_counter()
+    counters = GlobalCounters()
+    try:
+        for group in plan(allowed):
+            if not group["stages"]:
+                continue
+            key = _group_key(group)
+            projection = {"summary": 1, "summary_profile": 1, "topic": 1, "model_versions": 1}
+            if "summary" in group["stages"]:
+                projection["text"] = 1
+            logger.info("Re-running %s on %d articles of group %s", group["stages"], group["articles"], key)
+            for batch in repo_articles.iter_model_version_batches(group["pipeline_version"], group["model_version"],
+                                                                  last_ids.get(key), projection, batch_size):
+                now = _now()
+                ops, moves = reannotate(batch, group, now)
+                try:
+                    totals["updated"] += repo_articles.bulk_update_articles(ops)
+                finally:
+                    # Also after a partial failure: whatever was written has the stamp.
+                    totals["topic_moves"] += apply_topic_moves(moves, now, counters)
+                totals["read"] += len(batch)
+                repo_state.save_state(CONSUMER_NAME, {f"last_ids.{key}": batch[-1]["_id"]})
+                if on_progress is not None:
+                    on_progress(len(batch))
+                elapsed = time.perf_counter() - started
+                logger.info("Re-classified %d articles (%.0f/s)", totals["read"], totals["read"] / max(elapsed, 1e-6))
+            totals["groups"] += 1
+    finally:
+        counters.close()
+
+    report = {**totals, "seconds": round(time.perf_counter() - started, 1), "target": target}
+    print(f"✅ Re-classification done: {report}")
+    if totals["updated"]:
+        print("Topic counts in daily_trends are not updated; run `python -m ingest.trends_materializer --rebuild`.")
+    return report
+
+
+def print_plan(groups: List[Dict[str, Any]]) -> None:
+    for group in groups:
+        action = ",".join(group["stages"]) or ("up to date" if not group["stale"] else "skipped (--stages)")
+        print(f"pipeline_version={group['pipeline_version']} model_version={group['model_version']} "
+              f"articles={group['articles']}: {action}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-run the stale model stages of stored articles.")
+    parser.add_argument("--plan", action="store_true", help="show the version groups and what would be re-run")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of summary,topic,sentiment")
+    parser.add_argument("--batch", type=int, default=RECLASSIFY_BATCH, help="articles per read/bulk update")
+    parser.add_argument("--reset", action="store_true", help="ignore the checkpoint and start from the beginning")
+    args = parser.parse_args()
+    setup_logging()
+
+    allowed = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(allowed) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+    if args.plan:
+        print_plan(plan(allowed))
+        return
+    reclassify(allowed, args.batch, args.reset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# ingest/rule_cleaner.py
+"""
+Rule-based fast path for article text cleaning.
+
+Most trafilatura output only carries predictable boilerplate (bylines,
+copyright lines, photo credits, "Read more" teasers, URLs). ``fast_clean``
+strips those with precompiled patterns and scores how clean the remainder
+looks; only texts scoring below FAST_CLEAN_MIN_CONFIDENCE need the LLM.
+"""
+import os
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+FAST_CLEAN_ENABLED = os.getenv("FAST_CLEAN_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+FAST_CLEAN_MIN_CONFIDENCE = float(os.getenv("FAST_CLEAN_MIN_CONFIDENCE", 0.8))
+
+# Outlet names that the LLM prompt asks to remove; leftovers lower the score.
+OUTLET_NAMES = [
+    "BBC", "CNN", "Reuters", "Associated Press", "AFP", "Al Jazeera", "Deutsche Welle",
+    "DW", "Wall Street Journal", "WSJ", "Bloomberg", "Getty Images",
+]
+
+_PHOTO_CREDIT_RX = re.compile(r"\(AP Photo/.*?\)", flags=re.IGNORECASE)
+
+
+def is_photo_credit(text: str) -> bool:
+    return bool(_PHOTO_CREDIT_RX.search(text))
+
+
+# Whole lines that are pure boilerplate (only checked on short lines).
+_BOILERPLATE_LINE_MAX = 120
+# A byline is a name-only line (1-4 capitalised tokens, nothing after them), or
+# several joined by ";" / "|" as in "Reporting by A B; Editing by C D". It is
+# only dropped among the first/last _BYLINE_EDGE_LINES non-empty lines.
+_BYLINE_EDGE_LINES = 2
+_BYLINE_CLAUSE = (r"(?i:by|written by|reporting by|additional reporting by|edited by|editing by)\s+"
+                  r"[A-Z][\w.'\-]*(?:\s+(?:and\s+)?[A-Z][\w.'\-]*){0,3}")
+_BYLINE_RX = re.compile(rf"^{_BYLINE_CLAUSE}(?:\s*[;|]\s*{_BYLINE_CLAUSE})*\.?$")
+# Teasers ("Read more: ...", "Subscribe to our newsletter") start like these but,
+# unlike prose that happens to ("Related charges were filed..."), they end with
+# ":" or are short and have no sentence-final punctuation.
+_TEASER_MAX_WORDS = 10
+_TEASER_RX = re.compile(
+    r"^(?:read more|more on this story|related(?: topics| articles)?|also read|watch|listen|"
+    r"sign up|subscribe|share this|follow us|click here|advertisement)\b",
+    flags=re.IGNORECASE,
+)
+# Captions and credits: "Photo: ...", or an agency alone or after a slash ("John Smith/Reuters").
+_CREDIT_LINE_RX = re.compile(
+    r"^(?:(?:photo|image|picture|video)(?:\s+credit)?\s*:.*"
+    r"|(?:[^.!?/]{0,60}/\s*)?(?:getty images|reuters|ap photo|afp)\.?)$",
+    flags=re.IGNORECASE,
+)
+# Lines that consist of a copyright/legal/navigation notice and nothing else
+# (a sentence that merely mentions "copyright" or "terms of use" is kept).
+_NAV_PHRASE = (r"(?:terms of (?:use|service)|terms (?:and|&) conditions|privacy(?: policy| notice)?|"
+               r"cookies?(?: policy| settings)?|contact us|about us|accessibility(?: statement)?)")
+_KEYWORD_LINE_RX = re.compile(
+    r"^(?:"
+    r"©\s*(?:\d{4}(?:\s*[-–]\s*\d{4})?)?[^.!?]{0,60}\.?(?:\s*all rights reserved\.?)?"
+    # "(c)" alone also starts list items, so it needs the year.
+    r"|(?:copyright\s*(?:©\s*|\(c\)\s*)?|\(c\)\s*)\d{4}(?:\s*[-–]\s*\d{4})?[^.!?]{0,60}\.?(?:\s*all rights reserved\.?)?"
+    r"|(?:[^.!?]{0,60}\.\s*)?all rights reserved\.?"
+    rf"|{_NAV_PHRASE}(?:\s*[|·•/,-]\s*{_NAV_PHRASE})*"
+    r"|the bbc is not responsible for the content of external (?:sites|websites)\.?"
+    r"(?:\s*read about our approach to external linking\.?)?"
+    r")$",
+    flags=re.IGNORECASE,
+)
+# Inline fragments removed from otherwise useful lines.
+_INLINE_RXS = [
+    re.compile(r"https?://\S+|www\.\S+", flags=re.IGNORECASE),
+    re.compile(r"^[A-Z][A-Z .,'\-]{1,60}\((?:Reuters|AP|AFP|CNN)\)\s*[-–—]+\s*"),
+    re.compile(r"\((?:AP|AFP|Reuters|Getty Images)(?:\s+Photo)?[^)]*\)", flags=re.IGNORECASE),
+    re.compile(r"\s*(?:read more|read next)\s*:\s*[^.\n]*", flags=re.IGNORECASE),
+]
+_WS_RX = re.compile(r"[ \t]+")
+_BLANK_LINES_RX = re.compile(r"\n{3,}")
+_OUTLET_RX = re.compile(r"\b(?:" + "|".join(re.escape(o) for o in OUTLET_NAMES) + r")\b")
+_SENTENCE_END_RX = re.compile(r"[.!?\"'”)]\s*$")
+
+
+def _is_teaser(line: str) -> bool:
+    if not _TEASER_RX.match(line):
+        return False
+    return line.endswith(":") or (len(line.split()) <= _TEASER_MAX_WORDS and not _SENTENCE_END_RX.search(line))
+
+
+def fast_clean(text: str) -> Tuple[str, float]:
+    """
+    Strip predictable boilerplate and return (cleaned_text, confidence in [0, 1]).
+    A high confidence means the result looks like plain article prose.
+    """
+    if not text or not text.strip():
+        return "", 0.0
+
+    lines = text.splitlines()
+    content = [n for n, line in enumerate(lines) if line.strip()]
+    edges = set(content[:_BYLINE_EDGE_LINES] + content[-_BYLINE_EDGE_LINES:])
+
+    kept: List[str] = []
+    dropped_chars = dropped_lines = 0
+    for n, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            if kept and kept[-1] != "":
+                kept.append("")
+            continue
+        if len(stripped) <= _BOILERPLATE_LINE_MAX and (
+                (n in edges and _BYLINE_RX.match(stripped))
+                or _is_teaser(stripped) or _CREDIT_LINE_RX.match(stripped)
+                or _KEYWORD_LINE_RX.match(stripped)):
+            dropped_chars += len(stripped)
+            dropped_lines += 1
+            continue
+        for rx in _INLINE_RXS:
+            stripped = rx.sub("", stripped)
+        stripped = _WS_RX.sub(" ", stripped).strip()
+        if stripped:
+            kept.append(stripped)
+
+    cleaned = _BLANK_LINES_RX.sub("\n\n", "\n".join(kept)).strip()
+    return cleaned, _score(text, cleaned, dropped_chars, dropped_lines / len(content))
+
+
+def _score(original: str, cleaned: str, dropped_chars: int, dropped_line_share: float) -> float:
+    if len(cleaned) < 200:
+        return 0.0
+
+    score = 1.0
+    # Outlet names left in the body are what the LLM is mostly asked to remove.
+    score -= 0.15 * min(len(_OUTLET_RX.findall(cleaned)), 4)
+
+    # Short lines without terminal punctuation are usually layout fragments.
+    lines = [ln for ln in cleaned.splitlines() if ln]
+    fragments = sum(1 for ln in lines if len(ln.split()) < 6 and not _SENTENCE_END_RX.search(ln))
+    score -= 0.6 * (fragments / len(lines))
+
+    # The more was dropped, the less the rules can be trusted to have dropped
+    # only boilerplate: heavy removals fall below the threshold and go to the LLM.
+    score -= 0.8 * max(dropped_line_share, dropped_chars / len(original))
+
+    if not _SENTENCE_END_RX.search(cleaned):
+        score -= 0.1
+    return max(0.0, min(1.0, score))
+
+
+class FastCleanStats:
+    """Per-run counters for the fast path versus LLM cleaning; shared by the clean threads."""
+
+    def __init__(self) -> None:
+        self.fast_path = 0
+        self.llm = 0
+        self._lock = threading.Lock()
+
+    def record(self, bypassed: bool) -> None:
+        with self._lock:
+            if bypassed:
+                self.fast_path += 1
+            else:
+                self.llm += 1
+
+    def report(self, llm_calls: int = 0, llm_seconds: float = 0.0) -> Dict[str, Any]:
+        """Bypass rate and time saved, estimated from the mean latency of the LLM calls made this run."""
+        with self._lock:
+            fast_path, llm = self.fast_path, self.llm
+        total = fast_path + llm
+        mean_llm = (llm_seconds / llm_calls) if llm_calls else None
+        return {
+            "fast_path": fast_path,
+            "llm": llm,
+            "bypass_rate": round(fast_path / total, 4) if total else 0.0,
+            "mean_llm_seconds": round(mean_llm, 3) if mean_llm is not None else None,
+            "estimated_seconds_saved": round(fast_path * mean_llm, 1) if mean_llm is not None else None,
+        }
@@ -0,0 +1,360 @@
+# ingest/staged_pipeline.py
+"""
+classify_articles as concurrent stages joined by bounded queues:
+
+    discover -> fetch/extract -> summarize -> topic+sentiment -> clean -> persist
+
+Each stage has its own worker threads (PIPELINE_<STAGE>_WORKERS) and an inbox
+of PIPELINE_QUEUE_SIZE items. A full inbox blocks the stage in front of it, so
+a slow stage throttles the ones before it instead of piling up memory. Network
+waits (fetch, LLM cleaning), model inference (torch releases the GIL) and
+MongoDB writes overlap this way.
+
+Every PIPELINE_METRICS_INTERVAL seconds, and at the end, each stage reports:
+- items processed / dropped / failed
+- busy seconds and utilization (busy / (wall * workers))
+- average and max depth of its inbox
+- seconds spent blocked on the next stage's full inbox
+
+The stage with the highest utilization and a deep inbox is the bottleneck:
+give it more workers (or the inference server) and shrink the others. The
+final report is stored on the sample's metadata document under ``pipeline``.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from bson import ObjectId
+
+from ingest import classifier
+from ingest.call_to_webhook import outbox_events_for
+from ingest.custom_scrapers import fetch_discovered
+from ingest.get_all_articles import discover_all_links
+from ingest.global_counters import GlobalCounters
+from ingest.rule_cleaner import FastCleanStats
+from ingest.summarizer import Backlog
+from ingest.text_cleaner import AsyncTextCleaner
+from ingest.tokenization import TokenCache, article_token_cache
+from ingest.topic_prefilter import TopicPrefilterStats
+from lib.repositories.webhook_outbox_repository import WebhookOutboxRepository
+from utils.log import get_logger, log_sampled
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 32))
+PIPELINE_FETCH_WORKERS = int(os.getenv("PIPELINE_FETCH_WORKERS", 8))
+PIPELINE_SUMMARIZE_WORKERS = int(os.getenv("PIPELINE_SUMMARIZE_WORKERS", 1))
+PIPELINE_CLASSIFY_WORKERS = int(os.getenv("PIPELINE_CLASSIFY_WORKERS", 1))
+PIPELINE_CLEAN_WORKERS = int(os.getenv("PIPELINE_CLEAN_WORKERS", 4))
+PIPELINE_PERSIST_WORKERS = int(os.getenv("PIPELINE_PERSIST_WORKERS", 1))
+PIPELINE_METRICS_INTERVAL = float(os.getenv("PIPELINE_METRICS_INTERVAL", 30))
+
+logger = get_logger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """Worker threads applying ``fn`` to items from a bounded inbox; results go to the next stage."""
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 on_error: Optional[Callable[[Any, Exception], None]] = None) -> None:
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.inbox: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self.next: Optional["Stage"] = None
+        self.on_error = on_error
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self._depth_sum = 0
+        self._depth_samples = 0
+        self._max_depth = 0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self._threads = [threading.Thread(target=self._run, name=f"{self.name}-{n}", daemon=True)
+                         for n in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, item: Any) -> None:
+        """Blocks while the inbox is full (backpressure)."""
+        self.inbox.put(item)
+
+    def close(self) -> None:
+        """Let the workers finish what is queued, then stop them."""
+        for _ in self._threads:
+            self.inbox.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                return
+            started = time.perf_counter()
+            error: Optional[Exception] = None
+            try:
+                result = self.fn(item)
+            except Exception as e:
+                result, error = None, e
+            busy = time.perf_counter() - started
+            with self._lock:
+                self.busy_seconds += busy
+                if error is not None:
+                    self.failed += 1
+                elif result is None:
+                    self.dropped += 1
+                else:
+                    self.processed += 1
+            if error is not None:
+                if self.on_error is not None:
+                    self.on_error(item, error)
+                continue
+            if result is not None and self.next is not None:
+                waited = time.perf_counter()
+                self.next.put(result)
+                with self._lock:
+                    self.blocked_seconds += time.perf_counter() - waited
+
+    def sample_depth(self) -> None:
+        depth = self.inbox.qsize()
+        with self._lock:
+            self._depth_sum += depth
+            self._depth_samples += 1
+            self._max_depth = max(self._max_depth, depth)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "busy_s": round(self.busy_seconds, 2),
+                "utilization": round(self.busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0,
+                "queue_avg": round(self._depth_sum / self._depth_samples, 1) if self._depth_samples else 0.0,
+                "queue_max": self._max_depth,
+                "blocked_s": round(self.blocked_seconds, 2),
+            }
+
+
+def _discover_ahead(backlog: Backlog) -> Iterator[Dict[str, Any]]:
+    """
+    Yield discover_all_links() while a background thread keeps listing links
+    ahead of the (backpressured) fetch stage, so ``backlog`` counts every link
+    found so far rather than only the few the bounded inboxes hold.
+    """
+    links: "queue.Queue[Any]" = queue.Queue()
+    errors: List[BaseException] = []
+
+    def discover() -> None:
+        try:
+            for article in discover_all_links():
+                backlog.add()
+                links.put(article)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            links.put(_DONE)
+
+    threading.Thread(target=discover, name="discover", daemon=True).start()
+    yield from iter(links.get, _DONE)
+    if errors:
+        raise errors[0]
+
+
+class StagedPipeline:
+    def __init__(self, stages: List[Stage], metrics_interval: float = PIPELINE_METRICS_INTERVAL,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        self.stages = stages
+        for current, following in zip(stages, stages[1:]):
+            current.next = following
+        self.metrics_interval = metrics_interval
+        # Called with the current report on every depth sample (e.g. cli.py's progress bars).
+        self.on_progress = on_progress
+        self._started = 0.0
+        self._finished = threading.Event()
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started
+        stages = {stage.name: stage.report(elapsed) for stage in self.stages}
+        busiest = max(stages, key=lambda name: stages[name]["utilization"]) if stages else None
+        return {"elapsed_s": round(elapsed, 1), "bottleneck": busiest, "stages": stages}
+
+    def _monitor(self) -> None:
+        last_report = time.monotonic()
+        while not self._finished.wait(0.5):
+            for stage in self.stages:
+                stage.sample_depth()
+            if self.on_progress is not None:
+                self.on_progress(self.report())
+            if time.monotonic() - last_report >= self.metrics_interval:
+                last_report = time.monotonic()
+                logger.info("Pipeline: %s", self.report())
+
+    def run(self, source: Iterable[Any]) -> Dict[str, Any]:
+        """Feed ``source`` into the first stage and drain every stage in order."""
+        self._started = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+        monitor = threading.Thread(target=self._monitor, name="pipeline-monitor", daemon=True)
+        monitor.start()
+        try:
+            for item in source:
+                self.stages[0].put(item)
+        finally:
+            # Closing in order: each stage has pushed everything downstream before the next one closes.
+            for stage in self.stages:
+                stage.close()
+            self._finished.set()
+            monitor.join()
+        return self.report()
+
+
+def classify_articles_staged(on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
+    """Staged equivalent of classifier.classify_articles_serial; returns the sample id."""
+    if classifier.INFERENCE_WORKERS > 1:
+        logger.warning("⚠️ INFERENCE_WORKERS=%d is ignored by the staged pipeline; use PIPELINE_SUMMARIZE_WORKERS / "
+                       "PIPELINE_CLASSIFY_WORKERS, or CLASSIFIER_PIPELINE=serial to fork inference processes",
+                       classifier.INFERENCE_WORKERS)
+    # Created first: without GLOBAL_METADATA_ID the run stops before opening a sample.
+    global_counters = GlobalCounters()
+    id_for_metadata, sample_date, sample_seq = classifier.start_sample()
+    repo_articles = classifier.repo_articles
+    repo_link_pool = classifier.repo_link_pool
+
+    counts: Counter = Counter()
+    topic_counter: Counter = Counter()
+    sentiment_counter: Counter = Counter()
+    counts_lock = threading.Lock()
+    cleaning_stats = FastCleanStats()
+    topic_stats = TopicPrefilterStats(len(classifier.CANDIDATE_TOPICS))
+
+    topic_by_insert_id: Dict[str, str] = {}
+
+    def on_articles_flushed(inserted_ids: List[str]) -> None:
+        # Count only articles whose batch was actually stored.
+        for insert_id in inserted_ids:
+            global_counters.add_article(topic_by_insert_id.pop(insert_id, None))
+
+    repo_articles.write_buffer(on_flush=on_articles_flushed,
+                               companion=(WebhookOutboxRepository().collection, outbox_events_for))
+    repo_link_pool.write_buffer()
+
+    def mark_processed(url: Optional[str]) -> None:
+        repo_link_pool.update_link_in_pool_buffered(
+            {"url": url}, {"$set": {"is_articles_processed": True, "sample": id_for_metadata}}, upsert=True)
+
+    backlog = Backlog()
+
+    def leave_backlog(item: Dict[str, Any]) -> None:
+        """The article is summarized, skipped or failed: it no longer weighs on the 'auto' profile."""
+        if item.pop("in_backlog", False):
+            backlog.done()
+
+    def mark_failed(item: Dict[str, Any], error: Exception) -> None:
+        leave_backlog(item)
+        with counts_lock:
+            counts["failed"] += 1
+        mark_processed(item["article"].get("url"))
+        logger.error("[%d] ❌ Error classifying article: %s", item["index"], error)
+
+    # --- Stage functions: each takes and returns the per-article work item ---
+    def is_boilerplate(item: Dict[str, Any], article: Dict[str, Any]) -> bool:
+        title = (article.get("title") or "").lower()
+        if not (title and any(phrase in title for phrase in classifier.SKIP_TITLE_PHRASES)):
+            return False
+        mark_processed(article.get("url"))
+        log_sampled(logger, "skip_boilerplate", logging.INFO, "[%d] ⏭️ Skipping static/boilerplate article: %s",
+                    item["index"], article.get("title"))
+        return True
+
+    def fetch(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Checked before the fetch when discovery has a title, and again on the
+        # fetched one (DW links are discovered without a title).
+        if is_boilerplate(item, item["article"]):
+            leave_backlog(item)
+            return None
+        article = fetch_discovered(item["article"])
+        if article is None or is_boilerplate(item, article):
+            leave_backlog(item)
+            return None
+        item["article"] = article
+        return item
+
+    def summarize(item: Dict[str, Any]) -> Dict[str, Any]:
+        with article_token_cache(item["token_cache"]):
+            # Articles discovered and not summarized yet drive the 'auto' summarizer profile.
+            item["summary"] = classifier.summarize_text(item["article"]["text"], backlog.depth())
+        leave_backlog(item)
+        return item
+
+    def classify(item: Dict[str, Any]) -> Dict[str, Any]:
+        summary, summary_profile = item["summary"]
+        with article_token_cache(item.pop("token_cache")):
+            analysis = {"summary": summary, "summary_profile": summary_profile,
+                        **classifier.classify_summary(summary)}
+        topic_stats.record(analysis["topic_labels_scored"])
+        item["classified"] = classifier.build_classified_article(
+            item["article"], analysis, id_for_metadata, sample_date, sample_seq)
+        return item
+
+    def clean(item: Dict[str, Any]) -> Dict[str, Any]:
+        text = item["article"].get("text", "")
+        try:
+            item["classified"]["text"] = classifier.submit_cleaning(cleaner, text, cleaning_stats).result()
+        except Exception as e:
+            logger.warning("[%d] ⚠️ Text cleaning failed: %s, using original text", item["index"], e)
+            item["classified"]["text"] = text
+        return item
+
+    def persist(item: Dict[str, Any]) -> Dict[str, Any]:
+        classified_article = item["classified"]
+        with counts_lock:
+            counts["classified"] += 1
+            topic_counter[classified_article["topic"]] += 1
+            sentiment_counter[classified_article["sentiment"]["label"]] += 1
+        # The id is assigned up front so the flush callback can find the topic.
+        classified_article["_id"] = ObjectId()
+        topic_by_insert_id[str(classified_article["_id"])] = classified_article["topic"]
+        repo_articles.create_articles_buffered(classified_article)
+        mark_processed(classified_article["url"])
+        logger.info("[%d] ✅ %s", item["index"], classified_article["title"],
+                    extra={"fields": {"topic": classified_article["topic"]}})
+        return item
+
+    stages = [
+        Stage("fetch", fetch, PIPELINE_FETCH_WORKERS, on_error=mark_failed),
+        Stage("summarize", summarize, PIPELINE_SUMMARIZE_WORKERS, on_error=mark_failed),
+        Stage("topic_sentiment", classify, PIPELINE_CLASSIFY_WORKERS, on_error=mark_failed),
+        Stage("clean", clean, PIPELINE_CLEAN_WORKERS, on_error=mark_failed),
+        Stage("persist", persist, PIPELINE_PERSIST_WORKERS, on_error=mark_failed),
+    ]
+    source = ({"index": i, "article": article, "token_cache": TokenCache(), "in_backlog": True}
+              for i, article in enumerate(_discover_ahead(backlog), start=1))
+
+    with AsyncTextCleaner() as cleaner:
+        pipeline_report = StagedPipeline(stages, on_progress=on_progress).run(source)
+        cleaning_report = cleaning_stats.report(cleaner.llm_calls, cleaner.llm_seconds)
+    topic_report = topic_stats.report()
+    print(f"Pipeline: {pipeline_report}")
+    print(f"Text cleaning: {cleaning_report}")
+    print(f"Topic prefilter: {topic_report}")
+
+    repo_articles.flush_writes()
+    repo_link_pool.flush_writes()
+    global_counters.close()
+
+    classifier.finish_sample(id_for_metadata, topic_counter, sentiment_counter, counts["classified"],
+                             counts["failed"], {"text_cleaning": cleaning_report, "topic_prefilter": topic_report,
+                                                "pipeline": pipeline_report})
+    return id_for_metadata
@@ -1,27 +1,45 @@
 # python
 # file: 'ingest/summarizer.py'
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
+from transformers import AutoModelForSeq2SeqLM, pipeline
 import os
 from pathlib import Path
 import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
 import torch
 from dotenv import load_dotenv
 
-load_dotenv()
+# Boilerplate helpers live with the rule-based cleaner; re-exported for existing imports.
+from ingest.rule_cleaner import is_photo_credit  # noqa: F401
+from ingest.model_loading import load_model, load_tokenizer
+from ingest.tokenization import current_token_cache
 
-UNWANTED_KEYWORDS = [
-    "Copyright",
-    "©",
-    "all rights reserved",
-    "terms of use",
-    "bbc is not responsible",
-    "AP Photo",
-    "r",
-]
+load_dotenv()
 
 MODEL_NAME = "facebook/bart-large-cnn"
 
+# -------------------------------------------------------------------
+# PROFILES
+# -------------------------------------------------------------------
+
+# quality: current BART-CNN with the model's beam-search defaults.
+# fast: distilled BART, greedy decoding, shorter outputs.
+# extractive: no model; picks the highest-scoring sentences.
+# Keep the model names in sync with scripts/bootstrap_models.py.
+SUMMARIZER_PROFILES: Dict[str, Dict[str, Any]] = {
+    "quality": {"model": MODEL_NAME, "num_beams": None, "max_length": 200, "min_length": 80},
+    "fast": {"model": "sshleifer/distilbart-cnn-12-6", "num_beams": 1, "max_length": 120, "min_length": 40},
+    "extractive": {"model": None, "max_sentences": 5},
+}
+
+# "auto" picks a profile from the run's backlog: articles discovered and not summarized yet.
+SUMMARIZER_PROFILE = os.getenv("SUMMARIZER_PROFILE", "quality").strip().lower()
+SUMMARIZER_AUTO_FAST_DEPTH = int(os.getenv("SUMMARIZER_AUTO_FAST_DEPTH", 50))
+SUMMARIZER_AUTO_EXTRACTIVE_DEPTH = int(os.getenv("SUMMARIZER_AUTO_EXTRACTIVE_DEPTH", 300))
+
 # -------------------------------------------------------------------
 # CACHE DIRECTORY RESOLUTION (FIXED)
 # -------------------------------------------------------------------
@@ -50,24 +68,6 @@ CACHE_DIR = str(cache_path)
 
 print(f"Summarizer: using transformers cache at {CACHE_DIR}")
 
-# -------------------------------------------------------------------
-# MODEL & TOKENIZER LOADING
-# -------------------------------------------------------------------
-
-# Load from cache (will download if not present, once)
-tokenizer = AutoTokenizer.from_pretrained(
-    MODEL_NAME,
-    cache_dir=CACHE_DIR,
-    local_files_only=False,
-    use_fast=True,
-)
-
-model = AutoModelForSeq2SeqLM.from_pretrained(
-    MODEL_NAME,
-    cache_dir=CACHE_DIR,
-    local_files_only=False,
-)
-
 # -------------------------------------------------------------------
 # DEVICE SELECTION (GLOBAL)
 # -------------------------------------------------------------------
@@ -83,137 +83,358 @@ else:
     _torch_dev = torch.device("cpu")
     _pipeline_device = -1
 
-try:
-    model.to(_torch_dev)
-except Exception:
-    # Don't crash if device move fails (e.g. no MPS backend in this build)
-    pass
 
-print(
-    f"Summarizer: torch version={torch.__version__}, "
-    f"cuda_available={torch.cuda.is_available()}, "
-    f"device={_torch_dev}, pipeline_device={_pipeline_device}"
-)
+def _resolve_device(device) -> torch.device:
+    """Map 'auto', 'cpu', 'cuda', 'gpu', 'mps' or an int GPU index to a torch device."""
+    if device == "auto":
+        return _torch_dev
+    # allow explicit strings or ints: 'cpu', 'cuda', 'mps', or integer GPU index
+    if isinstance(device, int):
+        return torch.device("cuda:0") if device >= 0 else torch.device("cpu")
+    d = str(device).lower()
+    if d.startswith("cuda") or d == "gpu":
+        return torch.device("cuda:0")
+    if d == "mps":
+        return torch.device("mps")
+    return torch.device("cpu")
+
+
+def _length_bounds(in_len: int, max_cap: int = 200, min_cap: int = 80):
+    """Generation (max_length, min_length) for a chunk of ``in_len`` tokens."""
+    if in_len < max_cap:
+        max_len = max(int(in_len * 0.8), 20)
+        min_len = min(10, max_len // 2)
+        return max_len, min_len
+    return max_cap, min_cap
+
+
+_SENTENCE_SPLIT_RX = re.compile(r"(?<=[.!?]) +")
 
-# Create the summarization pipeline once and reuse
-_summarizer_pipeline = pipeline(
-    "summarization",
-    model=model,
-    tokenizer=tokenizer,
-    device=_pipeline_device,
-)
 
 # -------------------------------------------------------------------
-# HELPERS
+# BACKENDS
 # -------------------------------------------------------------------
 
-def is_photo_credit(text: str) -> bool:
-    return bool(re.search(r"\(AP Photo/.*?\)", text, flags=re.IGNORECASE))
+class SummarizerBackend:
+    """Interface shared by every summarizer profile."""
 
+    profile = ""
 
-def chunk_text(text: str, max_tokens: int = 512):
-    """
-    Split text into chunks based on sentence boundaries, limited by token count.
-    """
-    sentences = re.split(r"(?<=[.!?]) +", text)
-    chunks, current, cur_len = [], "", 0
-
-    for s in sentences:
-        tlen = len(tokenizer.encode(s, add_special_tokens=False))
-        if cur_len + tlen > max_tokens:
-            if current:
-                chunks.append(current.strip())
-            current, cur_len = s, tlen
-        else:
-            current += (" " if current else "") + s
-            cur_len += tlen
+    def load(self) -> None:
+        """Load whatever the backend needs; no-op by default."""
 
-    if current:
-        chunks.append(current.strip())
+    def summarize(self, text: str, device="auto") -> str:
+        raise NotImplementedError
 
-    return chunks
+    def summarize_batch(self, texts: List[str], batch_size: int = 8) -> List[str]:
+        return [self.summarize(t) for t in texts]
 
 
-# -------------------------------------------------------------------
-# MAIN SUMMARIZE FUNCTION
-# -------------------------------------------------------------------
+class AbstractiveBackend(SummarizerBackend):
+    """Seq2seq summarization pipeline with chunking, loaded lazily."""
 
-def smart_summarize(text: str, device: str = "auto") -> str:
-    text = text.strip()
-    if len(text) < 200:
-        return text
+    def __init__(self, profile: str, model_name: str, num_beams: Optional[int] = None,
+                 max_length: int = 200, min_length: int = 80) -> None:
+        self.profile = profile
+        self.model_name = model_name
+        self.num_beams = num_beams
+        self.max_length = max_length
+        self.min_length = min_length
+        self.tokenizer = None
+        self.model = None
+        self.pipeline = None
 
-    # Select device dynamically if requested
-    if device == "auto":
-        if torch.cuda.is_available():
-            torch_dev = torch.device("cuda:0")
-            pipeline_device = 0
-        elif getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
-            torch_dev = torch.device("mps")
-            pipeline_device = -1
-        else:
-            torch_dev = torch.device("cpu")
-            pipeline_device = -1
-    else:
-        # allow explicit strings or ints: 'cpu', 'cuda', 'mps', or integer GPU index
-        if isinstance(device, int):
-            pipeline_device = device
-            torch_dev = torch.device("cuda:0") if device >= 0 else torch.device("cpu")
-        else:
-            d = str(device).lower()
-            if d == "cpu":
-                torch_dev = torch.device("cpu")
-                pipeline_device = -1
-            elif d.startswith("cuda") or d == "gpu":
-                torch_dev = torch.device("cuda:0")
-                pipeline_device = 0
-            elif d == "mps":
-                torch_dev = torch.device("mps")
-                pipeline_device = -1
+    def load(self) -> None:
+        if self.pipeline is not None:
+            return
+
+        # Local safetensors snapshot (memory-mapped) if bootstrapped, else the
+        # HF cache (will download if not present, once)
+        self.tokenizer = load_tokenizer(self.model_name, cache_dir=CACHE_DIR, use_fast=True)
+        self.model = load_model(AutoModelForSeq2SeqLM, self.model_name, cache_dir=CACHE_DIR)
+
+        try:
+            self.model.to(_torch_dev)
+        except Exception:
+            # Don't crash if device move fails (e.g. no MPS backend in this build)
+            pass
+
+        print(
+            f"Summarizer[{self.profile}]: model={self.model_name}, torch version={torch.__version__}, "
+            f"cuda_available={torch.cuda.is_available()}, "
+            f"device={_torch_dev}, pipeline_device={_pipeline_device}"
+        )
+
+        # Create the summarization pipeline once and reuse
+        self.pipeline = pipeline(
+            "summarization",
+            model=self.model,
+            tokenizer=self.tokenizer,
+            device=_pipeline_device,
+        )
+
+    def _generate_kwargs(self, in_len: int) -> Dict[str, Any]:
+        max_len, min_len = _length_bounds(in_len, self.max_length, self.min_length)
+        kwargs: Dict[str, Any] = {
+            "max_length": max_len,
+            "min_length": min_len,
+            "do_sample": False,
+            "truncation": True,
+        }
+        if self.num_beams is not None:
+            kwargs["num_beams"] = self.num_beams
+        return kwargs
+
+    def count_tokens(self, text: str) -> int:
+        self.load()
+        return current_token_cache().count(self.tokenizer, text)
+
+    def chunk_text_with_lengths(self, text: str, max_tokens: int = 512) -> List[Tuple[str, int]]:
+        """
+        Split text into chunks based on sentence boundaries, limited by token count.
+        All sentences are tokenized in one batched call; a chunk's length is the
+        sum of its sentences' lengths, so chunks are never re-tokenized.
+        """
+        self.load()
+        sentences = _SENTENCE_SPLIT_RX.split(text)
+        lengths = [len(ids) for ids in current_token_cache().batch_encode(self.tokenizer, sentences)]
+        chunks, current, cur_len = [], "", 0
+
+        for s, tlen in zip(sentences, lengths):
+            if cur_len + tlen > max_tokens:
+                if current:
+                    chunks.append((current.strip(), cur_len))
+                current, cur_len = s, tlen
             else:
-                torch_dev = torch.device("cpu")
-                pipeline_device = -1
+                current += (" " if current else "") + s
+                cur_len += tlen
+
+        if current:
+            chunks.append((current.strip(), cur_len))
 
-    # Move model to desired device (pipeline is already created)
-    try:
-        model.to(torch_dev)
-    except Exception:
-        pass
+        return chunks
 
-    summarizer = _summarizer_pipeline
+    def chunk_text(self, text: str, max_tokens: int = 512) -> List[str]:
+        return [chunk for chunk, _ in self.chunk_text_with_lengths(text, max_tokens)]
 
-    chunks = chunk_text(text)
-    summaries = []
+    def summarize(self, text: str, device="auto") -> str:
+        text = text.strip()
+        if len(text) < 200:
+            return text
 
-    for chunk in chunks:
+        self.load()
+
+        # Move model to desired device (pipeline is already created)
         try:
-            in_len = len(tokenizer.encode(chunk, add_special_tokens=False))
+            self.model.to(_resolve_device(device))
+        except Exception:
+            pass
+
+        summaries = []
+        for chunk, in_len in self.chunk_text_with_lengths(text):
+            try:
+                out = self.pipeline(chunk, **self._generate_kwargs(in_len))[0]["summary_text"]
+                summaries.append(out)
+
+                if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+                    torch.mps.empty_cache()
+            except Exception as e:
+                print(f"Error summarizing chunk: {e}")
+
+        result = "\n".join(summaries)
+
+        # If the final summary is still too long, recursively summarize again
+        if self.count_tokens(result) > 512:
+            return self.summarize(result, device=device)
+
+        return result
+
+    def summarize_batch(self, texts: List[str], batch_size: int = 8) -> List[str]:
+        """
+        Summarize several texts at once: chunks from every text are grouped by their
+        generation settings and sent to the pipeline as batches.
+        """
+        self.load()
+        texts = [t.strip() for t in texts]
+        results: List[str] = list(texts)
+
+        groups: Dict[tuple, List[tuple]] = defaultdict(list)
+        parts: Dict[int, List[str]] = {}
+        for idx, text in enumerate(texts):
+            if len(text) < 200:
+                continue
+            chunks = self.chunk_text_with_lengths(text)
+            parts[idx] = [""] * len(chunks)
+            for pos, (chunk, in_len) in enumerate(chunks):
+                kwargs = self._generate_kwargs(in_len)
+                groups[tuple(sorted(kwargs.items()))].append((idx, pos, chunk))
+
+        for kwargs_key, items in groups.items():
+            try:
+                outputs = self.pipeline([chunk for _, _, chunk in items], batch_size=batch_size, **dict(kwargs_key))
+            except Exception as e:
+                print(f"Error summarizing batch: {e}")
+                continue
+            for (idx, pos, _), out in zip(items, outputs):
+                parts[idx][pos] = out["summary_text"]
+
+        for idx, pieces in parts.items():
+            result = "\n".join(p for p in pieces if p)
+            if self.count_tokens(result) > 512:
+                result = self.summarize(result)
+            results[idx] = result
+
+        return results
+
+
+_WORD_RX = re.compile(r"[A-Za-z][A-Za-z'-]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by for from had has have he her his i in into is it its "
+    "not of on or our said she that the their them there they this to was we were which who "
+    "will with would you".split()
+)
 
-            if in_len < 200:
-                max_len = max(int(in_len * 0.8), 20)
-                min_len = min(10, max_len // 2)
-            else:
-                max_len, min_len = 200, 80
 
-            out = summarizer(
-                chunk,
-                max_length=max_len,
-                min_length=min_len,
-                do_sample=False,
-                truncation=True,
-            )[0]["summary_text"]
+class ExtractiveBackend(SummarizerBackend):
+    """Frequency-scored sentence extraction; no model, near-zero latency."""
+
+    def __init__(self, profile: str = "extractive", max_sentences: int = 5) -> None:
+        self.profile = profile
+        self.max_sentences = max_sentences
 
-            summaries.append(out)
+    def summarize(self, text: str, device="auto") -> str:
+        text = text.strip()
+        if len(text) < 200:
+            return text
 
-            if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
-                torch.mps.empty_cache()
-        except Exception as e:
-            print(f"Error summarizing chunk: {e}")
+        sentences = [s.strip() for s in _SENTENCE_SPLIT_RX.split(text.replace("\n", " ")) if s.strip()]
+        if len(sentences) <= self.max_sentences:
+            return " ".join(sentences)
 
-    result = "\n".join(summaries)
+        freq: Dict[str, int] = defaultdict(int)
+        sentence_words = []
+        for s in sentences:
+            words = [w.lower() for w in _WORD_RX.findall(s) if w.lower() not in _STOPWORDS]
+            sentence_words.append(words)
+            for w in words:
+                freq[w] += 1
 
-    # If the final summary is still too long, recursively summarize again
-    if len(tokenizer.encode(result, add_special_tokens=False)) > 512:
-        return smart_summarize(result, device=device)
+        def score(idx: int) -> float:
+            words = sentence_words[idx]
+            if not words:
+                return 0.0
+            # Slight lead bias: news puts the key facts first.
+            return sum(freq[w] for w in words) / len(words) + (1.0 if idx == 0 else 0.0)
 
-    return result
+        best = sorted(range(len(sentences)), key=score, reverse=True)[:self.max_sentences]
+        return " ".join(sentences[i] for i in sorted(best))
+
+
+_backends: Dict[str, SummarizerBackend] = {}
+
+
+def get_backend(profile: str) -> SummarizerBackend:
+    if profile not in SUMMARIZER_PROFILES:
+        raise ValueError(f"Unknown summarizer profile '{profile}'. Known: {sorted(SUMMARIZER_PROFILES)}")
+    backend = _backends.get(profile)
+    if backend is None:
+        spec = SUMMARIZER_PROFILES[profile]
+        if spec.get("model"):
+            backend = AbstractiveBackend(profile, spec["model"], spec.get("num_beams"),
+                                         spec.get("max_length", 200), spec.get("min_length", 80))
+        else:
+            backend = ExtractiveBackend(profile, spec.get("max_sentences", 5))
+        _backends[profile] = backend
+    return backend
+
+
+def select_profile(queue_depth: Optional[int] = None, profile: Optional[str] = None) -> str:
+    """Resolve the profile to use: explicit > SUMMARIZER_PROFILE > queue-depth rule for 'auto'."""
+    profile = (profile or SUMMARIZER_PROFILE).lower()
+    if profile != "auto":
+        return profile
+    depth = queue_depth or 0
+    if depth >= SUMMARIZER_AUTO_EXTRACTIVE_DEPTH:
+        return "extractive"
+    if depth >= SUMMARIZER_AUTO_FAST_DEPTH:
+        return "fast"
+    return "quality"
+
+
+class Backlog:
+    """
+    Articles discovered in this run and not summarized (or dropped) yet: the
+    queue depth 'auto' is meant to see. The inboxes in front of the summarizer
+    are bounded (PIPELINE_QUEUE_SIZE, CLASSIFY_CHUNK_SIZE) below the thresholds,
+    so their size would keep 'auto' on the quality profile.
+    """
+
+    def __init__(self, discovered: int = 0) -> None:
+        self._pending = discovered
+        self._lock = threading.Lock()
+
+    def add(self, n: int = 1) -> None:
+        with self._lock:
+            self._pending += n
+
+    def done(self, n: int = 1) -> None:
+        with self._lock:
+            self._pending = max(0, self._pending - n)
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._pending
+
+
+def active_profiles() -> List[str]:
+    """Profiles the current configuration may pick."""
+    if SUMMARIZER_PROFILE == "auto":
+        return list(SUMMARIZER_PROFILES)
+    return [SUMMARIZER_PROFILE]
+
+
+# -------------------------------------------------------------------
+# MODULE-LEVEL API (kept for existing callers)
+# -------------------------------------------------------------------
+
+# Tokenizer/model of the "quality" profile, populated by load_summarizer().
+tokenizer = None
+model = None
+_summarizer_pipeline = None
+
+
+def load_summarizer():
+    """Load every profile the configuration may use and return the quality pipeline (if loaded)."""
+    global tokenizer, model, _summarizer_pipeline
+    for profile in active_profiles():
+        get_backend(profile).load()
+    quality = _backends.get("quality")
+    if isinstance(quality, AbstractiveBackend) and quality.pipeline is not None:
+        tokenizer, model, _summarizer_pipeline = quality.tokenizer, quality.model, quality.pipeline
+    return _summarizer_pipeline
+
+
+def chunk_text(text: str, max_tokens: int = 512):
+    """
+    Split text into chunks based on sentence boundaries, limited by token count.
+    """
+    return get_backend("quality").chunk_text(text, max_tokens)
+
+
+def summarize_with_profile(text: str, profile: Optional[str] = None,
+                           queue_depth: Optional[int] = None, device="auto") -> Tuple[str, str]:
+    """Return (summary, profile_used)."""
+    chosen = select_profile(queue_depth, profile)
+    return get_backend(chosen).summarize(text, device=device), chosen
+
+
+def smart_summarize(text: str, device: str = "auto", profile: Optional[str] = None) -> str:
+    return summarize_with_profile(text, profile=profile, device=device)[0]
+
+
+def smart_summarize_batch(texts: List[str], batch_size: int = 8, profile: Optional[str] = None) -> List[str]:
+    """
+    Summarize several texts with one profile in shared batches. Used by the
+    inference server to batch requests coming from different clients.
+    """
+    return get_backend(select_profile(profile=profile)).summarize_batch(texts, batch_size=batch_size)
@@ -0,0 +1,157 @@
+# ingest/text_cleaner.py
+"""
+Asynchronous LLM text-cleaning stage.
+
+Cleaning requests to the local Ollama endpoint run on a background asyncio
+loop with a bounded number in flight, one pooled keep-alive connection set,
+a per-request deadline and an in-memory result cache. ``submit`` returns a
+concurrent.futures.Future so the (synchronous) classification loop can keep
+going and persist each article as soon as its cleaning completes.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gpt-oss:20b")
+CLEANING_CONCURRENCY = int(os.getenv("CLEANING_CONCURRENCY", 4))
+CLEANING_DEADLINE = float(os.getenv("CLEANING_DEADLINE", 60))
+CLEANING_CACHE_SIZE = int(os.getenv("CLEANING_CACHE_SIZE", 2048))
+
+CLEANING_PROMPT = """You are a professional text cleaner.
+Your task:
+- Remove any reference to news outlets, authors, publication names, URLs, or web layout artifacts.
+- Discard malformed, incomplete, or irrelevant fragments.
+- Do not include explanations, comments, or formatting — only return the clean text.
+Text to rewrite:
+"""
+
+
+def build_cleaning_payload(text: str, model: str = OLLAMA_MODEL) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "prompt": CLEANING_PROMPT + text,
+        "stream": False,
+    }
+
+
+def _cache_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class AsyncTextCleaner:
+    """
+    Usage:
+        with AsyncTextCleaner() as cleaner:
+            future = cleaner.submit(text)
+            ...
+            cleaned = future.result()
+
+    Like call_to_gpt_api, a timeout or API error resolves to the original text.
+    """
+
+    def __init__(
+            self,
+            api_url: str = OLLAMA_URL,
+            model: str = OLLAMA_MODEL,
+            concurrency: int = CLEANING_CONCURRENCY,
+            deadline: float = CLEANING_DEADLINE,
+            cache_size: int = CLEANING_CACHE_SIZE,
+    ) -> None:
+        self.api_url = api_url
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.deadline = deadline
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.timeouts = 0
+        self.errors = 0
+        # Wall time of completed LLM calls, used to estimate what the fast path saves.
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    # --- lifecycle ---
+    def start(self) -> "AsyncTextCleaner":
+        if self._loop is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="text-cleaner", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), self._loop).result()
+        return self
+
+    async def _open(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            timeout=httpx.Timeout(self.deadline),
+        )
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = self._client = None
+
+    def __enter__(self) -> "AsyncTextCleaner":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # --- API ---
+    def submit(self, text: str) -> Future:
+        if self._loop is None:
+            raise RuntimeError("AsyncTextCleaner is not started")
+        return asyncio.run_coroutine_threadsafe(self._clean(text), self._loop)
+
+    async def _clean(self, text: str) -> str:
+        key = _cache_key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self._client.post(self.api_url, json=build_cleaning_payload(text, self.model)),
+                    timeout=self.deadline,
+                )
+                cleaned = response.json()["response"].strip()
+                self.llm_calls += 1
+                self.llm_seconds += time.perf_counter() - started
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                self.timeouts += 1
+                print(f"GPT API timeout after {self.deadline}s, using original text")
+                return text
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                self.errors += 1
+                print(f"GPT API error: {e}, using original text")
+                return text
+
+        self._cache[key] = cleaned
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cleaned
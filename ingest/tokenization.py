@@ -0,0 +1,104 @@
+# ingest/tokenization.py
+"""
+Per-article tokenization cache.
+
+Token ids (and offsets, when the tokenizer is a fast one) are cached per
+article, keyed by the tokenizer's vocabulary rather than its model name, so
+stages whose tokenizers share a vocabulary reuse each other's work: BART-CNN
+(summarizer) and BART-MNLI (topic) both use the BART BPE vocabulary, so the
+summary tokenized for the summarizer's length check is the same premise the
+topic stage needs.
+
+    with article_token_cache():
+        ...  # every stage calls current_token_cache().encode(tokenizer, text)
+
+Outside an ``article_token_cache`` block each call gets a throwaway cache, so
+nothing is retained between articles.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+_vocab_keys: Dict[int, str] = {}
+_vocab_lock = threading.Lock()
+_local = threading.local()
+
+
+def vocab_key(tokenizer) -> str:
+    """Stable identifier of a tokenizer's vocabulary (computed once per tokenizer object)."""
+    key = _vocab_keys.get(id(tokenizer))
+    if key is None:
+        with _vocab_lock:
+            key = _vocab_keys.get(id(tokenizer))
+            if key is None:
+                digest = hashlib.sha1()
+                for token, idx in sorted(tokenizer.get_vocab().items(), key=lambda kv: kv[1]):
+                    digest.update(f"{idx}\t{token}\n".encode("utf-8"))
+                key = f"{type(tokenizer).__name__.replace('Fast', '')}:{digest.hexdigest()[:16]}"
+                _vocab_keys[id(tokenizer)] = key
+    return key
+
+
+class TokenCache:
+    """Token ids/offsets of texts seen while processing one article."""
+
+    def __init__(self) -> None:
+        self._ids: Dict[Tuple[str, str], List[int]] = {}
+        self._offsets: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, tokenizer, text: str) -> List[int]:
+        """Token ids without special tokens."""
+        return self.batch_encode(tokenizer, [text])[0]
+
+    def offsets(self, tokenizer, text: str) -> Optional[List[Tuple[int, int]]]:
+        """Character offsets of each token (only available for fast tokenizers)."""
+        self.encode(tokenizer, text)
+        return self._offsets.get((vocab_key(tokenizer), text))
+
+    def batch_encode(self, tokenizer, texts: Sequence[str]) -> List[List[int]]:
+        """Encode only the texts not seen yet, in a single batched tokenizer call."""
+        vkey = vocab_key(tokenizer)
+        missing = list(dict.fromkeys(t for t in texts if (vkey, t) not in self._ids))
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            is_fast = getattr(tokenizer, "is_fast", False)
+            encoded = tokenizer(
+                missing,
+                add_special_tokens=False,
+                return_attention_mask=False,
+                return_offsets_mapping=is_fast,
+                verbose=False,
+            )
+            for i, text in enumerate(missing):
+                self._ids[(vkey, text)] = list(encoded["input_ids"][i])
+                if is_fast:
+                    self._offsets[(vkey, text)] = [tuple(o) for o in encoded["offset_mapping"][i]]
+        return [self._ids[(vkey, t)] for t in texts]
+
+    def count(self, tokenizer, text: str) -> int:
+        return len(self.encode(tokenizer, text))
+
+
+@contextmanager
+def article_token_cache(cache: Optional[TokenCache] = None) -> Iterator[TokenCache]:
+    """
+    Scope a TokenCache to the current article (per thread). Passing the cache
+    of an earlier block lets an article handed between threads (staged
+    pipeline) keep its token ids.
+    """
+    previous = getattr(_local, "cache", None)
+    cache = cache if cache is not None else TokenCache()
+    _local.cache = cache
+    try:
+        yield cache
+    finally:
+        _local.cache = previous
+
+
+def current_token_cache() -> TokenCache:
+    cache = getattr(_local, "cache", None)
+    return cache if cache is not None else TokenCache()
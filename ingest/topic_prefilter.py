@@ -0,0 +1,180 @@
+# ingest/topic_prefilter.py
+"""
+Cheap first stage for topic classification.
+
+Scores every candidate topic with an IDF-weighted keyword lexicon and proposes
+the top-k labels, so the zero-shot NLI model only has to score k hypotheses
+instead of all of them. When the lexicon evidence is weak (few hits, or the
+top-k do not cover enough of the score mass) every label is sent to NLI.
+
+Zero-shot scoring normalises entailment logits across the labels it is given,
+so restricting the label set does not change the relative order of the labels
+that remain: whenever the true best label is in the top-k the NLI result is the
+same as scoring all of them.
+"""
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+TOPIC_PREFILTER_ENABLED = os.getenv("TOPIC_PREFILTER_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+TOPIC_PREFILTER_K = int(os.getenv("TOPIC_PREFILTER_K", 4))
+# Share of the lexicon score mass the top-k must cover to skip the full pass.
+TOPIC_PREFILTER_MIN_CONFIDENCE = float(os.getenv("TOPIC_PREFILTER_MIN_CONFIDENCE", 0.75))
+# Below this many keyword hits the lexicon has nothing useful to say.
+TOPIC_PREFILTER_MIN_HITS = int(os.getenv("TOPIC_PREFILTER_MIN_HITS", 3))
+
+# Keyed by the CANDIDATE_TOPICS labels in classifier.py. Entries are word
+# prefixes ("legislat" covers legislation/legislature); a trailing space
+# makes an entry match the whole word only ("war " does not match "warming").
+TOPIC_KEYWORDS: Dict[str, List[str]] = {
+    "politics and government": [
+        "government", "minister", "parliament", "senat", "congress", "election", "elector", "elected",
+        "vote", "ballot", "president", "prime minister", "policy", "legislat", "lawmaker", "party", "campaign", "democrat",
+        "republican", "cabinet", "diplomat", "sanction", "white house", "kremlin", "opposition",
+    ],
+    "sports and athletics": [
+        "match", "tournament", "championship", "league", "football", "soccer", "basketball", "tennis",
+        "cricket", "olympic", "athlet", "coach", "goal", "season", "cup", "player", "team", "stadium",
+        "fifa", "nba", "nfl", "race", "medal", "scored",
+    ],
+    "science and research": [
+        "scien", "research", "study", "studies", "physic", "biolog", "chemist", "astronom", "nasa",
+        "space", "telescope", "discover", "experiment", "journal ", "laborator", "species", "genetic",
+        "fossil", "planet", "universit", "peer-review",
+    ],
+    "technology and innovation": [
+        "technolog", "tech ", "software", "artificial intelligence", "ai ", "startup", "app ", "apps",
+        "digital", "internet", "cyber", "chip", "semiconductor", "smartphone", "apple", "google", "microsoft",
+        "meta ", "openai", "robot", "data", "cloud", "innovat", "algorithm",
+    ],
+    "health and medicine": [
+        "health", "hospital", "doctor", "patient", "disease", "virus", "vaccin", "medic", "drug",
+        "cancer", "treatment", "clinic", "nurse", "outbreak", "pandemic", "covid", "mental health",
+        "surgery", "infection", "diagnos",
+    ],
+    "business and finance": [
+        "business", "compan", "market", "stock", "share", "investor", "econom", "inflation", "bank",
+        "interest rate", "profit", "revenue", "earnings", "trade", "tariff", "ceo ", "merger",
+        "acquisition", "gdp", "currency", "dollar", "oil price", "wall street",
+    ],
+    "entertainment and celebrity": [
+        "film", "movie", "actor", "actress", "singer", "music", "album", "concert", "celebrit",
+        "hollywood", "tv ", "television", "series", "netflix", "award", "oscar", "grammy", "star ",
+        "stars", "festival", "box office", "premiere",
+    ],
+    "crime and justice": [
+        "police", "arrest", "crime", "criminal", "court", "judge", "trial", "prosecut", "jail",
+        "prison", "sentenc", "murder", "killed", "shooting", "fraud", "lawsuit", "charged", "guilty",
+        "investigat", "suspect", "convict",
+    ],
+    "climate and environment": [
+        "climate", "environment", "emission", "carbon", "warming", "pollution", "renewable", "solar",
+        "wind power", "fossil fuel", "wildfire", "flood", "drought", "heatwave", "biodiversity",
+        "deforestation", "cop2", "greenhouse", "conservation", "weather",
+    ],
+    "education and schools": [
+        "school", "student", "teacher", "education", "universit", "college", "campus", "pupil",
+        "exam ", "exams", "curriculum", "tuition", "classroom", "graduat", "scholarship", "academic",
+        "literacy",
+    ],
+    "war and conflict": [
+        "war ", "wars", "military", "troop", "army", "missile", "airstrike", "strike", "attack",
+        "ceasefire", "invasion", "soldier", "drone", "bomb", "hamas", "hezbollah", "ukrain", "gaza", "nato",
+        "rebel", "shelling", "frontline", "hostage", "weapon",
+    ],
+    "travel and tourism": [
+        "travel", "touris", "tourist", "airline", "flight", "airport", "hotel", "holiday", "vacation",
+        "destination", "cruise", "passport", "visa", "resort", "booking", "traveller", "traveler",
+    ],
+}
+
+
+def _build_matchers() -> List[Tuple[str, "re.Pattern[str]", float]]:
+    # IDF over topics: keywords shared by several topics carry less weight.
+    topics_per_keyword = Counter(kw for kws in TOPIC_KEYWORDS.values() for kw in set(kws))
+    n_topics = len(TOPIC_KEYWORDS)
+    matchers = []
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        for kw in keywords:
+            # A trailing space marks a whole word; otherwise the keyword is a prefix.
+            rx = re.compile(r"\b" + re.escape(kw.strip()) + (r"\b" if kw.endswith(" ") else r"\w*"))
+            idf = math.log(1 + n_topics / topics_per_keyword[kw])
+            matchers.append((topic, rx, idf))
+    return matchers
+
+
+_MATCHERS = _build_matchers()
+
+
+def score_topics(text: str) -> Tuple[Dict[str, float], int]:
+    """Return (IDF-weighted score per topic, total keyword hits)."""
+    lowered = text.lower()
+    scores: Dict[str, float] = {topic: 0.0 for topic in TOPIC_KEYWORDS}
+    hits = 0
+    for topic, rx, idf in _MATCHERS:
+        n = len(rx.findall(lowered))
+        if n:
+            hits += n
+            # Sub-linear term frequency so one repeated word cannot dominate.
+            scores[topic] += (1 + math.log(n)) * idf
+    return scores, hits
+
+
+def propose_labels(text: str, labels: Sequence[str], k: int = TOPIC_PREFILTER_K,
+                   min_confidence: float = TOPIC_PREFILTER_MIN_CONFIDENCE) -> Tuple[List[str], float]:
+    """
+    Return (labels to score with NLI, confidence). Falls back to every label
+    when confidence is below ``min_confidence``.
+    """
+    labels = list(labels)
+    if not TOPIC_PREFILTER_ENABLED or k <= 0 or k >= len(labels):
+        return labels, 0.0
+
+    scores, hits = score_topics(text)
+    if hits < TOPIC_PREFILTER_MIN_HITS:
+        return labels, 0.0
+
+    ranked = sorted(labels, key=lambda lbl: scores.get(lbl, 0.0), reverse=True)
+    total = sum(scores.get(lbl, 0.0) for lbl in labels)
+    if total <= 0:
+        return labels, 0.0
+
+    top = ranked[:k]
+    confidence = sum(scores.get(lbl, 0.0) for lbl in top) / total
+    if confidence < min_confidence:
+        return labels, confidence
+    return top, confidence
+
+
+class TopicPrefilterStats:
+    """Per-run NLI pass accounting; shared by the classify threads."""
+
+    def __init__(self, n_labels: int) -> None:
+        self.n_labels = n_labels
+        self.articles = 0
+        self.pruned = 0
+        self.nli_passes = 0
+        self._lock = threading.Lock()
+
+    def record(self, labels_scored: int) -> None:
+        with self._lock:
+            self.articles += 1
+            self.nli_passes += labels_scored
+            if labels_scored < self.n_labels:
+                self.pruned += 1
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            articles, pruned, nli_passes = self.articles, self.pruned, self.nli_passes
+        full = articles * self.n_labels
+        return {
+            "articles": articles,
+            "pruned": pruned,
+            "fallback_full": articles - pruned,
+            "nli_passes": nli_passes,
+            "nli_passes_saved": full - nli_passes,
+            "saved_ratio": round((full - nli_passes) / full, 4) if full else 0.0,
+        }
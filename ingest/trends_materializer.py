@@ -0,0 +1,180 @@
+# ingest/trends_materializer.py
+"""
+Incremental materialization of daily trends.
+
+Aggregates the articles inserted since the last watermark into per-day,
+per-topic, per-source rows and ``$merge``s them into ``daily_trends``, adding
+to the counts already there:
+
+    {_id: {date, topic, source}, kind: "topic_source", date, topic, source,
+     count, positive, negative, sentiment_sum, avg_sentiment, updated_at}
+
+``sentiment_sum`` adds +score for POSITIVE and -score for NEGATIVE, and
+``avg_sentiment`` is sentiment_sum / count.
+
+The watermark is an ``_id`` (ObjectId) bound kept in ``consumer_checkpoints``. Each
+run covers (watermark, now - TRENDS_WATERMARK_LAG_SECONDS]. The lag leaves room
+for write buffers that are still in flight when the run starts.
+
+    python -m ingest.trends_materializer            # incremental
+    python -m ingest.trends_materializer --rebuild  # drop materialized rows and recompute everything
+    python -m ingest.trends_materializer --bench    # incremental run vs. a full recompute into a scratch collection
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from lib.repositories.articles_repository import ArticlesRepository
+from lib.repositories.daily_trends_repository import DailyTrendsRepository
+from lib.repositories.checkpoint_repository import CheckpointRepository
+
+load_dotenv()
+
+TRENDS_WATERMARK_LAG_SECONDS = int(os.getenv("TRENDS_WATERMARK_LAG_SECONDS", 120))
+
+CONSUMER_NAME = "trends_materializer"
+TARGET_COLLECTION = "daily_trends"
+
+repo_articles = ArticlesRepository()
+repo_daily_trends = DailyTrendsRepository()
+repo_state = CheckpointRepository()
+
+
+def _signed_score() -> Dict[str, Any]:
+    return {"$switch": {
+        "branches": [
+            {"case": {"$eq": ["$sentiment.label", "POSITIVE"]}, "then": {"$ifNull": ["$sentiment.score", 0]}},
+            {"case": {"$eq": ["$sentiment.label", "NEGATIVE"]}, "then": {"$multiply": [-1, {"$ifNull": ["$sentiment.score", 0]}]}},
+        ],
+        "default": 0,
+    }}
+
+
+def build_pipeline(match: Dict[str, Any], target: str = TARGET_COLLECTION, accumulate: bool = True) -> List[Dict[str, Any]]:
+    """
+    Aggregation from ``articles`` matching ``match`` into ``target``. With
+    ``accumulate`` the new counts are added to existing rows; otherwise rows are replaced.
+    """
+    now = datetime.now(timezone.utc)
+    day = {"$dateToString": {"format": "%Y-%m-%d", "date": {"$ifNull": ["$scraped_at", {"$toDate": "$_id"}]}}}
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
+        {"$project": {"topic": 1, "source": 1, "sentiment.label": 1, "sentiment.score": 1, "scraped_at": 1}},
+        {"$group": {
+            "_id": {"date": day, "topic": {"$ifNull": ["$topic", "unknown"]}, "source": {"$ifNull": ["$source", "unknown"]}},
+            "count": {"$sum": 1},
+            "positive": {"$sum": {"$cond": [{"$eq": ["$sentiment.label", "POSITIVE"]}, 1, 0]}},
+            "negative": {"$sum": {"$cond": [{"$eq": ["$sentiment.label", "NEGATIVE"]}, 1, 0]}},
+            "sentiment_sum": {"$sum": _signed_score()},
+        }},
+        {"$set": {
+            "kind": "topic_source",
+            "date": "$_id.date",
+            "topic": "$_id.topic",
+            "source": "$_id.source",
+            "avg_sentiment": {"$divide": ["$sentiment_sum", "$count"]},
+            "updated_at": now,
+        }},
+    ]
+    if accumulate:
+        when_matched: Any = [{"$set": {
+            "count": {"$add": ["$count", "$$new.count"]},
+            "positive": {"$add": ["$positive", "$$new.positive"]},
+            "negative": {"$add": ["$negative", "$$new.negative"]},
+            "sentiment_sum": {"$add": ["$sentiment_sum", "$$new.sentiment_sum"]},
+            "avg_sentiment": {"$divide": [{"$add": ["$sentiment_sum", "$$new.sentiment_sum"]},
+                                          {"$add": ["$count", "$$new.count"]}]},
+            "updated_at": "$$new.updated_at",
+        }}]
+    else:
+        when_matched = "replace"
+    pipeline.append({"$merge": {"into": target, "on": "_id", "whenMatched": when_matched, "whenNotMatched": "insert"}})
+    return pipeline
+
+
+def _upper_bound() -> ObjectId:
+    return ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=TRENDS_WATERMARK_LAG_SECONDS))
+
+
+def _run(match: Dict[str, Any], target: str, accumulate: bool) -> float:
+    started = time.perf_counter()
+    # $merge returns no documents; draining the cursor runs the pipeline to completion.
+    for _ in repo_articles.aggregate_articles(build_pipeline(match, target, accumulate)):
+        pass
+    return time.perf_counter() - started
+
+
+def materialize_incremental() -> Dict[str, Any]:
+    state = repo_state.get_state(CONSUMER_NAME)
+    watermark: Optional[ObjectId] = state.get("watermark")
+    upper = _upper_bound()
+    if watermark is not None and watermark >= upper:
+        return {"mode": "incremental", "articles": 0, "seconds": 0.0}
+    match: Dict[str, Any] = {"_id": {"$lte": upper}}
+    if watermark is not None:
+        match["_id"]["$gt"] = watermark
+    articles = repo_articles.count_articles(match)
+    seconds = _run(match, TARGET_COLLECTION, accumulate=True) if articles else 0.0
+    # A crash between the merge and this write would add the window twice on the
+    # next run; `--rebuild` recomputes everything from scratch if that happens.
+    repo_state.save_state(CONSUMER_NAME, {"watermark": upper})
+    report = {"mode": "incremental", "articles": articles, "seconds": round(seconds, 3),
+              "window": [str(watermark) if watermark else None, str(upper)]}
+    print(f"✅ Daily trends updated: {report}")
+    return report
+
+
+def rebuild() -> Dict[str, Any]:
+    """Recompute every materialized row from all articles up to the watermark bound."""
+    upper = _upper_bound()
+    removed = repo_daily_trends.delete_materialized()
+    match = {"_id": {"$lte": upper}}
+    articles = repo_articles.count_articles(match)
+    seconds = _run(match, TARGET_COLLECTION, accumulate=False)
+    repo_state.save_state(CONSUMER_NAME, {"watermark": upper})
+    report = {"mode": "rebuild", "articles": articles, "removed_rows": removed, "seconds": round(seconds, 3)}
+    print(f"✅ Daily trends rebuilt: {report}")
+    return report
+
+
+def bench() -> Dict[str, Any]:
+    """Time the incremental step against a from-scratch recompute into a scratch collection."""
+    scratch = f"{TARGET_COLLECTION}_bench"
+    db = repo_articles.collection.database
+    db.drop_collection(scratch)
+    match = {"_id": {"$lte": _upper_bound()}}
+    full_articles = repo_articles.count_articles(match)
+    full_seconds = _run(match, scratch, accumulate=False)
+    rows = db[scratch].count_documents({})
+    db.drop_collection(scratch)
+    incremental = materialize_incremental()
+    report = {
+        "full_recompute": {"articles": full_articles, "rows": rows, "seconds": round(full_seconds, 3)},
+        "incremental": incremental,
+        "speedup": round(full_seconds / incremental["seconds"], 1) if incremental["seconds"] else None,
+    }
+    print(f"Benchmark: {report}")
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Materialize daily topic/source trends into daily_trends.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--rebuild", action="store_true", help="delete materialized rows and recompute from scratch")
+    group.add_argument("--bench", action="store_true", help="compare incremental vs full recompute")
+    args = parser.parse_args()
+    if args.rebuild:
+        rebuild()
+    elif args.bench:
+        bench()
+    else:
+        materialize_incremental()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
+import logging
+
 import trafilatura
 from lib.repositories.link_pool_repository import LinkPoolRepository
+from utils.log import get_logger, log_sampled
 
 repo = LinkPoolRepository()
+logger = get_logger(__name__)
 
 
 def is_urls_processed_already(url):
     is_it = repo.is_link_successfully_processed(url)
     if is_it:
-        print(f"{url} it has been processed already. Skipping ")
+        log_sampled(logger, "url_already_processed", logging.INFO, "%s it has been processed already. Skipping", url)
         return True
     else:
         return False
@@ -20,5 +24,5 @@ def fetch_and_extract(url):
         if downloaded:
             return trafilatura.extract(downloaded)
     except Exception as e:
-        print(f"Failed to fetch content from {url}: {e}")
+        log_sampled(logger, "fetch_failed", logging.WARNING, "Failed to fetch content from %s: %s", url, e)
     return None
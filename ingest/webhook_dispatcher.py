@@ -0,0 +1,311 @@
+# ingest/webhook_dispatcher.py
+"""
+Webhook delivery from the ``webhook_outbox`` collection.
+
+classify_articles stores one outbox event per article and webhook target
+together with the article (in the same transaction on a replica set, see
+lib/db/write_buffer.py). This process delivers them:
+
+    python -m ingest.webhook_dispatcher                  # run the worker
+    python -m ingest.webhook_dispatcher --stats          # counts and latency per target/status
+    python -m ingest.webhook_dispatcher --requeue-dead   # retry dead letters (optionally --target embedding)
+    python -m ingest.webhook_dispatcher --migrate-legacy # enqueue articles still marked delivered=false
+
+Every round leases the due events of each target (``claim_due``) and sends
+them from a pool of WEBHOOK_DISPATCH_CONCURRENCY threads. A target whose
+receiver has a batch endpoint (WEBHOOK_URL_BATCH / WEBHOOK_URL_THREAD_EVENTS_BATCH)
+gets up to WEBHOOK_BATCH_MAX events per POST. A failed event is retried with
+exponential backoff (WEBHOOK_BACKOFF_BASE * 2^(attempt-1), capped at
+WEBHOOK_BACKOFF_MAX, with jitter) and becomes a dead letter after
+WEBHOOK_MAX_ATTEMPTS attempts. Leases expire after WEBHOOK_LEASE_SECONDS, so
+several workers can run side by side and a crashed one loses nothing.
+
+In ``stream`` mode a change stream on the outbox wakes the worker as soon as
+events are inserted. ``poll`` mode (standalone mongod) checks every
+WEBHOOK_POLL_INTERVAL seconds. ``auto`` (the default) tries the stream first.
+Delivery is at-least-once.
+"""
+import argparse
+import os
+import random
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from pymongo.errors import OperationFailure, PyMongoError
+
+from ingest.call_to_webhook import (WEBHOOK_BATCH_MAX, WEBHOOK_PROJECTION, WEBHOOK_TARGETS, outbox_events_for,
+                                    post_events, target_batch_url)
+from lib.repositories.articles_repository import ArticlesRepository
+from lib.repositories.webhook_outbox_repository import WebhookOutboxRepository, event_latency_ms
+from lib.repositories.work_queue_repository import WorkQueueRepository
+from utils.log import get_logger, setup_logging
+
+load_dotenv()
+
+WEBHOOK_DISPATCH_MODE = os.getenv("WEBHOOK_DISPATCH_MODE", "auto").strip().lower()  # auto | stream | poll
+WEBHOOK_DISPATCH_CONCURRENCY = int(os.getenv("WEBHOOK_DISPATCH_CONCURRENCY", 8))
+WEBHOOK_DISPATCH_BATCH = int(os.getenv("WEBHOOK_DISPATCH_BATCH", 200))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", 5))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", 8))
+WEBHOOK_BACKOFF_BASE = float(os.getenv("WEBHOOK_BACKOFF_BASE", 2))
+WEBHOOK_BACKOFF_MAX = float(os.getenv("WEBHOOK_BACKOFF_MAX", 600))
+WEBHOOK_LEASE_SECONDS = float(os.getenv("WEBHOOK_LEASE_SECONDS", 120))
+WEBHOOK_METRICS_INTERVAL = float(os.getenv("WEBHOOK_METRICS_INTERVAL", 60))
+
+# Server error codes meaning "change streams are not available here".
+_NO_CHANGE_STREAM_CODES = {40573, 40324}
+
+logger = get_logger(__name__)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+class DeliveryMetrics:
+    """Counters plus recent end-to-end (stored -> delivered) and per-request latencies, per target."""
+
+    def __init__(self, window: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self._window = window
+        self._targets: Dict[str, Dict[str, Any]] = {}
+
+    def _target(self, target: str) -> Dict[str, Any]:
+        if target not in self._targets:
+            self._targets[target] = {"delivered": 0, "failed": 0, "dead": 0, "requests": 0,
+                                     "latency_ms": deque(maxlen=self._window),
+                                     "request_ms": deque(maxlen=self._window)}
+        return self._targets[target]
+
+    def record_request(self, target: str, request_ms: float, delivered: Optional[List[Optional[float]]] = None,
+                       failed: int = 0, dead: int = 0) -> None:
+        with self._lock:
+            stats = self._target(target)
+            stats["requests"] += 1
+            stats["request_ms"].append(request_ms)
+            stats["failed"] += failed
+            stats["dead"] += dead
+            for latency in delivered or []:
+                stats["delivered"] += 1
+                if latency is not None:
+                    stats["latency_ms"].append(latency)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for target, stats in self._targets.items():
+                latencies: List[float] = sorted(stats["latency_ms"])
+                requests_ms: Deque[float] = stats["request_ms"]
+                result[target] = {
+                    "delivered": stats["delivered"],
+                    "failed": stats["failed"],
+                    "dead": stats["dead"],
+                    "requests": stats["requests"],
+                    "latency_p50_ms": _percentile(latencies, 50),
+                    "latency_p95_ms": _percentile(latencies, 95),
+                    "latency_p99_ms": _percentile(latencies, 99),
+                    "request_avg_ms": round(sum(requests_ms) / len(requests_ms), 1) if requests_ms else None,
+                }
+            return result
+
+
+class WebhookDispatcher:
+    def __init__(self, concurrency: int = WEBHOOK_DISPATCH_CONCURRENCY, batch_size: int = WEBHOOK_DISPATCH_BATCH,
+                 poll_interval: float = WEBHOOK_POLL_INTERVAL, max_attempts: int = WEBHOOK_MAX_ATTEMPTS) -> None:
+        self.repo_outbox = WebhookOutboxRepository()
+        self.repo_work_queue = WorkQueueRepository()
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.metrics = DeliveryMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="webhook")
+        self._stop = threading.Event()
+        self._last_report = time.monotonic()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        """Wait for in-flight requests and log the final metrics."""
+        self._executor.shutdown(wait=True)
+        self._maybe_report(force=True)
+
+    # --- Delivery ---
+    def _retry_at(self, event: Dict[str, Any], now: datetime) -> Optional[datetime]:
+        attempts = event.get("attempts", 1)
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(WEBHOOK_BACKOFF_BASE * 2 ** (attempts - 1), WEBHOOK_BACKOFF_MAX)
+        # Jitter keeps events that failed together from retrying together.
+        return now + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    def _send(self, chunk: Tuple[str, List[Dict[str, Any]]]) -> int:
+        target, events = chunk
+        started = time.perf_counter()
+        try:
+            post_events(target, [event["payload"] for event in events])
+            error = None
+        except Exception as e:
+            error = str(e)
+        request_ms = (time.perf_counter() - started) * 1000
+        now = datetime.now(timezone.utc)
+        try:
+            if error is None:
+                self.repo_outbox.mark_delivered(events, now)
+                latencies = [event_latency_ms(event, now) for event in events]
+                self.metrics.record_request(target, request_ms, delivered=latencies)
+                self._close_work_items([event["article_id"] for event in events])
+                return len(events)
+            retry_at = {event["_id"]: self._retry_at(event, now) for event in events}
+            dead = sum(1 for at in retry_at.values() if at is None)
+            self.repo_outbox.mark_failed(events, error, retry_at)
+            self.metrics.record_request(target, request_ms, failed=len(events) - dead, dead=dead)
+            logger.warning("⚠️ Webhook %s: %d event(s) failed (%s); %d moved to dead letters",
+                           target, len(events), error, dead)
+        except PyMongoError as e:
+            # The lease expires and the events are retried; delivery stays at-least-once.
+            logger.error("❌ Could not record the outcome of %d %s event(s): %s", len(events), target, e)
+        return 0
+
+    def _close_work_items(self, article_ids: List[Any]) -> None:
+        # Articles that came through the work queue are done once every target got them.
+        pending = set(self.repo_outbox.undelivered_article_ids(article_ids))
+        self.repo_work_queue.mark_delivered([a for a in set(article_ids) if a not in pending])
+
+    def deliver_round(self) -> int:
+        """Claim the due events of every target and send them concurrently; returns events claimed."""
+        chunks: List[Tuple[str, List[Dict[str, Any]]]] = []
+        claimed = 0
+        for target in WEBHOOK_TARGETS:
+            events = self.repo_outbox.claim_due(target, self.batch_size, WEBHOOK_LEASE_SECONDS)
+            claimed += len(events)
+            size = WEBHOOK_BATCH_MAX if target_batch_url(target) else 1
+            chunks.extend((target, events[i:i + size]) for i in range(0, len(events), size))
+        if chunks:
+            list(self._executor.map(self._send, chunks))
+        self._maybe_report()
+        return claimed
+
+    def drain(self) -> int:
+        """Deliver rounds until nothing is due."""
+        total = 0
+        while not self._stop.is_set():
+            claimed = self.deliver_round()
+            total += claimed
+            if claimed == 0:
+                break
+        return total
+
+    def _maybe_report(self, force: bool = False) -> None:
+        if force or time.monotonic() - self._last_report >= WEBHOOK_METRICS_INTERVAL:
+            self._last_report = time.monotonic()
+            report = self.metrics.report()
+            if report:
+                logger.info("Webhook delivery: %s", report)
+
+    # --- Modes ---
+    def run_polling(self) -> None:
+        print(f"Webhook dispatcher polling the outbox every {self.poll_interval}s")
+        while not self._stop.is_set():
+            if not self.drain():
+                self._stop.wait(self.poll_interval)
+
+    def run_change_stream(self) -> None:
+        with self.repo_outbox.watch_inserts() as stream:
+            print("Webhook dispatcher woken by the outbox change stream")
+            # The stream is open before the drain, so nothing inserted meanwhile is missed.
+            self.drain()
+            last_drain = time.monotonic()
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                # New events, or time to pick up retries whose backoff ran out.
+                if change is not None or time.monotonic() - last_drain >= self.poll_interval:
+                    self.drain()
+                    last_drain = time.monotonic()
+
+    def run(self, mode: str = WEBHOOK_DISPATCH_MODE) -> None:
+        try:
+            if mode == "poll":
+                self.run_polling()
+                return
+            while not self._stop.is_set():
+                try:
+                    self.run_change_stream()
+                except OperationFailure as e:
+                    if e.code in _NO_CHANGE_STREAM_CODES and mode == "auto":
+                        print(f"⚠️ Change streams unavailable ({e}); falling back to polling")
+                        self.run_polling()
+                        return
+                    raise
+                except PyMongoError as e:
+                    # Network blips: pending events are still in the outbox.
+                    print(f"⚠️ Change stream interrupted: {e}; reconnecting")
+                    self._stop.wait(1)
+        finally:
+            self.close()
+            print("Webhook dispatcher stopped")
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        return self.metrics.report()
+
+
+def migrate_legacy(batch_size: int = WEBHOOK_DISPATCH_BATCH) -> int:
+    """Enqueue outbox events for articles stored with delivered=false before the outbox existed."""
+    repo_articles = ArticlesRepository()
+    repo_outbox = WebhookOutboxRepository()
+    total = 0
+    after_id = None
+    while True:
+        page = repo_articles.find_undelivered(batch_size, after_id)
+        if not page:
+            break
+        ids = [doc["_id"] for doc in page]
+        articles = list(repo_articles.get_articles({"_id": {"$in": ids}}, WEBHOOK_PROJECTION))
+        repo_outbox.enqueue([event for article in articles for event in outbox_events_for(article)])
+        # delivered=true now means "handed to the outbox".
+        repo_articles.mark_delivered(ids, datetime.now(timezone.utc))
+        total += len(articles)
+        after_id = ids[-1]
+    print(f"✅ Enqueued webhook events for {total} legacy articles")
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deliver webhook events from the outbox.")
+    parser.add_argument("--mode", choices=("auto", "stream", "poll"), default=WEBHOOK_DISPATCH_MODE)
+    parser.add_argument("--stats", action="store_true", help="print counts and latency per target/status")
+    parser.add_argument("--requeue-dead", action="store_true", help="move dead letters back to pending")
+    parser.add_argument("--target", choices=WEBHOOK_TARGETS, help="restrict --requeue-dead to one target")
+    parser.add_argument("--migrate-legacy", action="store_true", help="enqueue articles marked delivered=false")
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.stats:
+        for row in WebhookOutboxRepository().stats(since=datetime.now(timezone.utc) - timedelta(hours=24)):
+            print(row)
+        return
+    if args.requeue_dead:
+        print(f"✅ Requeued {WebhookOutboxRepository().requeue_dead(args.target)} dead letters")
+        return
+    if args.migrate_legacy:
+        migrate_legacy()
+        return
+
+    dispatcher = WebhookDispatcher()
+    signal.signal(signal.SIGTERM, lambda *_: dispatcher.stop())
+    try:
+        dispatcher.run(args.mode)
+    except KeyboardInterrupt:
+        dispatcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+# ingest/work_queue.py
+"""
+Crawl -> fetch -> classify as independent workers sharing the ``work_queue``
+collection (see lib/repositories/work_queue_repository.py):
+
+    python -m ingest.work_queue discover                 # list new URLs from every source
+    python -m ingest.work_queue fetch --threads 16       # discovered -> fetched (download + extract)
+    python -m ingest.work_queue classify --batch 16      # fetched -> classified (models + store + outbox)
+    python -m ingest.work_queue status                   # items per state
+    python -m ingest.work_queue retry-failed             # give failed items another round
+
+Any number of fetch and classify workers can run on different hosts. Each
+item is leased with find_one_and_update and the lease expires after
+WORK_QUEUE_LEASE_SECONDS, so a crashed worker's items are picked up again.
+Classify workers renew the leases of the batch they hold every third of that
+time, so a slow batch is not claimed twice. An item moves to ``failed`` after
+WORK_QUEUE_MAX_ATTEMPTS attempts, counting the ones whose lease expired.
+The webhook dispatcher makes the last transition (classified -> delivered)
+once every webhook of the article has been delivered.
+
+Unlike the single-process classifier, link_pool is only marked processed once
+the article is stored, and a stopped run resumes from the queue.
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo.errors import PyMongoError
+
+from ingest.call_to_webhook import outbox_events_for
+from ingest.custom_scrapers import fetch_discovered
+from ingest.get_all_articles import discover_all_links
+from ingest.global_counters import GlobalCounters
+from lib.db.write_buffer import BulkWriteBuffer
+from lib.repositories.articles_repository import ArticlesRepository
+from lib.repositories.link_pool_repository import LinkPoolRepository
+from lib.repositories.webhook_outbox_repository import WebhookOutboxRepository
+from lib.repositories.work_queue_repository import CLASSIFIED, DISCOVERED, FAILED, FETCHED, SKIPPED, WorkQueueRepository
+from utils.log import get_logger, setup_logging
+
+load_dotenv()
+
+WORK_QUEUE_LEASE_SECONDS = float(os.getenv("WORK_QUEUE_LEASE_SECONDS", 300))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", 5))
+WORK_QUEUE_IDLE_SLEEP = float(os.getenv("WORK_QUEUE_IDLE_SLEEP", 5))
+WORK_QUEUE_FETCH_THREADS = int(os.getenv("WORK_QUEUE_FETCH_THREADS", 8))
+WORK_QUEUE_CLASSIFY_BATCH = int(os.getenv("WORK_QUEUE_CLASSIFY_BATCH", 16))
+
+repo_queue = WorkQueueRepository()
+logger = get_logger(__name__)
+
+_stop = threading.Event()
+
+
+def request_stop() -> None:
+    """Ask every worker loop of this process to finish its current item and return."""
+    _stop.set()
+
+
+def default_worker_id(kind: str) -> str:
+    return f"{kind}-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def discover(chunk_size: int = 200) -> int:
+    """Upsert every newly discovered URL as ``discovered`` (or ``fetched`` when the feed has the text)."""
+    new = 0
+    chunk: List[Dict[str, Any]] = []
+    for item in discover_all_links():
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            new += repo_queue.discover(chunk)
+            chunk = []
+    new += repo_queue.discover(chunk)
+    print(f"✅ Discovered {new} new URLs: {repo_queue.counts()}")
+    return new
+
+
+# --- Fetch stage ---
+
+def _fetch_loop(worker_id: str, exit_when_idle: bool, stats: Counter, lock: threading.Lock) -> None:
+    while not _stop.is_set():
+        item = repo_queue.claim(DISCOVERED, worker_id, WORK_QUEUE_LEASE_SECONDS, WORK_QUEUE_MAX_ATTEMPTS)
+        if item is None:
+            if exit_when_idle:
+                return
+            _stop.wait(WORK_QUEUE_IDLE_SLEEP)
+            continue
+        url = item["_id"]
+        try:
+            fetched = fetch_discovered({**item, "url": url})
+        except Exception as e:
+            fetched = None
+            logger.warning("Fetch failed for %s: %s", url, e)
+        if fetched is None:
+            state = repo_queue.release(url, worker_id, "no text extracted", WORK_QUEUE_MAX_ATTEMPTS)
+            outcome = "failed" if state == FAILED else "retry"
+        else:
+            fields = {"text": fetched["text"], "title": fetched.get("title"), "scraped_at": fetched["scraped_at"]}
+            outcome = "fetched" if repo_queue.advance(url, DISCOVERED, FETCHED, worker_id, fields) else "lost_lease"
+        with lock:
+            stats[outcome] += 1
+
+
+def run_fetch_workers(threads: int = WORK_QUEUE_FETCH_THREADS, worker_id: Optional[str] = None,
+                      exit_when_idle: bool = False, stats: Optional[Counter] = None) -> Dict[str, int]:
+    """Fetching is network-bound: ``threads`` loops share one process. ``stats`` can be read while it runs."""
+    worker_id = worker_id or default_worker_id("fetch")
+    stats = stats if stats is not None else Counter()
+    lock = threading.Lock()
+    workers = [threading.Thread(target=_fetch_loop, args=(f"{worker_id}-{n}", exit_when_idle, stats, lock),
+                                name=f"fetch-{n}", daemon=True) for n in range(max(1, threads))]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        while thread.is_alive():
+            thread.join(timeout=1)
+    print(f"Fetch workers {worker_id} done: {dict(stats)}")
+    return dict(stats)
+
+
+# --- Leases ---
+
+class LeaseHeartbeat:
+    """Renews the leases of the items a worker holds every ``lease_seconds / 3`` while it works on them."""
+
+    def __init__(self, worker_id: str, lease_seconds: float = WORK_QUEUE_LEASE_SECONDS) -> None:
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = max(1.0, lease_seconds / 3)
+        self._urls: Set[str] = set()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._timer_loop, name="lease-heartbeat", daemon=True)
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._timer.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._closed.set()
+        self._timer.join()
+
+    def hold(self, urls: Iterable[str]) -> None:
+        with self._lock:
+            self._urls.update(urls)
+
+    def drop(self, urls: Iterable[str]) -> None:
+        with self._lock:
+            self._urls.difference_update(urls)
+
+    def renew(self) -> int:
+        with self._lock:
+            urls = list(self._urls)
+        try:
+            # Items advanced or released meanwhile no longer match, and are left alone.
+            return repo_queue.renew_many(urls, self.worker_id, self.lease_seconds)
+        except PyMongoError as e:
+            logger.warning("⚠️ Could not renew %d leases: %s", len(urls), e)
+            return 0
+
+    def _timer_loop(self) -> None:
+        while not self._closed.wait(self.interval):
+            self.renew()
+
+
+# --- Classify stage ---
+
+class ClassifyWorker:
+    """
+    Leases ``fetched`` items in batches, runs the models and the cleaner on
+    them and stores the articles (with their outbox events). Each worker
+    process owns one sample (metadata document), like a classify_articles run.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, batch_size: int = WORK_QUEUE_CLASSIFY_BATCH) -> None:
+        # Importing the classifier loads the models (or connects to the inference server).
+        from ingest import classifier
+
+        self.classifier = classifier
+        self.worker_id = worker_id or default_worker_id("classify")
+        self.batch_size = max(1, batch_size)
+        self.repo_articles = ArticlesRepository()
+        self.repo_link_pool = LinkPoolRepository()
+        self.sample_id, self.sample_date, self.sample_seq = classifier.start_sample()
+        # Created in run(), once the inference pool has forked (its flush timer is a thread).
+        self.global_counters: Optional[GlobalCounters] = None
+        self.topic_counter: Counter = Counter()
+        self.sentiment_counter: Counter = Counter()
+        self.failed = 0
+        self._stored: List[str] = []
+        # Flushed explicitly once per batch; the outbox events ride along.
+        self.buffer = BulkWriteBuffer(self.repo_articles.collection, max_ops=10 ** 9, max_delay=0,
+                                      on_flush=self._stored.extend,
+                                      companion=(WebhookOutboxRepository().collection, outbox_events_for))
+        self.cleaning_stats = classifier.FastCleanStats()
+
+    def _skip(self, item: Dict[str, Any]) -> bool:
+        title = (item.get("title") or "").lower()
+        return any(phrase.lower() in title for phrase in self.classifier.SKIP_TITLE_PHRASES)
+
+    def _mark_link_processed(self, urls: List[str]) -> None:
+        if urls:
+            self.repo_link_pool.bulk_update_links(
+                [({"url": url}, {"$set": {"is_articles_processed": True, "sample": self.sample_id}}) for url in urls],
+                upsert=True,
+            )
+
+    def _fail(self, item: Dict[str, Any], error: str, stored: bool = True) -> None:
+        """``stored=False``: nothing was written for this attempt, so the retry may take a fresh article id."""
+        self.failed += 1
+        state = repo_queue.release(item["_id"], self.worker_id, error, WORK_QUEUE_MAX_ATTEMPTS,
+                                   unset=None if stored else ["article_id"])
+        logger.error("❌ %s: %s (now %s)", item["_id"], error, state or "lease lost")
+
+    def process(self, items: List[Dict[str, Any]], cleaner, pool=None) -> int:
+        """Classify and store one leased batch; returns how many items reached ``classified``."""
+        todo = []
+        for item in items:
+            if self._skip(item):
+                repo_queue.advance(item["_id"], FETCHED, SKIPPED, self.worker_id, unset=["text"])
+                self._mark_link_processed([item["_id"]])
+            else:
+                todo.append(item)
+        if not todo:
+            return 0
+
+        article_ids = repo_queue.assign_article_ids(todo, self.worker_id)
+        # Items missing from article_ids were lost to another worker (expired lease).
+        todo = [{**item, "article_id": article_ids[item["_id"]]} for item in todo if item["_id"] in article_ids]
+        # Articles stored by an earlier attempt that died before advancing the item.
+        ids = [item["article_id"] for item in todo]
+        existing = {doc["_id"] for doc in self.repo_articles.get_articles({"_id": {"$in": ids}}, {"_id": 1})}
+
+        tasks = [(pos, item["text"]) for pos, item in enumerate(todo) if item["article_id"] not in existing]
+        pending: Dict[Future, Dict[str, Any]] = {}
+        # The fetched items still queued drive the 'auto' summarizer profile.
+        waiting = max(0, repo_queue.count_state(FETCHED) - len(tasks))
+        for pos, analysis, error in self.classifier._iter_analyses(tasks, pool, waiting):
+            item = todo[pos]
+            if error:
+                self._fail(item, error, stored=False)
+                continue
+            article = self.classifier.build_classified_article(
+                {**item, "url": item["_id"]}, analysis, self.sample_id, self.sample_date, self.sample_seq)
+            article["_id"] = item["article_id"]
+            pending[self.classifier.submit_cleaning(cleaner, item["text"], self.cleaning_stats)] = article
+        wait(list(pending))
+
+        texts = {item["article_id"]: item["text"] for item in todo}
+        articles: Dict[ObjectId, Dict[str, Any]] = {}
+        for future, article in pending.items():
+            try:
+                article["text"] = future.result()
+            except Exception as e:
+                logger.warning("⚠️ Text cleaning failed for %s: %s, using original text", article["url"], e)
+                article["text"] = texts[article["_id"]]
+            articles[article["_id"]] = article
+            self.buffer.insert(article)
+        self._stored.clear()
+        self.buffer.flush()
+        stored = {ObjectId(_id) for _id in self._stored}
+        for article_id in stored:
+            article = articles[article_id]
+            self.global_counters.add_article(article["topic"])
+            self.topic_counter[article["topic"]] += 1
+            self.sentiment_counter[article["sentiment"]["label"]] += 1
+
+        done = []
+        for item in todo:
+            if item["article_id"] in stored or item["article_id"] in existing:
+                if repo_queue.advance(item["_id"], FETCHED, CLASSIFIED, self.worker_id, unset=["text"]):
+                    done.append(item["_id"])
+            elif item["article_id"] in articles:
+                self._fail(item, "article insert failed")
+        self._mark_link_processed(done)
+        return len(done)
+
+    @contextmanager
+    def _open_counters(self) -> Iterator[GlobalCounters]:
+        self.global_counters = GlobalCounters()
+        try:
+            yield self.global_counters
+        finally:
+            self.global_counters.close()
+
+    def run(self, exit_when_idle: bool = False) -> Dict[str, Any]:
+        classified = 0
+        started = time.perf_counter()
+        try:
+            # The fork pool (INFERENCE_WORKERS > 1) must exist before any thread of this process starts.
+            with self.classifier.inference_pool() as pool, self._open_counters(), \
+                    self.classifier.AsyncTextCleaner() as cleaner, LeaseHeartbeat(self.worker_id) as heartbeat:
+                while not _stop.is_set():
+                    items = repo_queue.claim_many(FETCHED, self.worker_id, WORK_QUEUE_LEASE_SECONDS, self.batch_size,
+                                                  WORK_QUEUE_MAX_ATTEMPTS)
+                    if not items:
+                        if exit_when_idle:
+                            break
+                        _stop.wait(WORK_QUEUE_IDLE_SLEEP)
+                        continue
+                    urls = [item["_id"] for item in items]
+                    heartbeat.hold(urls)
+                    try:
+                        classified += self.process(items, cleaner, pool)
+                    finally:
+                        heartbeat.drop(urls)
+                    logger.info("Classified %d articles (%.1f/min)", classified,
+                                classified / max(time.perf_counter() - started, 1e-6) * 60)
+                cleaning_report = self.cleaning_stats.report(cleaner.llm_calls, cleaner.llm_seconds)
+        finally:
+            self.buffer.close()
+        self.classifier.finish_sample(self.sample_id, self.topic_counter, self.sentiment_counter,
+                                      sum(self.topic_counter.values()), self.failed,
+                                      {"text_cleaning": cleaning_report, "worker_id": self.worker_id})
+        report = {"worker_id": self.worker_id, "sample": self.sample_id, "classified": classified, "failed": self.failed}
+        print(f"✅ Classify worker done: {report}")
+        return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Work-queue stages of the ingestion pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("discover", help="add newly discovered URLs to the queue")
+    fetch = sub.add_parser("fetch", help="run fetch workers (discovered -> fetched)")
+    fetch.add_argument("--threads", type=int, default=WORK_QUEUE_FETCH_THREADS)
+    classify = sub.add_parser("classify", help="run a classify worker (fetched -> classified)")
+    classify.add_argument("--batch", type=int, default=WORK_QUEUE_CLASSIFY_BATCH)
+    for worker in (fetch, classify):
+        worker.add_argument("--worker-id", default=None)
+        worker.add_argument("--exit-when-idle", action="store_true", help="stop when the stage has nothing left")
+    sub.add_parser("status", help="items per state")
+    sub.add_parser("retry-failed", help="put failed items back into the state they failed in")
+    args = parser.parse_args()
+    setup_logging()
+
+    signal.signal(signal.SIGTERM, lambda *_: request_stop())
+    try:
+        if args.command == "discover":
+            discover()
+        elif args.command == "fetch":
+            run_fetch_workers(args.threads, args.worker_id, args.exit_when_idle)
+        elif args.command == "classify":
+            ClassifyWorker(args.worker_id, args.batch).run(args.exit_when_idle)
+        elif args.command == "status":
+            print(repo_queue.counts())
+        else:
+            print(f"✅ Requeued {repo_queue.retry_failed()} failed items")
+    except KeyboardInterrupt:
+        request_stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# lib/db/indexes.py
+"""
+Single source of truth for the indexes of every collection.
+
+    python -m lib.db.indexes              # create missing / reconcile changed indexes
+    python -m lib.db.indexes --drop-extra # also drop indexes that are not declared here
+    python -m lib.db.indexes --verify     # explain() the repositories' query shapes; exit 1 on COLLSCAN
+    python -m lib.db.indexes --dry-run    # only report what would change
+
+Reconciling means: an index whose name is declared here but whose keys or
+options differ from the spec is rebuilt (the replacement is staged before the
+old one is dropped); missing ones are created.
+"""
+import argparse
+import importlib
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+
+from lib.db.mongo_client import get_db
+
+# Delivered webhook outbox events are removed after this many days (dead letters are kept).
+WEBHOOK_OUTBOX_TTL_DAYS = int(os.getenv("WEBHOOK_OUTBOX_TTL_DAYS", 7))
+
+# collection -> index definitions ({"keys": [...], "name": ..., plus create_index options})
+INDEX_SPECS: Dict[str, List[Dict[str, Any]]] = {
+    "link_pool": [
+        {"keys": [("url", ASCENDING)], "name": "url_unique", "unique": True},
+        {"keys": [("is_articles_processed", ASCENDING)], "name": "is_articles_processed"},
+    ],
+    "articles": [
+        {"keys": [("isCleaned", ASCENDING), ("sample", ASCENDING)], "name": "isCleaned_sample"},
+        {"keys": [("sample", ASCENDING)], "name": "sample"},
+        {"keys": [("sample_date", ASCENDING), ("sample_seq", ASCENDING), ("sample", ASCENDING)],
+         "name": "sample_date_seq"},
+        {"keys": [("topic", ASCENDING), ("scraped_at", DESCENDING)], "name": "topic_scraped_at"},
+        {"keys": [("scraped_at", DESCENDING)], "name": "scraped_at"},
+        # Only articles still waiting for their webhooks are indexed.
+        {"keys": [("delivered", ASCENDING), ("_id", ASCENDING)], "name": "undelivered",
+         "partialFilterExpression": {"delivered": False}},
+        # Re-classification streams each version group in _id order.
+        {"keys": [("pipeline_version", ASCENDING), ("model_version", ASCENDING), ("_id", ASCENDING)],
+         "name": "pipeline_model_version"},
+    ],
+    "clean_articles": [
+        {"keys": [("isCleaned", ASCENDING), ("sample", ASCENDING)], "name": "isCleaned_sample"},
+    ],
+    # Shared by SummariesRepository and TrendThreadsRepository.
+    "summaries": [
+        {"keys": [("isCleaned", ASCENDING), ("sample", ASCENDING)], "name": "isCleaned_sample"},
+        {"keys": [("sample_date", ASCENDING), ("sample_seq", ASCENDING), ("sample", ASCENDING)],
+         "name": "sample_date_seq"},
+        {"keys": [("thread_id", ASCENDING), ("date", ASCENDING)], "name": "thread_id_date"},
+        {"keys": [("date", ASCENDING)], "name": "date"},
+    ],
+    # One document per thread (_id = thread_id); reads are point lookups on _id.
+    "thread_timelines": [
+        {"keys": [("last_date", DESCENDING)], "name": "last_date"},
+    ],
+    "metadata": [
+        {"keys": [("gathering_sample_startedAt", DESCENDING)], "name": "gathering_sample_startedAt"},
+        {"keys": [("sample_date", ASCENDING), ("sample_seq", ASCENDING)], "name": "sample_date_seq"},
+    ],
+    "daily_trends": [
+        {"keys": [("date", ASCENDING)], "name": "date"},
+        {"keys": [("topic", ASCENDING), ("date", ASCENDING)], "name": "topic_date"},
+    ],
+    "global_metadata": [],
+    # One document per consumer (_id = consumer name); reads are point lookups on _id.
+    "consumer_checkpoints": [],
+    "webhook_outbox": [
+        {"keys": [("target", ASCENDING), ("status", ASCENDING), ("next_attempt_at", ASCENDING)],
+         "name": "target_status_next_attempt"},
+        {"keys": [("article_id", ASCENDING)], "name": "article_id"},
+        # Only delivered events have delivered_at, so the TTL never touches pending or dead ones.
+        {"keys": [("delivered_at", ASCENDING)], "name": "delivered_at_ttl",
+         "expireAfterSeconds": WEBHOOK_OUTBOX_TTL_DAYS * 86400},
+    ],
+    # _id is the article URL.
+    "work_queue": [
+        {"keys": [("state", ASCENDING), ("updated_at", ASCENDING)], "name": "state_updated_at"},
+        {"keys": [("article_id", ASCENDING)], "name": "article_id"},
+    ],
+}
+
+# (label, collection, filter, sort): a query a repository sends, with
+# representative values. Each repository module builds its QUERY_SHAPES with
+# the same helpers its methods use, so --verify explains the real filters.
+QueryShape = Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]
+
+# Imported lazily by repository_query_shapes (the repositories import this module).
+_REPOSITORY_MODULES = [
+    "lib.repositories.link_pool_repository",
+    "lib.repositories.articles_repository",
+    "lib.repositories.summaries_repository",
+    "lib.repositories.metadata_repository",
+    "lib.repositories.daily_trends_repository",
+    "lib.repositories.trend_threads_repository",
+    "lib.repositories.webhook_outbox_repository",
+    "lib.repositories.work_queue_repository",
+]
+
+
+def repository_query_shapes() -> List[QueryShape]:
+    shapes: List[QueryShape] = []
+    for module_name in _REPOSITORY_MODULES:
+        shapes.extend(importlib.import_module(module_name).QUERY_SHAPES)
+    return shapes
+
+
+def _spec_options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in spec.items() if k not in ("keys", "name")}
+
+
+def _same_keys(existing: Dict[str, Any], spec: Dict[str, Any]) -> bool:
+    return [tuple(k) for k in existing.get("key", [])] == [tuple(k) for k in spec["keys"]]
+
+
+def _matches(existing: Dict[str, Any], spec: Dict[str, Any]) -> bool:
+    if not _same_keys(existing, spec):
+        return False
+    return all(existing.get(opt) == value for opt, value in _spec_options(spec).items())
+
+
+# A rebuild first builds the new keys plus this (always missing) field under a
+# temporary name. It serves the same queries and enforces the same uniqueness,
+# so the old index is only dropped once the new definition is known to build.
+_STAGING_FIELD = "_index_staging"
+_STAGING_SUFFIX = "__staging"
+
+
+def _rebuild_index(collection, old_name: str, spec: Dict[str, Any]) -> None:
+    """Replace index ``old_name`` by ``spec`` without leaving its queries without an index."""
+    staging_name = spec["name"] + _STAGING_SUFFIX
+    # TTL only applies to single-field indexes; the staging copy does not need it.
+    staging_options = {k: v for k, v in _spec_options(spec).items() if k != "expireAfterSeconds"}
+    collection.create_indexes([IndexModel(spec["keys"] + [(_STAGING_FIELD, ASCENDING)], name=staging_name,
+                                          **staging_options)])
+    collection.drop_index(old_name)
+    # If this fails the staging index stays in place and the next run retries.
+    collection.create_indexes([IndexModel(spec["keys"], name=spec["name"], **_spec_options(spec))])
+    collection.drop_index(staging_name)
+
+
+def ensure_collection_indexes(db: Database, collection_name: str, *, drop_extra: bool = False,
+                              dry_run: bool = False) -> Dict[str, List[str]]:
+    """Create/reconcile the declared indexes of one collection; returns what changed (or would, with ``dry_run``)."""
+    collection = db[collection_name]
+    specs = INDEX_SPECS.get(collection_name, [])
+    existing = collection.index_information()
+    report: Dict[str, List[str]] = {"created": [], "rebuilt": [], "dropped": [], "unchanged": []}
+
+    to_create: List[IndexModel] = []
+    for spec in specs:
+        name = spec["name"]
+        # Indexes created before this module (e.g. "url_1") have default names.
+        # An equivalent one is kept as is; one with the same keys but other
+        # options would make create_index fail, so it is rebuilt.
+        others = [n for n, info in existing.items()
+                  if n != name and not n.endswith(_STAGING_SUFFIX) and _same_keys(info, spec)]
+        if name in existing:
+            if _matches(existing[name], spec):
+                report["unchanged"].append(name)
+                continue
+            if not dry_run:
+                _rebuild_index(collection, name, spec)
+            report["rebuilt"].append(name)
+        elif others:
+            if _matches(existing[others[0]], spec):
+                report["unchanged"].append(others[0])
+                continue
+            if not dry_run:
+                _rebuild_index(collection, others[0], spec)
+            report["rebuilt"].append(name)
+        else:
+            report["created"].append(name)
+            to_create.append(IndexModel(spec["keys"], name=name, **_spec_options(spec)))
+
+    if to_create and not dry_run:
+        collection.create_indexes(to_create)
+    # Staging index of a rebuild that failed in an earlier run; its index now exists.
+    for name in existing:
+        if name.endswith(_STAGING_SUFFIX):
+            if not dry_run:
+                collection.drop_index(name)
+            report["dropped"].append(name)
+
+    if drop_extra:
+        declared = {spec["name"] for spec in specs} | set(report["unchanged"])
+        for name in existing:
+            if name != "_id_" and name not in declared and not name.endswith(_STAGING_SUFFIX):
+                if not dry_run:
+                    collection.drop_index(name)
+                report["dropped"].append(name)
+    return report
+
+
+def ensure_indexes(db: Optional[Database] = None, *, drop_extra: bool = False,
+                   dry_run: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Bootstrap every collection in INDEX_SPECS."""
+    db = db if db is not None else get_db()
+    results = {}
+    for collection_name in INDEX_SPECS:
+        try:
+            report = ensure_collection_indexes(db, collection_name, drop_extra=drop_extra, dry_run=dry_run)
+        except OperationFailure as e:
+            # e.g. duplicate urls preventing the unique index
+            print(f"❌ {collection_name}: {e}")
+            report = {"error": [str(e)]}
+        else:
+            changes = {k: v for k, v in report.items() if v and k != "unchanged"}
+            prefix = "(dry run) " if dry_run else ""
+            print(f"✅ {prefix}{collection_name}: {changes or 'up to date'}")
+        results[collection_name] = report
+    return results
+
+
+def _plan_stages(plan: Dict[str, Any]) -> Iterator[str]:
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan", "winningPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def verify_query_plans(db: Optional[Database] = None) -> List[Dict[str, Any]]:
+    """explain() every repository query shape; returns the ones whose winning plan scans the collection."""
+    db = db if db is not None else get_db()
+    failures = []
+    for label, collection_name, query, sort in repository_query_shapes():
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_plan_stages(winning))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"{'❌' if status != 'ok' else '✅'} {label}: {' <- '.join(stages)}")
+        if status != "ok":
+            failures.append({"query": label, "collection": collection_name, "stages": stages})
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Create/reconcile MongoDB indexes and verify query plans.")
+    parser.add_argument("--verify", action="store_true", help="explain() the known query shapes; fail on COLLSCAN")
+    parser.add_argument("--drop-extra", action="store_true", help="drop indexes that are not declared in INDEX_SPECS")
+    parser.add_argument("--skip-ensure", action="store_true", help="only verify, do not create indexes")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be created/rebuilt/dropped")
+    args = parser.parse_args(argv)
+
+    if not args.skip_ensure:
+        results = ensure_indexes(drop_extra=args.drop_extra, dry_run=args.dry_run)
+        if any("error" in r for r in results.values()):
+            return 1
+    if args.verify:
+        failures = verify_query_plans()
+        if failures:
+            print(f"❌ {len(failures)} query shape(s) fall back to a collection scan")
+            return 1
+        print("✅ Every known query shape uses an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,16 @@
 # lib/db/mongo_client.py
+import importlib.util
 import os
-from pymongo import MongoClient
+from typing import Any, Dict, Optional
+from pymongo import AsyncMongoClient, MongoClient, ReadPreference, WriteConcern
 from dotenv import load_dotenv, find_dotenv
 from pathlib import Path
 
 _client = None
 _db = None
+_analytics_db = None
+_async_client = None
+_async_db = None
 
 # 1) Load .env automatically (once, on import)
 #    find_dotenv() searches upward until it finds a .env; returns "" if not found.
@@ -29,17 +34,96 @@ def _require_env(name: str) -> str:
     return value
 
 
+# Wire compressors and the optional package each one needs on the client side.
+_COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else None
+
+
+def available_compressors(requested: str) -> str:
+    """Filter a comma-separated compressor list down to the ones usable in this environment."""
+    usable = []
+    for name in (c.strip().lower() for c in requested.split(",")):
+        if not name:
+            continue
+        if name not in _COMPRESSOR_PACKAGES:
+            print(f"⚠️ Unknown MongoDB compressor '{name}' ignored (use zstd, snappy or zlib)")
+            continue
+        package = _COMPRESSOR_PACKAGES[name]
+        if package and importlib.util.find_spec(package) is None:
+            print(f"⚠️ MongoDB compressor '{name}' needs the '{package}' package; skipping it")
+            continue
+        usable.append(name)
+    return ",".join(usable)
+
+
+def build_write_concern(w: Optional[str] = None, journal: Optional[str] = None,
+                        wtimeout_ms: Optional[int] = None) -> Optional[WriteConcern]:
+    w = (w if w is not None else os.getenv("MONGO_WRITE_CONCERN", "")).strip()
+    journal = (journal if journal is not None else os.getenv("MONGO_WRITE_CONCERN_JOURNAL", "")).strip().lower()
+    wtimeout_ms = wtimeout_ms if wtimeout_ms is not None else _int_env("MONGO_WRITE_CONCERN_TIMEOUT_MS")
+    if not w and not journal and wtimeout_ms is None:
+        return None  # server default
+    kwargs: Dict[str, Any] = {}
+    if w:
+        kwargs["w"] = int(w) if w.isdigit() else w
+    if journal:
+        kwargs["j"] = journal in ("1", "true", "yes")
+    if wtimeout_ms is not None:
+        kwargs["wtimeout"] = wtimeout_ms
+    return WriteConcern(**kwargs)
+
+
+def client_options_from_env() -> Dict[str, Any]:
+    """
+    MongoClient keyword arguments from the environment. Unset variables keep the
+    driver defaults (maxPoolSize=100, no compression, primary reads, w=1).
+    """
+    options: Dict[str, Any] = {
+        "appname": os.getenv("APP_NAME", "trend-app"),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS") or 8000,  # fail faster if unreachable
+    }
+    for env_name, option in (
+            ("MONGO_MAX_POOL_SIZE", "maxPoolSize"),
+            ("MONGO_MIN_POOL_SIZE", "minPoolSize"),
+            ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS"),
+            ("MONGO_MAX_CONNECTING", "maxConnecting"),
+            ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS"),
+            ("MONGO_SOCKET_TIMEOUT_MS", "socketTimeoutMS"),
+            ("MONGO_ZLIB_LEVEL", "zlibCompressionLevel"),
+    ):
+        value = _int_env(env_name)
+        if value is not None:
+            options[option] = value
+
+    compressors = available_compressors(os.getenv("MONGO_COMPRESSORS", ""))
+    if compressors:
+        options["compressors"] = compressors
+
+    write_concern = build_write_concern()
+    if write_concern is not None:
+        document = write_concern.document
+        if "w" in document:
+            options["w"] = document["w"]
+        if "j" in document:
+            options["journal"] = document["j"]
+        if "wtimeout" in document:
+            options["wTimeoutMS"] = document["wtimeout"]
+
+    read_preference = os.getenv("MONGO_READ_PREFERENCE", "").strip()
+    if read_preference:
+        options["readPreference"] = read_preference
+    return options
+
+
 def get_client() -> MongoClient:
     global _client
     if _client is None:
         uri = _require_env("MONGO_URI")
-        appname = os.getenv("APP_NAME", "trend-app")
-        # Optional: a couple of sane defaults
-        _client = MongoClient(
-            uri,
-            appname=appname,
-            serverSelectionTimeoutMS=8000,  # fail faster if unreachable
-        )
+        _client = MongoClient(uri, **client_options_from_env())
     return _client
 
 
@@ -49,3 +133,48 @@ def get_db():
         db_name = _require_env("MONGODB_DB")
         _db = get_client()[db_name]
     return _db
+
+
+def get_async_client() -> AsyncMongoClient:
+    """
+    Process-wide asyncio client (PyMongo's native async API) with the same
+    options as get_client. Shared by every Async*Repository.
+    """
+    global _async_client
+    if _async_client is None:
+        uri = _require_env("MONGO_URI")
+        _async_client = AsyncMongoClient(uri, **client_options_from_env())
+    return _async_client
+
+
+def get_async_db():
+    global _async_db
+    if _async_db is None:
+        db_name = _require_env("MONGODB_DB")
+        _async_db = get_async_client()[db_name]
+    return _async_db
+
+
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+def get_analytics_db():
+    """
+    Same database with MONGO_ANALYTICS_READ_PREFERENCE (default secondaryPreferred),
+    for exports and aggregations that should not load the primary.
+    """
+    global _analytics_db
+    if _analytics_db is None:
+        mode = os.getenv("MONGO_ANALYTICS_READ_PREFERENCE", "secondaryPreferred").strip()
+        read_preference = _READ_PREFERENCES.get(mode)
+        if read_preference is None:
+            print(f"⚠️ Unknown MONGO_ANALYTICS_READ_PREFERENCE '{mode}', using secondaryPreferred")
+            read_preference = ReadPreference.SECONDARY_PREFERRED
+        _analytics_db = get_db().with_options(read_preference=read_preference)
+    return _analytics_db
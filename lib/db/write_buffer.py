@@ -0,0 +1,252 @@
+# lib/db/write_buffer.py
+"""
+Write-behind buffer for a MongoDB collection.
+
+Inserts and single-document updates are queued in memory and sent in batches:
+inserts with ``insert_many(ordered=False)`` and updates with one ``bulk_write``
+of ``UpdateOne`` operations. A batch is flushed when WRITE_BUFFER_MAX_OPS
+operations are queued or WRITE_BUFFER_MAX_DELAY seconds after the first queued
+operation, whichever comes first, and every open buffer is flushed at
+interpreter exit.
+
+``_id`` values are generated client-side, so ``insert`` returns the id right
+away. Callers that need the document to be on the server first (e.g. webhooks
+that read it back) should use ``on_flush``, which receives the ids of the
+documents that were actually written.
+
+``companion=(collection, build)`` writes ``build(doc)`` documents into a second
+collection together with every buffered insert (e.g. webhook outbox events).
+On a replica set or sharded cluster both insert_many calls of a flush run in
+one transaction, so either the documents and their companions are all stored
+or none are. A standalone mongod has no transactions: there the companions are
+inserted right after, for the documents that were stored.
+"""
+import atexit
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+WRITE_BUFFER_MAX_OPS = int(os.getenv("WRITE_BUFFER_MAX_OPS", 500))
+WRITE_BUFFER_MAX_DELAY = float(os.getenv("WRITE_BUFFER_MAX_DELAY", 2.0))
+
+_open_buffers: "weakref.WeakSet[BulkWriteBuffer]" = weakref.WeakSet()
+
+_TRANSACTIONAL_TOPOLOGIES = {"ReplicaSetWithPrimary", "Sharded", "LoadBalanced"}
+
+Companion = Tuple[Collection, Callable[[Dict[str, Any]], List[Dict[str, Any]]]]
+
+
+def supports_transactions(collection: Collection) -> bool:
+    client = collection.database.client
+    if client.topology_description.topology_type_name == "Unknown":
+        # Nothing was sent yet; one ping discovers the deployment type.
+        client.admin.command("ping")
+    return client.topology_description.topology_type_name in _TRANSACTIONAL_TOPOLOGIES
+
+
+class BulkWriteBuffer:
+    """Batches insert_one/update_one calls against one collection."""
+
+    def __init__(
+            self,
+            collection: Collection,
+            max_ops: int = WRITE_BUFFER_MAX_OPS,
+            max_delay: float = WRITE_BUFFER_MAX_DELAY,
+            on_flush: Optional[Callable[[List[str]], None]] = None,
+            companion: Optional[Companion] = None,
+    ) -> None:
+        self.collection = collection
+        self.max_ops = max(1, max_ops)
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self.companion = companion
+        self._transactional: Optional[bool] = None
+        self.flushes = 0
+        self.inserted = 0
+        self.modified = 0
+        self.errors = 0
+        self._inserts: List[Dict[str, Any]] = []
+        self._updates: List[UpdateOne] = []
+        self._first_queued_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # Serialises flushes so on_flush sees batches in queue order.
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        if self.max_delay > 0:
+            self._timer = threading.Thread(target=self._timer_loop, name=f"write-buffer-{collection.name}",
+                                           daemon=True)
+            self._timer.start()
+        _open_buffers.add(self)
+
+    def __enter__(self) -> "BulkWriteBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._inserts) + len(self._updates)
+
+    # --- Queueing ---
+    def insert(self, doc: Dict[str, Any]) -> str:
+        """Queue an insert and return its (client-generated) id."""
+        doc.setdefault("_id", ObjectId())
+        with self._lock:
+            self._inserts.append(doc)
+            full = self._queued()
+        if full:
+            self.flush()
+        return str(doc["_id"])
+
+    def update_one(self, selector: Dict[str, Any], update_data: Dict[str, Any], *, upsert: bool = False) -> None:
+        with self._lock:
+            self._updates.append(UpdateOne(selector, update_data, upsert=upsert))
+            full = self._queued()
+        if full:
+            self.flush()
+
+    def _queued(self) -> bool:
+        """Call with self._lock held; returns True when the batch is full."""
+        if self._first_queued_at is None:
+            self._first_queued_at = time.monotonic()
+        return len(self._inserts) + len(self._updates) >= self.max_ops
+
+    # --- Flushing ---
+    def flush(self) -> Dict[str, int]:
+        """Write everything queued so far; returns counts for this flush."""
+        with self._flush_lock:
+            with self._lock:
+                inserts, self._inserts = self._inserts, []
+                updates, self._updates = self._updates, []
+                self._first_queued_at = None
+            if not inserts and not updates:
+                return {"inserted": 0, "modified": 0, "errors": 0}
+
+            inserted_ids: List[str] = []
+            modified = 0
+            errors = 0
+            if inserts:
+                if self.companion is not None and self._use_transaction():
+                    inserted_ids, failed_count = self._insert_in_transaction(inserts)
+                else:
+                    inserted_ids, failed_count = self._insert(inserts)
+                    if self.companion is not None and inserted_ids:
+                        stored = set(inserted_ids)
+                        self._insert_companions([doc for doc in inserts if str(doc["_id"]) in stored])
+                errors += failed_count
+            if updates:
+                try:
+                    result = self.collection.bulk_write(updates, ordered=False)
+                    modified = result.modified_count + result.upserted_count
+                except BulkWriteError as e:
+                    failed = len(e.details.get("writeErrors", []))
+                    modified = e.details.get("nModified", 0) + e.details.get("nUpserted", 0)
+                    errors += failed
+                    print(f"⚠️ {self.collection.name}: {failed} of {len(updates)} buffered updates failed: "
+                          f"{e.details.get('writeErrors', [])[:3]}")
+                except Exception as e:
+                    errors += len(updates)
+                    print(f"❌ {self.collection.name}: buffered bulk update of {len(updates)} operations failed: {e}")
+
+            self.flushes += 1
+            self.inserted += len(inserted_ids)
+            self.modified += modified
+            self.errors += errors
+            if inserted_ids and self.on_flush is not None:
+                try:
+                    self.on_flush(inserted_ids)
+                except Exception as e:
+                    print(f"⚠️ {self.collection.name}: on_flush callback failed: {e}")
+            return {"inserted": len(inserted_ids), "modified": modified, "errors": errors}
+
+    def _insert(self, inserts: List[Dict[str, Any]]) -> Tuple[List[str], int]:
+        try:
+            self.collection.insert_many(inserts, ordered=False)
+            return [str(doc["_id"]) for doc in inserts], 0
+        except BulkWriteError as e:
+            failed = {err["index"] for err in e.details.get("writeErrors", [])}
+            print(f"⚠️ {self.collection.name}: {len(failed)} of {len(inserts)} buffered inserts failed: "
+                  f"{e.details.get('writeErrors', [])[:3]}")
+            return [str(doc["_id"]) for idx, doc in enumerate(inserts) if idx not in failed], len(failed)
+        except Exception as e:
+            print(f"❌ {self.collection.name}: buffered insert of {len(inserts)} documents failed: {e}")
+            return [], len(inserts)
+
+    def _use_transaction(self) -> bool:
+        if self._transactional is None:
+            try:
+                self._transactional = supports_transactions(self.collection)
+            except Exception as e:
+                print(f"⚠️ {self.collection.name}: could not detect transaction support ({e}); writing without")
+                return False
+        return self._transactional
+
+    def _insert_in_transaction(self, inserts: List[Dict[str, Any]]) -> Tuple[List[str], int]:
+        companion_collection, build = self.companion
+        related = [extra for doc in inserts for extra in build(doc)]
+
+        def write(session) -> None:
+            self.collection.insert_many(inserts, ordered=False, session=session)
+            if related:
+                companion_collection.insert_many(related, ordered=False, session=session)
+
+        try:
+            with self.collection.database.client.start_session() as session:
+                # with_transaction retries transient errors and unknown commit results.
+                session.with_transaction(write)
+            return [str(doc["_id"]) for doc in inserts], 0
+        except Exception as e:
+            # The transaction is all-or-nothing: no document of this batch was stored.
+            print(f"❌ {self.collection.name}: transactional insert of {len(inserts)} documents "
+                  f"(+{len(related)} in {companion_collection.name}) failed: {e}")
+            return [], len(inserts)
+
+    def _insert_companions(self, stored: List[Dict[str, Any]]) -> None:
+        companion_collection, build = self.companion
+        related = [extra for doc in stored for extra in build(doc)]
+        if not related:
+            return
+        try:
+            companion_collection.insert_many(related, ordered=False)
+        except Exception as e:
+            print(f"❌ {companion_collection.name}: insert of {len(related)} companion documents for "
+                  f"{self.collection.name} failed: {e}")
+
+    def _timer_loop(self) -> None:
+        while not self._closed.wait(min(self.max_delay, 0.5)):
+            with self._lock:
+                due = (self._first_queued_at is not None
+                       and time.monotonic() - self._first_queued_at >= self.max_delay)
+            if due:
+                self.flush()
+
+    def close(self) -> None:
+        """Stop the timer and flush what is left. Safe to call more than once."""
+        self._closed.set()
+        if self._timer is not None and self._timer is not threading.current_thread():
+            self._timer.join(timeout=5)
+        self.flush()
+        _open_buffers.discard(self)
+
+    def report(self) -> Dict[str, int]:
+        return {"flushes": self.flushes, "inserted": self.inserted, "modified": self.modified, "errors": self.errors}
+
+
+def flush_all_buffers() -> None:
+    for buffer in list(_open_buffers):
+        try:
+            buffer.close()
+        except Exception as e:
+            print(f"❌ Failed to flush write buffer for {buffer.collection.name}: {e}")
+
+
+atexit.register(flush_all_buffers)
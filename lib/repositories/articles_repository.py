@@ -1,17 +1,154 @@
 # lib/repositories/articles_repository.py
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from lib.db.indexes import QueryShape, ensure_collection_indexes
 from lib.db.mongo_client import get_db
+from lib.db.write_buffer import BulkWriteBuffer, Companion
+from pymongo import ASCENDING, UpdateOne
 from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from utils.validation import parse_sample_str
+
+_ID_ORDER = [("_id", ASCENDING)]
+
+
+# --- Query builders (shared with AsyncArticlesRepository and QUERY_SHAPES) ---
+
+def _samples_on_query(sample_date: str, sample_seq: Optional[int] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"sample_date": sample_date}
+    if sample_seq is not None:
+        query["sample_seq"] = sample_seq
+    return query
+
+
+def _samples_between_query(start_date: str, end_date: str) -> Dict[str, Any]:
+    return {"sample_date": {"$gte": start_date, "$lte": end_date}}
+
+
+def _undelivered_query(after_id: Optional[Any] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"delivered": False}
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    return query
+
+
+def _model_version_query(pipeline_version: Any, model_version: Optional[str],
+                         after_id: Optional[Any] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"pipeline_version": pipeline_version, "model_version": model_version}
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    return query
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("ArticlesRepository.get_samples_on", "articles", _samples_on_query("2025-01-01"), None),
+    ("ArticlesRepository.get_samples_on(batch)", "articles", _samples_on_query("2025-01-01", 3), None),
+    ("ArticlesRepository.get_samples_between", "articles", _samples_between_query("2025-01-01", "2025-01-31"), None),
+    ("ArticlesRepository.find_undelivered", "articles", _undelivered_query(), _ID_ORDER),
+    ("ArticlesRepository.iter_model_version_batches", "articles", _model_version_query(1, "000000000000"), _ID_ORDER),
+]
 
 
 class ArticlesRepository:
     def __init__(self) -> None:
         self.collection: Collection = get_db()["articles"]
+        self._buffer: Optional[BulkWriteBuffer] = None
 
     def create_articles(self, data: Dict[str, Any]) -> str:
         result = self.collection.insert_one(data)
         return str(result.inserted_id)
 
+    # --- Bulk / buffered writes ---
+    def create_articles_many(self, docs: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insert several articles in one round trip (unordered, so one bad document
+        does not stop the rest). Returns the ids that were written.
+        """
+        if not docs:
+            return []
+        try:
+            result = self.collection.insert_many(docs, ordered=False)
+            return [str(_id) for _id in result.inserted_ids]
+        except BulkWriteError as e:
+            failed = {err["index"] for err in e.details.get("writeErrors", [])}
+            return [str(doc["_id"]) for idx, doc in enumerate(docs) if idx not in failed and "_id" in doc]
+
+    def write_buffer(self, on_flush: Optional[Callable[[List[str]], None]] = None,
+                     companion: Optional[Companion] = None, **kwargs) -> BulkWriteBuffer:
+        """
+        Start (or return) the write-behind buffer used by create_articles_buffered.
+        ``companion`` = (collection, build) stores build(article) documents with each
+        article, in the same transaction where the deployment supports it.
+        """
+        if self._buffer is None:
+            self._buffer = BulkWriteBuffer(self.collection, on_flush=on_flush, companion=companion, **kwargs)
+        else:
+            if on_flush is not None:
+                self._buffer.on_flush = on_flush
+            if companion is not None:
+                self._buffer.companion = companion
+        return self._buffer
+
+    def create_articles_buffered(self, data: Dict[str, Any]) -> str:
+        """Queue an insert; the id is returned immediately, the write happens on flush."""
+        return self.write_buffer().insert(data)
+
+    def flush_writes(self) -> Dict[str, int]:
+        return self._buffer.flush() if self._buffer is not None else {"inserted": 0, "modified": 0, "errors": 0}
+
+    # --- Webhook delivery state ---
+    def find_undelivered(self, limit: int = 100, after_id: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Oldest articles whose webhooks were not sent yet (served by the partial 'undelivered' index)."""
+        return list(self.collection.find(_undelivered_query(after_id), {"_id": 1}).sort(_ID_ORDER).limit(limit))
+
+    def mark_delivered(self, article_ids: List[Any], delivered_at) -> int:
+        if not article_ids:
+            return 0
+        result = self.collection.update_many(
+            {"_id": {"$in": article_ids}, "delivered": False},
+            {"$set": {"delivered": True, "delivered_at": delivered_at}},
+        )
+        return result.modified_count
+
+    # --- Model versions (ingest/reclassify.py) ---
+    def model_version_groups(self) -> List[Dict[str, Any]]:
+        """
+        Distinct (pipeline_version, model_version) pairs with the first _id of
+        each, read from the 'pipeline_model_version' index (DISTINCT_SCAN).
+        Articles stored before versions existed form the (None, None) group.
+        """
+        pipeline = [
+            {"$sort": {"pipeline_version": 1, "model_version": 1, "_id": 1}},
+            {"$group": {"_id": {"pipeline_version": "$pipeline_version", "model_version": "$model_version"},
+                        "first_id": {"$first": "$_id"}}},
+        ]
+        return [{"pipeline_version": row["_id"].get("pipeline_version"),
+                 "model_version": row["_id"].get("model_version"), "first_id": row["first_id"]}
+                for row in self.collection.aggregate(pipeline, hint="pipeline_model_version")]
+
+    def iter_model_version_batches(self, pipeline_version: Any, model_version: Optional[str], after_id: Optional[Any],
+                                   projection: Dict[str, int], batch_size: int) -> Iterable[List[Dict[str, Any]]]:
+        """Articles of one version group in _id order, after ``after_id``, as lists of ``batch_size``."""
+        cursor = (self.collection.find(_model_version_query(pipeline_version, model_version, after_id), projection,
+                                       batch_size=batch_size)
+                  .sort(_ID_ORDER).hint("pipeline_model_version"))
+        batch: List[Dict[str, Any]] = []
+        try:
+            for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            cursor.close()
+
+    def bulk_update_articles(self, ops: List[UpdateOne]) -> int:
+        if not ops:
+            return 0
+        return self.collection.bulk_write(ops, ordered=False).modified_count
+
     def aggregate_articles(self, pipeline: List[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
         """
         Perform aggregation on the articles collection.
@@ -24,9 +161,18 @@ class ArticlesRepository:
         return self.collection.find(params, projection) if projection else self.collection.find(params)
 
     def get_distinct_samples(self, sample_str: str) -> List[str]:
-        # case-insensitive suffix match for -YYYY-MM-DD
-        regex_filter = {"sample": {"$regex": sample_str, "$options": "i"}}
-        return list(self.collection.distinct("sample", regex_filter))
+        """
+        Samples matching ``sample_str``: "3-2025-09-17" is batch 3 of that day,
+        "-2025-09-17" every sample of it. Served by the sample_date/sample_seq index.
+        """
+        return self.get_samples_on(*parse_sample_str(sample_str))
+
+    def get_samples_on(self, sample_date: str, sample_seq: Optional[int] = None) -> List[str]:
+        return list(self.collection.distinct("sample", _samples_on_query(sample_date, sample_seq)))
+
+    def get_samples_between(self, start_date: str, end_date: str) -> List[str]:
+        """Distinct samples with sample_date in [start_date, end_date] (inclusive, YYYY-MM-DD)."""
+        return list(self.collection.distinct("sample", _samples_between_query(start_date, end_date)))
 
     def get_one_article(self, params: Dict[str, Any], sorting: Optional[List[Tuple[str, int]]] = None):
         return self.collection.find_one(params, sort=sorting) if sorting else self.collection.find_one(params)
@@ -35,6 +181,10 @@ class ArticlesRepository:
         result = self.collection.update_one(selector, update_data)
         return result.modified_count
 
+    def update_articles_many(self, selector: Dict[str, Any], update_data: Dict[str, Any]) -> int:
+        result = self.collection.update_many(selector, update_data)
+        return result.modified_count
+
     def delete_articles(self, selector: Dict[str, Any]) -> int:
         result = self.collection.delete_many(selector)
         return result.deleted_count
@@ -43,8 +193,9 @@ class ArticlesRepository:
         return self.collection.count_documents(params)
 
     def setup_indexes(self) -> None:
-        name = self.collection.create_index([("isCleaned", 1), ("sample", 1)])
-        print(f"✅ Compound index '{name}' created on 'isCleaned + sample'")
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
 
     def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
         """
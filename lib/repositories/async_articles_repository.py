@@ -0,0 +1,70 @@
+# lib/repositories/async_articles_repository.py
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from lib.db.indexes import ensure_collection_indexes
+from lib.db.mongo_client import get_async_db, get_db
+from lib.repositories.articles_repository import _samples_between_query, _samples_on_query
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError
+from utils.validation import parse_sample_str
+
+
+class AsyncArticlesRepository:
+    """asyncio counterpart of ArticlesRepository (same methods, awaitable)."""
+
+    def __init__(self) -> None:
+        self.collection: AsyncCollection = get_async_db()["articles"]
+
+    async def create_articles(self, data: Dict[str, Any]) -> str:
+        result = await self.collection.insert_one(data)
+        return str(result.inserted_id)
+
+    async def create_articles_many(self, docs: List[Dict[str, Any]]) -> List[str]:
+        """Unordered insert_many; returns the ids that were written."""
+        if not docs:
+            return []
+        try:
+            result = await self.collection.insert_many(docs, ordered=False)
+            return [str(_id) for _id in result.inserted_ids]
+        except BulkWriteError as e:
+            failed = {err["index"] for err in e.details.get("writeErrors", [])}
+            return [str(doc["_id"]) for idx, doc in enumerate(docs) if idx not in failed and "_id" in doc]
+
+    async def aggregate_articles(self, pipeline: List[Dict[str, Any]]):
+        """Returns an async command cursor (``async for doc in cursor``)."""
+        return await self.collection.aggregate(pipeline)
+
+    def get_articles(self, params: Dict[str, Any], projection: Optional[Dict[str, int]] = None):
+        """Returns an async cursor (``async for doc in cursor`` / ``await cursor.to_list()``)."""
+        return self.collection.find(params, projection) if projection else self.collection.find(params)
+
+    async def get_distinct_samples(self, sample_str: str) -> List[str]:
+        return await self.get_samples_on(*parse_sample_str(sample_str))
+
+    async def get_samples_on(self, sample_date: str, sample_seq: Optional[int] = None) -> List[str]:
+        return list(await self.collection.distinct("sample", _samples_on_query(sample_date, sample_seq)))
+
+    async def get_samples_between(self, start_date: str, end_date: str) -> List[str]:
+        return list(await self.collection.distinct("sample", _samples_between_query(start_date, end_date)))
+
+    async def get_one_article(self, params: Dict[str, Any], sorting: Optional[List[Tuple[str, int]]] = None):
+        return await (self.collection.find_one(params, sort=sorting) if sorting else self.collection.find_one(params))
+
+    async def update_articles(self, selector: Dict[str, Any], update_data: Dict[str, Any]) -> int:
+        result = await self.collection.update_one(selector, update_data)
+        return result.modified_count
+
+    async def delete_articles(self, selector: Dict[str, Any]) -> int:
+        result = await self.collection.delete_many(selector)
+        return result.deleted_count
+
+    async def count_articles(self, params: Dict[str, Any]) -> int:
+        return await self.collection.count_documents(params)
+
+    async def setup_indexes(self) -> None:
+        # Index DDL is rare; reuse the synchronous reconciliation off the event loop.
+        report = await asyncio.to_thread(ensure_collection_indexes, get_db(), self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
+
+    async def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
+        return await self.collection.create_index(keys, **kwargs)
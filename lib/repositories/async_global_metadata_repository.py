@@ -0,0 +1,55 @@
+# lib/repositories/async_global_metadata_repository.py
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from lib.db.indexes import ensure_collection_indexes
+from lib.db.mongo_client import get_async_db, get_db
+from pymongo.asynchronous.collection import AsyncCollection
+
+
+class AsyncGlobalMetadataRepository:
+    """asyncio counterpart of GlobalMetadataRepository (same methods, awaitable)."""
+
+    def __init__(self) -> None:
+        self.collection: AsyncCollection = get_async_db()["global_metadata"]
+
+    async def insert_metadata(self, data: Dict[str, Any]) -> str:
+        result = await self.collection.insert_one(data)
+        return str(result.inserted_id)
+
+    def get_metadata(self, param: Dict[str, Any], sorting: Optional[List[Tuple[str, int]]] = None):
+        """Returns an async cursor."""
+        return self.collection.find(param, sort=sorting) if sorting else self.collection.find(param)
+
+    async def get_one_metadata(self, param: Dict[str, Any], sorting: Optional[List[Tuple[str, int]]] = None):
+        return await (self.collection.find_one(param, sort=sorting) if sorting else self.collection.find_one(param))
+
+    def get_metadata_broad(self, filter_param: Dict[str, Any], projection_param: Optional[Dict[str, int]] = None):
+        return self.collection.find(filter_param, projection=projection_param)
+
+    async def setup_indexes(self) -> None:
+        report = await asyncio.to_thread(ensure_collection_indexes, get_db(), self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
+
+    async def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
+        return await self.collection.create_index(keys, **kwargs)
+
+    async def update_metadata(self, selector: Dict[str, Any], update_data: Dict[str, Any]):
+        return await self.collection.update_one(selector, update_data)
+
+    async def increment_counters(self, selector: Dict[str, Any], increments: Dict[str, int],
+                                 array_filters: Optional[List[Dict[str, Any]]] = None):
+        return await self.collection.update_one(selector, {"$inc": increments}, array_filters=array_filters)
+
+    async def update_metadata_upsert(self, selector: Dict[str, Any], update_data: Dict[str, Any]):
+        return await self.collection.update_one(selector, update_data, upsert=True)
+
+    async def delete_metadata_many(self, selector: Dict[str, Any]) -> int:
+        result = await self.collection.delete_many(selector)
+        return result.deleted_count
+
+    async def delete_metadata_one(self, selector: Dict[str, Any]) -> int:
+        result = await self.collection.delete_one(selector)
+        return result.deleted_count
+
+    async def count_all_documents(self) -> int:
+        return await self.collection.count_documents({})
@@ -0,0 +1,102 @@
+# lib/repositories/async_link_pool_repository.py
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from lib.db.indexes import ensure_collection_indexes
+from lib.db.mongo_client import get_async_db, get_db
+from lib.repositories.link_pool_repository import _url_query
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+
+
+class AsyncLinkPoolRepository:
+    """asyncio counterpart of LinkPoolRepository (same methods, awaitable)."""
+
+    def __init__(self) -> None:
+        self.collection: AsyncCollection = get_async_db()["link_pool"]
+
+    # --- Creation / Upsert ---
+    async def insert_link(self, data: Dict[str, Any]) -> str:
+        result = await self.collection.insert_one(data)
+        return str(result.inserted_id)
+
+    async def update_link_in_pool(
+            self,
+            selector: Dict[str, Any],
+            update_data: Dict[str, Any],
+            *,
+            upsert: bool = False,
+    ) -> int:
+        result = await self.collection.update_one(selector, update_data, upsert=upsert)
+        return result.modified_count
+
+    async def bulk_update_links(
+            self,
+            operations: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+            *,
+            upsert: bool = False,
+    ) -> int:
+        if not operations:
+            return 0
+        result = await self.collection.bulk_write(
+            [UpdateOne(selector, update_data, upsert=upsert) for selector, update_data in operations],
+            ordered=False,
+        )
+        return result.modified_count + result.upserted_count
+
+    async def upsert_link(self, url: str, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        extra = extra or {}
+        return await self.collection.find_one_and_update(
+            _url_query(url),
+            {"$setOnInsert": {"url": url}, "$set": extra},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    # --- Queries ---
+    def get_link(self, params: Dict[str, Any]):
+        """Returns an async cursor."""
+        return self.collection.find(params)
+
+    async def find_link(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(params)
+
+    async def find_one_by_url(self, url: str, *, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(_url_query(url), projection=projection)
+
+    # --- Convenience gates for the use-case ---
+    async def ensure_tracked(self, url: str) -> Dict[str, Any]:
+        return await self.upsert_link(url)
+
+    async def is_link_successfully_processed(self, url: str) -> bool:
+        doc = await self.collection.find_one(_url_query(url), projection={"is_articles_processed": 1, "in_sample": 1})
+        return bool(doc and (doc.get("is_articles_processed") or doc.get("in_sample")))
+
+    async def is_processed(self, url: str) -> bool:
+        return await self.is_link_successfully_processed(url)
+
+    async def mark_processed(self, url: str, sample_id: str) -> int:
+        res = await self.collection.update_one(
+            _url_query(url),
+            {"$set": {"is_articles_processed": True, "in_sample": sample_id}},
+            upsert=True,
+        )
+        return res.modified_count
+
+    # --- Admin / maintenance ---
+    async def setup_indexes(self) -> None:
+        report = await asyncio.to_thread(ensure_collection_indexes, get_db(), self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
+
+    async def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
+        return await self.collection.create_index(keys, **kwargs)
+
+    async def delete_link(self, selector: Dict[str, Any]) -> int:
+        result = await self.collection.delete_one(selector)
+        return result.deleted_count
+
+    async def delete_links(self, selector: Dict[str, Any]) -> int:
+        result = await self.collection.delete_many(selector)
+        return result.deleted_count
+
+    async def count(self, params: Dict[str, Any]) -> int:
+        return await self.collection.count_documents(params)
@@ -0,0 +1,35 @@
+# lib/repositories/checkpoint_repository.py
+from datetime import datetime, timezone
+from typing import Any, Dict
+from lib.db.mongo_client import get_db
+from pymongo.collection import Collection
+
+# Where checkpoints were kept before this collection existed; read once per consumer and copied over.
+_LEGACY_COLLECTION = "dispatcher_state"
+
+
+class CheckpointRepository:
+    """
+    Progress of resumable batch consumers (trends_materializer watermark,
+    reclassify last _ids), one document per consumer (``_id`` = consumer name).
+    """
+
+    def __init__(self) -> None:
+        self.collection: Collection = get_db()["consumer_checkpoints"]
+
+    def get_state(self, consumer: str) -> Dict[str, Any]:
+        doc = self.collection.find_one({"_id": consumer})
+        if doc is None:
+            # Losing a watermark would make the trends materializer count every article again.
+            doc = self.collection.database[_LEGACY_COLLECTION].find_one({"_id": consumer})
+            if doc is not None:
+                fields = {k: v for k, v in doc.items() if k != "_id"}
+                self.collection.update_one({"_id": consumer}, {"$setOnInsert": fields}, upsert=True)
+        return doc or {}
+
+    def save_state(self, consumer: str, fields: Dict[str, Any]) -> None:
+        self.collection.update_one(
+            {"_id": consumer},
+            {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
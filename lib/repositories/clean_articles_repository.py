@@ -1,5 +1,6 @@
 # lib/repositories/clean_articles_repository.py
 from typing import Any, Dict, Iterable, List, Optional, Tuple
+from lib.db.indexes import ensure_collection_indexes
 from lib.db.mongo_client import get_db
 from pymongo.collection import Collection
 
@@ -33,8 +34,9 @@ class CleanArticlesRepository:
         return self.collection.count_documents(params)
 
     def setup_indexes(self) -> None:
-        name = self.collection.create_index([("isCleaned", 1), ("sample", 1)])
-        print(f"✅ Compound index '{name}' created on 'isCleaned + sample'")
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
 
     def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
         """
@@ -1,8 +1,28 @@
 # lib/repositories/daily_trends_repository.py
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, List, Optional
+from lib.db.indexes import QueryShape, ensure_collection_indexes
 from lib.db.mongo_client import get_db
+from pymongo import ASCENDING
 from pymongo.collection import Collection
 
+_DATE_ORDER = [("date", ASCENDING)]
+
+
+def _trends_between_query(start_date: str, end_date: str, topic: Optional[str] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"date": {"$gte": start_date, "$lte": end_date}}
+    if topic:
+        query["topic"] = topic
+    return query
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("DailyTrendsRepository.get_trends_between", "daily_trends", _trends_between_query("2025-01-01", "2025-01-31"),
+     _DATE_ORDER),
+    ("DailyTrendsRepository.get_trends_between(topic)", "daily_trends",
+     _trends_between_query("2025-01-01", "2025-01-31", "politics and government"), _DATE_ORDER),
+]
+
 
 class DailyTrendsRepository:
     def __init__(self) -> None:
@@ -30,9 +50,21 @@ class DailyTrendsRepository:
         result = self.collection.update_one(selector, update_data)
         return result.modified_count
 
+    def get_trends_between(self, start_date: str, end_date: str, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Materialized per-day/topic/source rows (see ingest/trends_materializer.py)."""
+        return list(self.collection.find(_trends_between_query(start_date, end_date, topic), sort=_DATE_ORDER))
+
+    def delete_materialized(self) -> int:
+        return self.collection.delete_many({"kind": "topic_source"}).deleted_count
+
     def upsert_daily(self, selector: Dict[str, Any], doc: Dict[str, Any]) -> None:
         self.collection.update_one(selector, {"$set": doc}, upsert=True)
 
+    def setup_indexes(self) -> None:
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
+
     def create_index(self, keys: Iterable[tuple], **kwargs) -> str:
         """
         Create an index on the daily_trends collection.
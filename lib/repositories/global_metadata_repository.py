@@ -1,5 +1,6 @@
 # lib/repositories/global_metadata_repository.py
 from typing import Any, Dict, Iterable, List, Optional, Tuple
+from lib.db.indexes import ensure_collection_indexes
 from lib.db.mongo_client import get_db
 from pymongo.collection import Collection
 
@@ -22,8 +23,9 @@ class GlobalMetadataRepository:
         return self.collection.find(filter_param, projection=projection_param)
 
     def setup_indexes(self) -> None:
-        name = self.collection.create_index("is_articles_processed")
-        print(f"✅ Index '{name}' created successfully on 'is_articles_processed'")
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
 
     def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
         """
@@ -37,6 +39,11 @@ class GlobalMetadataRepository:
     def update_metadata(self, selector: Dict[str, Any], update_data: Dict[str, Any]):
         return self.collection.update_one(selector, update_data)
 
+    def increment_counters(self, selector: Dict[str, Any], increments: Dict[str, int],
+                           array_filters: Optional[List[Dict[str, Any]]] = None):
+        """Apply several $inc counters (optionally on array elements) in one update."""
+        return self.collection.update_one(selector, {"$inc": increments}, array_filters=array_filters)
+
     def update_metadata_upsert(self, selector: Dict[str, Any], update_data: Dict[str, Any]):
         return self.collection.update_one(selector, update_data, upsert=True)
 
@@ -1,13 +1,26 @@
 # lib/repositories/link_pool_repository.py
 from typing import Any, Dict, Optional, List, Tuple
+from lib.db.indexes import QueryShape, ensure_collection_indexes
 from lib.db.mongo_client import get_db
+from lib.db.write_buffer import BulkWriteBuffer
 from pymongo.collection import Collection
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
+
+
+def _url_query(url: str) -> Dict[str, Any]:
+    return {"url": url}
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("LinkPoolRepository.find_one_by_url", "link_pool", _url_query("https://example.com/a"), None),
+]
 
 
 class LinkPoolRepository:
     def __init__(self) -> None:
         self.collection: Collection = get_db()["link_pool"]
+        self._buffer: Optional[BulkWriteBuffer] = None
 
     # --- Creation / Upsert ---
     def insert_link(self, data: Dict[str, Any]) -> str:
@@ -25,11 +38,46 @@ class LinkPoolRepository:
         result = self.collection.update_one(selector, update_data, upsert=upsert)
         return result.modified_count
 
+    # --- Bulk / buffered writes ---
+    def bulk_update_links(
+            self,
+            operations: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+            *,
+            upsert: bool = False,
+    ) -> int:
+        """Apply (selector, update) pairs with one unordered bulk_write; returns modified + upserted."""
+        if not operations:
+            return 0
+        result = self.collection.bulk_write(
+            [UpdateOne(selector, update_data, upsert=upsert) for selector, update_data in operations],
+            ordered=False,
+        )
+        return result.modified_count + result.upserted_count
+
+    def write_buffer(self, **kwargs) -> BulkWriteBuffer:
+        """Start (or return) the write-behind buffer used by update_link_in_pool_buffered."""
+        if self._buffer is None:
+            self._buffer = BulkWriteBuffer(self.collection, **kwargs)
+        return self._buffer
+
+    def update_link_in_pool_buffered(
+            self,
+            selector: Dict[str, Any],
+            update_data: Dict[str, Any],
+            *,
+            upsert: bool = False,
+    ) -> None:
+        """Queue an update_one; it is sent with the next bulk_write flush."""
+        self.write_buffer().update_one(selector, update_data, upsert=upsert)
+
+    def flush_writes(self) -> Dict[str, int]:
+        return self._buffer.flush() if self._buffer is not None else {"inserted": 0, "modified": 0, "errors": 0}
+
     def upsert_link(self, url: str, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Ensure a link doc exists; returns the whole doc after upsert."""
         extra = extra or {}
         doc = self.collection.find_one_and_update(
-            {"url": url},
+            _url_query(url),
             {"$setOnInsert": {"url": url}, "$set": extra},
             upsert=True,
             return_document=ReturnDocument.AFTER,
@@ -46,7 +94,7 @@ class LinkPoolRepository:
         return self.collection.find_one(params)
 
     def find_one_by_url(self, url: str, *, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
-        return self.collection.find_one({"url": url}, projection=projection)
+        return self.collection.find_one(_url_query(url), projection=projection)
 
     # --- Convenience gates for the use-case ---
     def ensure_tracked(self, url: str) -> Dict[str, Any]:
@@ -55,7 +103,7 @@ class LinkPoolRepository:
 
     def is_link_successfully_processed(self, url: str) -> bool:
         """Kept for backward compatibility."""
-        doc = self.collection.find_one({"url": url}, projection={"is_articles_processed": 1, "in_sample": 1})
+        doc = self.collection.find_one(_url_query(url), projection={"is_articles_processed": 1, "in_sample": 1})
         return bool(doc and (doc.get("is_articles_processed") or doc.get("in_sample")))
 
     def is_processed(self, url: str) -> bool:
@@ -65,7 +113,7 @@ class LinkPoolRepository:
     def mark_processed(self, url: str, sample_id: str) -> int:
         """Idempotently mark a link as processed and attach sample."""
         res = self.collection.update_one(
-            {"url": url},
+            _url_query(url),
             {"$set": {"is_articles_processed": True, "in_sample": sample_id}},
             upsert=True,
         )
@@ -73,10 +121,9 @@ class LinkPoolRepository:
 
     # --- Admin / maintenance ---
     def setup_indexes(self) -> None:
-        # Unique URL to avoid duplicates
-        name_url = self.collection.create_index("url", unique=True)
-        name_proc = self.collection.create_index("is_articles_processed")
-        print(f"✅ Indexes created: {name_url} (unique on url), {name_proc} (processed flag)")
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
 
     def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
         """
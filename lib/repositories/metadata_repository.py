@@ -1,17 +1,52 @@
 # lib/repositories/metadata_repository.py
 from typing import Any, Dict, Iterable, List, Optional, Tuple
+from lib.db.indexes import QueryShape, ensure_collection_indexes
 from lib.db.mongo_client import get_db
+from pymongo import ASCENDING, ReturnDocument
 from pymongo.collection import Collection
 
+_SAMPLE_ORDER = [("sample_date", ASCENDING), ("sample_seq", ASCENDING)]
+
+
+def _samples_between_query(start_date: str, end_date: str) -> Dict[str, Any]:
+    return {"sample_date": {"$gte": start_date, "$lte": end_date}}
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("MetadataRepository.get_samples_between", "metadata", _samples_between_query("2025-01-01", "2025-01-31"),
+     _SAMPLE_ORDER),
+]
+
 
 class MetadataRepository:
     def __init__(self) -> None:
         self.collection: Collection = get_db()["metadata"]
+        # One counter document per sample_date ({_id: "YYYY-MM-DD", seq: n}).
+        self.sequences: Collection = get_db()["sample_sequences"]
 
     def insert_metadata(self, data: Dict[str, Any]) -> str:
         result = self.collection.insert_one(data)
         return str(result.inserted_id)
 
+    def next_sample_seq(self, sample_date: str) -> int:
+        """Atomically allocate the next sequence number (1, 2, ...) for a sample date."""
+        doc = self.sequences.find_one_and_update(
+            {"_id": sample_date},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return int(doc["seq"])
+
+    def raise_sample_seq(self, sample_date: str, seq: int) -> None:
+        """Make sure the counter for ``sample_date`` is at least ``seq`` (used by backfills)."""
+        self.sequences.update_one({"_id": sample_date}, {"$max": {"seq": seq}}, upsert=True)
+
+    def get_samples_between(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Runs whose sample_date is in [start_date, end_date], oldest first."""
+        return list(self.collection.find(_samples_between_query(start_date, end_date), sort=_SAMPLE_ORDER))
+
     def get_metadata(self, param: Dict[str, Any], sorting: Optional[List[Tuple[str, int]]] = None):
         return self.collection.find(param, sort=sorting) if sorting else self.collection.find(param)
 
@@ -22,8 +57,9 @@ class MetadataRepository:
         return self.collection.find(filter_param, projection=projection_param)
 
     def setup_indexes(self) -> None:
-        name = self.collection.create_index("is_articles_processed")
-        print(f"✅ Index '{name}' created successfully on 'is_articles_processed'")
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
 
     def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
         """
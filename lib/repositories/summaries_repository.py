@@ -1,24 +1,89 @@
 # lib/repositories/summaries_repository.py
 from typing import Any, Dict, Iterable, List, Optional, Tuple
+from lib.db.indexes import QueryShape, ensure_collection_indexes
 from lib.db.mongo_client import get_db
+from lib.repositories.metadata_repository import MetadataRepository
 from pymongo.collection import Collection
+from utils.validation import as_sample_date, parse_legacy_sample, parse_sample_str
+
+
+def _samples_on_query(sample_date: str, sample_seq: Optional[int] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"sample_date": sample_date}
+    if sample_seq is not None:
+        query["sample_seq"] = sample_seq
+    return query
+
+
+def _samples_between_query(start_date: str, end_date: str) -> Dict[str, Any]:
+    return {"sample_date": {"$gte": start_date, "$lte": end_date}}
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("SummariesRepository.get_samples_on", "summaries", _samples_on_query("2025-01-01"), None),
+    ("SummariesRepository.get_samples_on(batch)", "summaries", _samples_on_query("2025-01-01", 3), None),
+    ("SummariesRepository.get_samples_between", "summaries", _samples_between_query("2025-01-01", "2025-01-31"), None),
+]
 
 
 class SummariesRepository:
     def __init__(self) -> None:
         self.collection: Collection = get_db()["summaries"]
+        self._repo_metadata = MetadataRepository()
+        self._sample_dates: Dict[str, Tuple[str, int]] = {}
 
     def create_articles(self, data: Dict[str, Any]) -> str:
+        if data.get("sample") is not None and "sample_date" not in data:
+            resolved = self._sample_date_of(data["sample"], data.get("scraped_at"))
+            if resolved is not None:
+                data = {**data, "sample_date": resolved[0], "sample_seq": resolved[1]}
         result = self.collection.insert_one(data)
         return str(result.inserted_id)
 
+    def _sample_date_of(self, sample: Any, scraped_at: Any = None) -> Optional[Tuple[str, int]]:
+        """
+        (sample_date, sample_seq) of a sample, resolved like scripts/backfill_sample_dates.py:
+        the legacy "batch-YYYY-MM-DD" name, else its metadata document, else the
+        scraped_at of the first of its summaries stored here, with seq 0 (unknown).
+        None when none of these is known: sample_date stays unset and the backfill
+        picks the document up later.
+        """
+        key = str(sample)
+        if key in self._sample_dates:
+            return self._sample_dates[key]
+        legacy = parse_legacy_sample(key)
+        if legacy is not None:
+            resolved: Optional[Tuple[str, int]] = (legacy[1], legacy[0])
+        else:
+            meta = self._repo_metadata.get_one_metadata({"_id": sample}) or {}
+            if meta.get("sample_date"):
+                resolved = (meta["sample_date"], int(meta.get("sample_seq") or 0))
+            else:
+                # No index leads with "sample", so the backfill's lookup of the earliest
+                # scraped_at would scan the collection; the first summary stands in for it.
+                day = as_sample_date(scraped_at)
+                resolved = (day, 0) if day else None
+        if resolved is not None:
+            # Every later summary of the sample gets the same date, as with the backfill.
+            self._sample_dates[key] = resolved
+        return resolved
+
     def get_articles(self, params: Dict[str, Any], projection: Optional[Dict[str, int]] = None):
         return self.collection.find(params, projection) if projection else self.collection.find(params)
 
     def get_distinct_samples(self, sample_str: str) -> List[str]:
-        # case-insensitive suffix match for -YYYY-MM-DD
-        regex_filter = {"sample": {"$regex": sample_str, "$options": "i"}}
-        return list(self.collection.distinct("sample", regex_filter))
+        """
+        Samples matching ``sample_str``: "3-2025-09-17" is batch 3 of that day,
+        "-2025-09-17" every sample of it. Served by the sample_date/sample_seq index.
+        """
+        return self.get_samples_on(*parse_sample_str(sample_str))
+
+    def get_samples_on(self, sample_date: str, sample_seq: Optional[int] = None) -> List[str]:
+        return list(self.collection.distinct("sample", _samples_on_query(sample_date, sample_seq)))
+
+    def get_samples_between(self, start_date: str, end_date: str) -> List[str]:
+        """Distinct samples with sample_date in [start_date, end_date] (inclusive, YYYY-MM-DD)."""
+        return list(self.collection.distinct("sample", _samples_between_query(start_date, end_date)))
 
     def get_one_article(self, params: Dict[str, Any], sorting: Optional[List[Tuple[str, int]]] = None):
         return self.collection.find_one(params, sort=sorting) if sorting else self.collection.find_one(params)
@@ -35,5 +100,6 @@ class SummariesRepository:
         return self.collection.count_documents(params)
 
     def setup_indexes(self) -> None:
-        name = self.collection.create_index([("isCleaned", 1), ("sample", 1)])
-        print(f"✅ Compound index '{name}' created on 'isCleaned + sample'")
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
@@ -1,22 +1,117 @@
 # lib/repositories/trend_threads_repository.py
-from typing import Dict, Any, Iterable, List, Tuple
+import os
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from lib.db.indexes import QueryShape, ensure_collection_indexes
 from lib.db.mongo_client import get_db
+from pymongo import ASCENDING, UpdateOne
 from pymongo.collection import Collection
 
+# Entries kept per thread timeline (newest by date) and the summary fields copied into each.
+TREND_TIMELINE_MAX_ENTRIES = int(os.getenv("TREND_TIMELINE_MAX_ENTRIES", 90))
+TREND_TIMELINE_FIELDS = [f.strip() for f in os.getenv(
+    "TREND_TIMELINE_FIELDS", "title,summary,topic,score,article_count,sentiment").split(",") if f.strip()]
+
+_DATE_ORDER = [("date", ASCENDING)]
+
+
+def _threads_on_query(date_iso: str) -> Dict[str, Any]:
+    return {"date": date_iso}
+
+
+def _thread_since_query(thread_id: str, since_iso: str) -> Dict[str, Any]:
+    return {"thread_id": thread_id, "date": {"$gte": since_iso}}
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("TrendThreadsRepository.get_threads_on", "summaries", _threads_on_query("2025-01-01"), None),
+    ("TrendThreadsRepository.get_recent_for_thread", "summaries", _thread_since_query("thread", "2025-01-01"),
+     _DATE_ORDER),
+]
+
 
 class TrendThreadsRepository:
+    """
+    Daily thread summaries live in ``summaries``; each thread also has one
+    compact ``thread_timelines`` document ({_id: thread_id, last_date, entries:
+    [{date, ...}]}, entries sorted by date) maintained by ``upsert_today``, so a
+    thread's recent history is a single point read.
+    """
 
     def __init__(self) -> None:
         self.collection: Collection = get_db()["summaries"]
+        self.timelines: Collection = get_db()["thread_timelines"]
 
     def get_threads_on(self, date_iso: str) -> Iterable[Dict[str, Any]]:
-        return self.collection.find({"date": date_iso})
+        return self.collection.find(_threads_on_query(date_iso))
 
     def get_recent_for_thread(self, thread_id: str, since_iso: str) -> Iterable[Dict[str, Any]]:
-        return self.collection.find({"thread_id": thread_id, "date": {"$gte": since_iso}}).sort("date", 1)
+        timeline = self.timelines.find_one({"_id": thread_id}, {"entries": 1})
+        if timeline is None:
+            # Not materialized yet (see rebuild_timelines); read the summaries directly.
+            return self.collection.find(_thread_since_query(thread_id, since_iso)).sort(_DATE_ORDER)
+        return [e for e in timeline.get("entries", []) if e.get("date", "") >= since_iso]
+
+    def get_timelines(self, thread_ids: List[str], since_iso: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Timelines of many threads in one query: {thread_id: [entries...]} (missing threads map to [])."""
+        result: Dict[str, List[Dict[str, Any]]] = {thread_id: [] for thread_id in thread_ids}
+        for doc in self.timelines.find({"_id": {"$in": list(thread_ids)}}, {"entries": 1}):
+            entries = doc.get("entries", [])
+            if since_iso:
+                entries = [e for e in entries if e.get("date", "") >= since_iso]
+            result[doc["_id"]] = entries
+        return result
 
     def upsert_today(self, selector: Dict[str, Any], doc: Dict[str, Any]) -> None:
         self.collection.update_one(selector, {"$set": doc}, upsert=True)
+        thread_id = doc.get("thread_id", selector.get("thread_id"))
+        date_iso = doc.get("date", selector.get("date"))
+        if thread_id is not None and date_iso is not None:
+            self._update_timeline(thread_id, date_iso, doc)
+
+    def _timeline_entry(self, date_iso: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {"date": date_iso}
+        entry.update({field: doc[field] for field in TREND_TIMELINE_FIELDS if field in doc})
+        return entry
+
+    def _update_timeline(self, thread_id: str, date_iso: str, doc: Dict[str, Any]) -> None:
+        # $pull and $push cannot target the same array in one update: replace the
+        # day's entry with two ordered operations in a single bulk_write round trip.
+        self.timelines.bulk_write([
+            UpdateOne({"_id": thread_id}, {"$pull": {"entries": {"date": date_iso}}}),
+            UpdateOne(
+                {"_id": thread_id},
+                {
+                    "$push": {"entries": {
+                        "$each": [self._timeline_entry(date_iso, doc)],
+                        "$sort": {"date": 1},
+                        "$slice": -TREND_TIMELINE_MAX_ENTRIES,
+                    }},
+                    "$max": {"last_date": date_iso},
+                },
+                upsert=True,
+            ),
+        ], ordered=True)
+
+    def rebuild_timelines(self) -> int:
+        """Recreate every timeline from ``summaries`` (backfill / repair). Returns the number of threads."""
+        entry = {"date": "$date", **{field: f"${field}" for field in TREND_TIMELINE_FIELDS}}
+        pipeline = [
+            {"$match": {"thread_id": {"$ne": None}, "date": {"$ne": None}}},
+            {"$sort": {"thread_id": 1, "date": 1}},
+            {"$group": {"_id": "$thread_id", "entries": {"$push": entry}, "last_date": {"$max": "$date"}}},
+            {"$set": {"entries": {"$slice": ["$entries", -TREND_TIMELINE_MAX_ENTRIES]}}},
+            {"$merge": {"into": self.timelines.name, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ]
+        for _ in self.collection.aggregate(pipeline):
+            pass
+        return self.timelines.count_documents({})
+
+    def setup_indexes(self) -> None:
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        for collection in (self.collection, self.timelines):
+            report = ensure_collection_indexes(collection.database, collection.name)
+            print(f"✅ Indexes on '{collection.name}': {report}")
 
     def create_index(self, keys: List[Tuple[str, int]], **kwargs) -> str:
         """
@@ -0,0 +1,174 @@
+# lib/repositories/webhook_outbox_repository.py
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from lib.db.indexes import QueryShape, ensure_collection_indexes
+from lib.db.mongo_client import get_db
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+
+# Event states: pending -> in_flight -> delivered, or -> dead once the attempts run out.
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DELIVERED = "delivered"
+DEAD = "dead"
+
+_DUE_ORDER = [("next_attempt_at", ASCENDING)]
+
+
+def _due_query(target: str, now: datetime) -> Dict[str, Any]:
+    """Pending events, or in_flight ones whose lease (next_attempt_at) expired."""
+    return {"target": target, "status": {"$in": [PENDING, IN_FLIGHT]}, "next_attempt_at": {"$lte": now}}
+
+
+def _undelivered_events_query(article_ids: List[Any]) -> Dict[str, Any]:
+    return {"article_id": {"$in": article_ids}, "status": {"$ne": DELIVERED}}
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("WebhookOutboxRepository.claim_due", "webhook_outbox", _due_query("embedding", datetime(2025, 1, 1)), _DUE_ORDER),
+    ("WebhookOutboxRepository.undelivered_article_ids", "webhook_outbox", _undelivered_events_query(["x"]), None),
+]
+
+
+class WebhookOutboxRepository:
+    """
+    One document per (article, webhook target), stored with the article:
+
+        {_id, article_id, target, payload, status, attempts, next_attempt_at,
+         created_at, claimed_by, last_error, delivered_at, latency_ms}
+
+    ``next_attempt_at`` doubles as the lease expiry while an event is in_flight,
+    so events of a crashed worker become claimable again on their own.
+    """
+
+    def __init__(self) -> None:
+        self.collection: Collection = get_db()["webhook_outbox"]
+
+    @staticmethod
+    def new_event(article_id: Any, target: str, payload: Dict[str, Any], error: Optional[str] = None) -> Dict[str, Any]:
+        """Outbox document for one webhook call; an invalid payload goes straight to the dead letters."""
+        now = datetime.now(timezone.utc)
+        return {
+            "article_id": article_id,
+            "target": target,
+            "payload": payload,
+            "status": DEAD if error else PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "last_error": error,
+        }
+
+    def enqueue(self, events: List[Dict[str, Any]]) -> int:
+        if not events:
+            return 0
+        return len(self.collection.insert_many(events, ordered=False).inserted_ids)
+
+    def claim_due(self, target: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """
+        Lease up to ``limit`` due events of one target (pending, or in_flight with
+        an expired lease). Each claim counts as an attempt.
+        """
+        now = datetime.now(timezone.utc)
+        due = _due_query(target, now)
+        ids = [doc["_id"] for doc in self.collection.find(due, {"_id": 1}).sort(_DUE_ORDER).limit(limit)]
+        if not ids:
+            return []
+        claim = uuid.uuid4().hex
+        # The filter is re-checked by the update, so concurrent workers never claim the same event.
+        self.collection.update_many(
+            {**due, "_id": {"$in": ids}},
+            {"$set": {"status": IN_FLIGHT, "claimed_by": claim,
+                      "next_attempt_at": now + timedelta(seconds=lease_seconds)},
+             "$inc": {"attempts": 1}},
+        )
+        return list(self.collection.find({"_id": {"$in": ids}, "claimed_by": claim, "status": IN_FLIGHT}))
+
+    def mark_delivered(self, events: List[Dict[str, Any]], delivered_at: datetime) -> int:
+        if not events:
+            return 0
+        ops = [
+            UpdateOne(
+                {"_id": event["_id"], "claimed_by": event["claimed_by"]},
+                {"$set": {"status": DELIVERED, "delivered_at": delivered_at, "last_error": None,
+                          "latency_ms": event_latency_ms(event, delivered_at)},
+                 "$unset": {"claimed_by": ""}},
+            )
+            for event in events
+        ]
+        return self.collection.bulk_write(ops, ordered=False).modified_count
+
+    def mark_failed(self, events: List[Dict[str, Any]], error: str, retry_at: Dict[Any, Optional[datetime]]) -> int:
+        """Back to pending until ``retry_at[_id]``; events mapped to None become dead letters."""
+        if not events:
+            return 0
+        ops = []
+        for event in events:
+            next_at = retry_at.get(event["_id"])
+            fields: Dict[str, Any] = {"last_error": error[:500]}
+            if next_at is None:
+                fields.update({"status": DEAD, "dead_at": datetime.now(timezone.utc)})
+            else:
+                fields.update({"status": PENDING, "next_attempt_at": next_at})
+            ops.append(UpdateOne({"_id": event["_id"], "claimed_by": event["claimed_by"]},
+                                 {"$set": fields, "$unset": {"claimed_by": ""}}))
+        return self.collection.bulk_write(ops, ordered=False).modified_count
+
+    def undelivered_article_ids(self, article_ids: List[Any]) -> List[Any]:
+        """Which of these articles still have events that are not delivered."""
+        if not article_ids:
+            return []
+        return self.collection.distinct("article_id", _undelivered_events_query(article_ids))
+
+    def requeue_dead(self, target: Optional[str] = None) -> int:
+        """Give dead letters a fresh set of attempts (after fixing the receiver)."""
+        selector: Dict[str, Any] = {"status": DEAD}
+        if target:
+            selector["target"] = target
+        result = self.collection.update_many(
+            selector,
+            {"$set": {"status": PENDING, "attempts": 0, "next_attempt_at": datetime.now(timezone.utc)},
+             "$unset": {"dead_at": ""}},
+        )
+        return result.modified_count
+
+    def watch_inserts(self, max_await_time_ms: int = 1000):
+        """Change stream of new events, used only to wake the worker (requires a replica set)."""
+        pipeline = [{"$match": {"operationType": "insert"}}, {"$project": {"documentKey": 1}}]
+        return self.collection.watch(pipeline, max_await_time_ms=max_await_time_ms)
+
+    def stats(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Counts per target/status, with delivery latency of delivered events (since ``since``)."""
+        match: Dict[str, Any] = {}
+        if since is not None:
+            match = {"$or": [{"status": {"$ne": DELIVERED}}, {"delivered_at": {"$gte": since}}]}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"target": "$target", "status": "$status"},
+                "count": {"$sum": 1},
+                "avg_latency_ms": {"$avg": "$latency_ms"},
+                "max_latency_ms": {"$max": "$latency_ms"},
+                "max_attempts": {"$max": "$attempts"},
+            }},
+            {"$sort": {"_id.target": 1, "_id.status": 1}},
+        ]
+        return list(self.collection.aggregate(pipeline))
+
+    def setup_indexes(self) -> None:
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
+
+
+def event_latency_ms(event: Dict[str, Any], delivered_at: datetime) -> Optional[float]:
+    """Time from the event being stored (with its article) to delivery."""
+    created_at = event.get("created_at")
+    if created_at is None:
+        return None
+    if created_at.tzinfo is None:
+        # PyMongo returns naive UTC datetimes unless the client is tz_aware.
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return round((delivered_at - created_at).total_seconds() * 1000, 1)
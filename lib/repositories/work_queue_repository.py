@@ -0,0 +1,217 @@
+# lib/repositories/work_queue_repository.py
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Optional
+from lib.db.indexes import QueryShape, ensure_collection_indexes
+from lib.db.mongo_client import get_db
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.collection import Collection
+
+# Stage states, in order. An item that keeps failing ends in FAILED.
+DISCOVERED = "discovered"
+FETCHED = "fetched"
+CLASSIFIED = "classified"
+DELIVERED = "delivered"
+FAILED = "failed"
+# Boilerplate pages dropped by the classifier; nothing to deliver.
+SKIPPED = "skipped"
+STATES = (DISCOVERED, FETCHED, CLASSIFIED, DELIVERED, FAILED, SKIPPED)
+
+_CLAIM_ORDER = [("updated_at", ASCENDING)]
+
+
+def _claimable_query(state: str, now: datetime) -> Dict[str, Any]:
+    """Items of ``state`` that nobody holds a live lease on."""
+    return {"state": state, "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]}
+
+
+def _classified_query(article_ids: List[Any]) -> Dict[str, Any]:
+    return {"article_id": {"$in": article_ids}, "state": CLASSIFIED}
+
+
+# Checked by `python -m lib.db.indexes --verify`.
+QUERY_SHAPES: List[QueryShape] = [
+    ("WorkQueueRepository.claim", "work_queue", _claimable_query(FETCHED, datetime(2025, 1, 1)), _CLAIM_ORDER),
+    ("WorkQueueRepository.mark_delivered", "work_queue", _classified_query(["x"]), None),
+]
+
+
+class WorkQueueRepository:
+    """
+    One document per article URL (``_id`` = url) moving through
+    discovered -> fetched -> classified -> delivered:
+
+        {_id, source, title, text, scraped_at, state, lease_owner, lease_until,
+         attempts, last_error, article_id, <state>_at, updated_at}
+
+    A worker leases an item of the state its stage consumes (``claim``). Only
+    the lease holder can move it on (``advance``) or give it back (``release``),
+    and the transition is conditional on the expected current state. Replaying a
+    transition is therefore a no-op, and an expired lease (crashed worker)
+    makes the item claimable again. Every claim counts as an attempt, so an
+    item whose leases keep expiring (it crashes or stalls every worker) still
+    ends in FAILED. ``article_id`` is fixed right before classification
+    (``assign_article_ids``), so the article's _id is no older than its insert,
+    and a retry after an expired lease finds the article the earlier attempt
+    may already have stored instead of inserting a second one.
+    """
+
+    def __init__(self) -> None:
+        self.collection: Collection = get_db()["work_queue"]
+
+    def discover(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Add newly discovered URLs (already known ones are left untouched). Returns how many were new."""
+        now = datetime.now(timezone.utc)
+        ops = []
+        for item in items:
+            # Feeds that ship the full text (e.g. WSJ summaries) skip the fetch stage.
+            state = FETCHED if item.get("text") else DISCOVERED
+            doc = {k: v for k, v in item.items() if k != "url"}
+            ops.append(UpdateOne(
+                {"_id": item["url"]},
+                {"$setOnInsert": {**doc, "state": state, "attempts": 0, "lease_until": None,
+                                  "discovered_at": now, f"{state}_at": now, "updated_at": now}},
+                upsert=True,
+            ))
+        if not ops:
+            return 0
+        return self.collection.bulk_write(ops, ordered=False).upserted_count
+
+    def claim(self, state: str, worker_id: str, lease_seconds: float,
+              max_attempts: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest available item in ``state``; None when there is nothing to do.
+        An item claimed more than ``max_attempts`` times only got here through
+        expired leases (release fails it at the cap): it becomes FAILED instead.
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            item = self.collection.find_one_and_update(
+                _claimable_query(state, now),
+                {"$set": {"lease_owner": worker_id, "lease_until": now + timedelta(seconds=lease_seconds),
+                          "updated_at": now},
+                 "$inc": {"attempts": 1}},
+                sort=_CLAIM_ORDER,
+                return_document=ReturnDocument.AFTER,
+            )
+            if item is None or max_attempts is None or item.get("attempts", 0) <= max_attempts:
+                return item
+            self.collection.update_one(
+                {"_id": item["_id"], "lease_owner": worker_id},
+                {"$set": {"state": FAILED, "failed_from": state, "failed_at": now, "lease_until": None,
+                          "last_error": f"lease expired on {item['attempts'] - 1} attempts", "updated_at": now},
+                 "$unset": {"lease_owner": ""}},
+            )
+
+    def claim_many(self, state: str, worker_id: str, lease_seconds: float, limit: int,
+                   max_attempts: Optional[int] = None) -> List[Dict[str, Any]]:
+        items = []
+        while len(items) < limit:
+            item = self.claim(state, worker_id, lease_seconds, max_attempts)
+            if item is None:
+                break
+            items.append(item)
+        return items
+
+    def renew(self, url: str, worker_id: str, lease_seconds: float) -> bool:
+        return self.renew_many([url], worker_id, lease_seconds) == 1
+
+    def renew_many(self, urls: List[str], worker_id: str, lease_seconds: float) -> int:
+        """Extend the leases ``worker_id`` still holds on these items; returns how many it holds."""
+        if not urls:
+            return 0
+        result = self.collection.update_many(
+            {"_id": {"$in": urls}, "lease_owner": worker_id},
+            {"$set": {"lease_until": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)}},
+        )
+        return result.matched_count
+
+    def advance(self, url: str, from_state: str, to_state: str, worker_id: Optional[str],
+                fields: Optional[Dict[str, Any]] = None, unset: Optional[List[str]] = None) -> bool:
+        """
+        Move an item on and drop its lease. Applies only if it is still in
+        ``from_state`` (and leased by ``worker_id``, when given); returns whether it did.
+        """
+        now = datetime.now(timezone.utc)
+        selector: Dict[str, Any] = {"_id": url, "state": from_state}
+        if worker_id is not None:
+            selector["lease_owner"] = worker_id
+        update: Dict[str, Any] = {
+            "$set": {**(fields or {}), "state": to_state, "lease_until": None, "attempts": 0,
+                     "last_error": None, f"{to_state}_at": now, "updated_at": now},
+            "$unset": {"lease_owner": "", **{field: "" for field in unset or []}},
+        }
+        return self.collection.update_one(selector, update).modified_count == 1
+
+    def assign_article_ids(self, items: List[Dict[str, Any]], worker_id: str) -> Dict[str, ObjectId]:
+        """
+        Fix the _id each leased item's article will be stored with. The trends
+        watermark follows article _ids, so the id is created now rather than at
+        discovery. A first attempt always gets a fresh one; a retry keeps the id
+        an earlier attempt may have stored. Returns url -> article_id for the
+        items this worker still holds.
+        """
+        ops = [
+            UpdateOne({"_id": item["_id"], "lease_owner": worker_id}, {"$set": {"article_id": ObjectId()}})
+            for item in items
+            if item.get("article_id") is None or item.get("attempts", 0) <= 1
+        ]
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+        held = self.collection.find({"_id": {"$in": [item["_id"] for item in items]}, "lease_owner": worker_id},
+                                    {"article_id": 1})
+        return {doc["_id"]: doc["article_id"] for doc in held}
+
+    def release(self, url: str, worker_id: str, error: str, max_attempts: int,
+                unset: Optional[List[str]] = None) -> str:
+        """Give a failed item back for a retry; after ``max_attempts`` it becomes FAILED. Returns its state."""
+        now = datetime.now(timezone.utc)
+        item = self.collection.find_one_and_update(
+            {"_id": url, "lease_owner": worker_id},
+            {"$set": {"lease_until": None, "last_error": error[:500], "updated_at": now},
+             "$unset": {"lease_owner": "", **{field: "" for field in unset or []}}},
+            projection={"state": 1, "attempts": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if item is None:
+            return ""
+        if item.get("attempts", 0) >= max_attempts:
+            self.collection.update_one({"_id": url, "state": item["state"]},
+                                       {"$set": {"state": FAILED, "failed_from": item["state"], "failed_at": now}})
+            return FAILED
+        return item["state"]
+
+    def mark_delivered(self, article_ids: List[Any]) -> int:
+        """classified -> delivered for the given articles (called by the webhook worker)."""
+        if not article_ids:
+            return 0
+        now = datetime.now(timezone.utc)
+        result = self.collection.update_many(
+            _classified_query(article_ids),
+            {"$set": {"state": DELIVERED, "delivered_at": now, "updated_at": now}},
+        )
+        return result.modified_count
+
+    def retry_failed(self) -> int:
+        """Put FAILED items back into the state they failed in."""
+        result = self.collection.update_many(
+            {"state": FAILED},
+            [{"$set": {"state": "$failed_from", "attempts": 0, "lease_until": None}},
+             {"$unset": ["failed_from", "failed_at"]}],
+        )
+        return result.modified_count
+
+    def count_state(self, state: str) -> int:
+        """Items in ``state``, leased or not (served by the state_updated_at index)."""
+        return self.collection.count_documents({"state": state})
+
+    def counts(self) -> Dict[str, int]:
+        counts = {state: 0 for state in STATES}
+        for row in self.collection.aggregate([{"$group": {"_id": "$state", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+    def setup_indexes(self) -> None:
+        """Create/reconcile this collection's indexes as declared in lib/db/indexes.py."""
+        report = ensure_collection_indexes(self.collection.database, self.collection.name)
+        print(f"✅ Indexes on '{self.collection.name}': {report}")
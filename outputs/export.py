@@ -0,0 +1,186 @@
+# outputs/export.py
+"""
+Streaming export and bulk maintenance for large collections.
+
+    python -m outputs.export dump articles --format jsonl --out articles.jsonl
+    python -m outputs.export dump articles --format parquet --out articles.parquet \\
+        --fields title,url,topic,sentiment,scraped_at --query '{"sample_date": "2025-09-17"}'
+    python -m outputs.export set articles relevanceStatus pending --query '{"relevanceStatus": {"$exists": false}}'
+
+Reads use a projection-only cursor on the analytics read preference
+(MONGO_ANALYTICS_READ_PREFERENCE) with a tunable batch size. Rows are written as
+they arrive: JSONL line by line, Parquet one row group per batch. Memory stays
+around one batch regardless of the collection size. Parquet needs the optional
+``pyarrow`` package.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from lib.db.mongo_client import get_analytics_db, get_db
+
+EXPORT_BATCH_SIZE = 5000
+
+
+def _plain(value: Any) -> Any:
+    """BSON values -> JSON/Arrow friendly values."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_batches(collection_name: str, query: Optional[Dict[str, Any]] = None, fields: Optional[List[str]] = None,
+                 batch_size: int = EXPORT_BATCH_SIZE, limit: int = 0) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of at most ``batch_size`` documents, fetching ``batch_size`` per round trip."""
+    projection = {f: 1 for f in fields} if fields else None
+    if projection is not None and "_id" not in fields:
+        projection["_id"] = 0
+    cursor = get_analytics_db()[collection_name].find(query or {}, projection, batch_size=batch_size, limit=limit)
+    batch: List[Dict[str, Any]] = []
+    try:
+        for doc in cursor:
+            batch.append(_plain(doc))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        cursor.close()
+
+
+def write_jsonl(batches: Iterable[List[Dict[str, Any]]], path: str) -> int:
+    rows = 0
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    try:
+        for batch in batches:
+            out.write("".join(json.dumps(doc, ensure_ascii=False, default=_json_default) + "\n" for doc in batch))
+            rows += len(batch)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return rows
+
+
+def write_parquet(batches: Iterable[List[Dict[str, Any]]], path: str, compression: str = "zstd") -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from e
+
+    rows = 0
+    writer = None
+    schema = None
+    try:
+        for batch in batches:
+            if writer is None:
+                # The schema comes from the first batch; later batches are cast to it
+                # (fields that first appear later are dropped; pass --fields to pin them).
+                schema = pa.Table.from_pylist(batch).schema
+                writer = pq.ParquetWriter(path, schema, compression=compression)
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export(collection_name: str, fmt: str, path: str, query: Optional[Dict[str, Any]] = None,
+           fields: Optional[List[str]] = None, batch_size: int = EXPORT_BATCH_SIZE, limit: int = 0) -> int:
+    started = time.perf_counter()
+    batches = iter_batches(collection_name, query, fields, batch_size, limit)
+    if fmt == "jsonl":
+        rows = write_jsonl(batches, path)
+    elif fmt == "parquet":
+        rows = write_parquet(batches, path)
+    else:
+        raise ValueError(f"Unsupported format '{fmt}' (jsonl or parquet)")
+    elapsed = time.perf_counter() - started
+    print(f"✅ Exported {rows} documents from '{collection_name}' to {path} in {elapsed:.1f}s "
+          f"({rows / elapsed if elapsed else 0:.0f} docs/s)", file=sys.stderr)
+    return rows
+
+
+# --- Bulk maintenance ---
+
+def set_field(collection_name: str, field: str, value: Any, query: Optional[Dict[str, Any]] = None) -> int:
+    """Same value for every matching document: one update_many on the server."""
+    result = get_db()[collection_name].update_many(query or {}, {"$set": {field: value}})
+    return result.modified_count
+
+
+def bulk_set(collection_name: str, updates: Iterable[Tuple[Any, Dict[str, Any]]],
+             batch_size: int = 1000) -> int:
+    """Per-document values ((_id, {field: value}) pairs), sent as unordered bulk_write batches."""
+    collection = get_db()[collection_name]
+    modified = 0
+    ops: List[UpdateOne] = []
+    for _id, fields in updates:
+        ops.append(UpdateOne({"_id": _id}, {"$set": fields}))
+        if len(ops) >= batch_size:
+            modified += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        modified += collection.bulk_write(ops, ordered=False).modified_count
+    return modified
+
+
+def parse_value(raw: str) -> Any:
+    """JSON value from the command line; bare strings are kept as strings."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Stream collections to JSONL/Parquet and run bulk updates.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dump = sub.add_parser("dump", help="export a collection")
+    dump.add_argument("collection")
+    dump.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    dump.add_argument("--out", default="-", help="output path ('-' = stdout, jsonl only)")
+    dump.add_argument("--fields", default="", help="comma-separated projection")
+    dump.add_argument("--query", default="{}", help="JSON filter")
+    dump.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    dump.add_argument("--limit", type=int, default=0)
+
+    setter = sub.add_parser("set", help="set one field on every matching document (update_many)")
+    setter.add_argument("collection")
+    setter.add_argument("field")
+    setter.add_argument("value", help="JSON value (bare strings are accepted)")
+    setter.add_argument("--query", default="{}", help="JSON filter")
+
+    args = parser.parse_args(argv)
+    query = json.loads(args.query)
+    if args.command == "dump":
+        if args.format == "parquet" and args.out == "-":
+            parser.error("--out is required for parquet")
+        fields = [f.strip() for f in args.fields.split(",") if f.strip()] or None
+        export(args.collection, args.format, args.out, query, fields, args.batch_size, args.limit)
+    else:
+        modified = set_field(args.collection, args.field, parse_value(args.value), query)
+        print(f"✅ Updated {modified} documents in '{args.collection}'")
+
+
+if __name__ == "__main__":
+    main()
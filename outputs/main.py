@@ -9,8 +9,9 @@ def _sample_date():
 
 
 def articles():
+    # For full dumps use `python -m outputs.export dump articles` (streams JSONL/Parquet).
     repo_articles = ArticlesRepository()
-    articles = repo_articles.get_articles({})
+    articles = repo_articles.get_articles({}, {"text": 0}).limit(50)
     for article in articles:
         print(article)
         print("----")
@@ -29,19 +30,16 @@ def delete_metadata():
 
 def get_links():
     repo = LinkPoolRepository()
-    links = repo.get_link({})
+    links = repo.get_link({}).limit(50)
     for link in links:
         print(link)
         print("----")
 
 def getAllArticlesAndEdit():
     repo = ArticlesRepository()
-    articles = repo.get_articles({})
-    for article in articles:
-        print(article)
-        print("----")
-        repo.update_articles({"_id": article["_id"]}, {"$set": {"relevanceStatus": "pending"}})
-        print(f"Updated article {article['_id']} to set relevanceStatus to pending")
+    # One server-side update instead of a round trip per article.
+    modified = repo.update_articles_many({}, {"$set": {"relevanceStatus": "pending"}})
+    print(f"Updated {modified} articles to set relevanceStatus to pending")
 
 def countArticles():
     repo = ArticlesRepository()
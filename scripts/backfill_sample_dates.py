@@ -0,0 +1,126 @@
+# scripts/backfill_sample_dates.py
+"""
+Backfill sample_date / sample_seq on metadata, articles and summaries.
+
+Each sample is resolved from, in order:
+  1. the legacy "batch-YYYY-MM-DD" sample name (batch becomes sample_seq);
+  2. its metadata document (UUID samples): the date of gathering_sample_startedAt,
+     numbered by start time within the day;
+  3. the earliest scraped_at of its documents (sample_seq 0 = unknown).
+
+Idempotent: only documents without sample_date are touched. Run with --dry-run
+first to see what would change, then create the indexes:
+
+    python scripts/backfill_sample_dates.py --dry-run
+    python scripts/backfill_sample_dates.py
+    python -m lib.db.indexes --verify
+"""
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+_BASE_DIR = Path(__file__).resolve().parent
+# Allow `python scripts/backfill_sample_dates.py` to import the project packages.
+sys.path.insert(0, str(_BASE_DIR.parent))
+
+from pymongo import UpdateOne  # noqa: E402
+
+from lib.repositories.articles_repository import ArticlesRepository  # noqa: E402
+from lib.repositories.metadata_repository import MetadataRepository  # noqa: E402
+from lib.repositories.summaries_repository import SummariesRepository  # noqa: E402
+from utils.validation import as_sample_date, parse_legacy_sample  # noqa: E402
+
+_MISSING = {"sample_date": {"$exists": False}}
+
+
+def backfill_metadata(repo: MetadataRepository, dry_run: bool) -> Dict[str, Tuple[str, int]]:
+    """Return sample -> (sample_date, sample_seq) for every metadata document."""
+    resolved: Dict[str, Tuple[str, int]] = {}
+    pending: Dict[str, Any] = {}  # sample -> original _id of documents still missing sample_date
+    unnumbered = defaultdict(list)  # date -> [(startedAt, _id)]
+    max_seq: Dict[str, int] = defaultdict(int)
+
+    for doc in repo.get_metadata_broad({}, {"sample_date": 1, "sample_seq": 1, "gathering_sample_startedAt": 1}):
+        sample = str(doc["_id"])
+        if not doc.get("sample_date"):
+            pending[sample] = doc["_id"]
+        if doc.get("sample_date"):
+            resolved[sample] = (doc["sample_date"], int(doc.get("sample_seq") or 0))
+            max_seq[doc["sample_date"]] = max(max_seq[doc["sample_date"]], resolved[sample][1])
+            continue
+        legacy = parse_legacy_sample(sample)
+        if legacy:
+            seq, day = legacy
+            resolved[sample] = (day, seq)
+            max_seq[day] = max(max_seq[day], seq)
+            continue
+        day = as_sample_date(doc.get("gathering_sample_startedAt"))
+        if day:
+            unnumbered[day].append((doc["gathering_sample_startedAt"], doc["_id"]))
+
+    # UUID samples are numbered after any legacy batches of the same day, by start time.
+    for day, runs in unnumbered.items():
+        for started, _id in sorted(runs, key=lambda r: r[0]):
+            max_seq[day] += 1
+            resolved[str(_id)] = (day, max_seq[day])
+
+    ops = [
+        UpdateOne({"_id": pending[sample], **_MISSING}, {"$set": {"sample_date": day, "sample_seq": seq}})
+        for sample, (day, seq) in resolved.items() if sample in pending
+    ]
+    print(f"metadata: {len(ops)} documents resolved")
+    if not dry_run:
+        if ops:
+            repo.collection.bulk_write(ops, ordered=False)
+        for day, seq in max_seq.items():
+            # New runs must continue after the backfilled numbers.
+            repo.raise_sample_seq(day, seq)
+    return resolved
+
+
+def backfill_collection(repo, name: str, by_sample: Dict[str, Tuple[str, int]], dry_run: bool) -> int:
+    # One-off scan: the migration itself is the last query that cannot use sample_date.
+    samples = repo.collection.distinct("sample", _MISSING)
+    updated = 0
+    for sample in samples:
+        if sample is None:
+            continue
+        target = by_sample.get(str(sample))
+        if target is None:
+            legacy = parse_legacy_sample(str(sample))
+            if legacy:
+                target = (legacy[1], legacy[0])
+        if target is None:
+            first = repo.get_one_article({"sample": sample, "scraped_at": {"$ne": None}}, [("scraped_at", 1)])
+            day = as_sample_date(first.get("scraped_at")) if first else None
+            if day is None:
+                print(f"⚠️ {name}: cannot resolve a date for sample {sample}; skipped")
+                continue
+            target = (day, 0)
+        day, seq = target
+        if dry_run:
+            n = repo.count_articles({"sample": sample, **_MISSING})
+        else:
+            n = repo.collection.update_many({"sample": sample, **_MISSING},
+                                            {"$set": {"sample_date": day, "sample_seq": seq}}).modified_count
+        updated += n
+        print(f"{name}: sample {sample} -> {day} #{seq} ({n} documents)")
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill sample_date/sample_seq.")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be updated")
+    args = parser.parse_args()
+
+    by_sample = backfill_metadata(MetadataRepository(), args.dry_run)
+    n_articles = backfill_collection(ArticlesRepository(), "articles", by_sample, args.dry_run)
+    n_summaries = backfill_collection(SummariesRepository(), "summaries", by_sample, args.dry_run)
+    verb = "would update" if args.dry_run else "updated"
+    print(f"✅ Backfill {verb}: {n_articles} articles, {n_summaries} summaries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# scripts/bench_mongo.py
+"""
+Insert throughput and bytes on the wire per MongoDB client setting.
+
+Runs against a local mongod (BENCH_MONGO_URI, default mongodb://localhost:27017)
+in a throwaway database, inserting article-sized documents with insert_many.
+Each setting gets a fresh client, so pools and compressors are isolated:
+
+    python scripts/bench_mongo.py
+    python scripts/bench_mongo.py --docs 5000 --batch 500 --compressors none,snappy,zstd --write-concerns 1,majority
+
+Bytes on the wire come from the server's serverStatus network counters
+(physicalBytesIn, i.e. after compression, when the server reports it).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+_BASE_DIR = Path(__file__).resolve().parent
+# Allow `python scripts/bench_mongo.py` to import the project packages.
+sys.path.insert(0, str(_BASE_DIR.parent))
+
+from pymongo import MongoClient  # noqa: E402
+
+from lib.db.mongo_client import available_compressors, build_write_concern  # noqa: E402
+
+BENCH_MONGO_URI = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017")
+BENCH_DB = os.getenv("BENCH_MONGODB_DB", "bench_news_pipeline")
+
+_WORDS = ("government market players climate study company police court election research hospital "
+          "tournament investors minister emissions students flight ceasefire technology patients revenue").split()
+
+
+def make_articles(n: int, text_words: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Synthetic documents shaped like `articles` (long natural-ish text dominates the size)."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    docs = []
+    for i in range(n):
+        text = " ".join(rng.choice(_WORDS) for _ in range(text_words))
+        docs.append({
+            "title": f"Article {i}",
+            "url": f"https://example.com/news/{i}",
+            "summary": text[:600],
+            "text": text,
+            "source": rng.choice(["bbc", "cnn", "wsj", "aljazeera", "dw"]),
+            "sample": "bench",
+            "scraped_at": now,
+            "topic": rng.choice(_WORDS),
+            "isCleaned": False,
+            "sentiment": {"label": "POSITIVE", "score": rng.random()},
+        })
+    return docs
+
+
+def _bytes_in(client: MongoClient) -> int:
+    network = client.admin.command("serverStatus")["network"]
+    return int(network.get("physicalBytesIn", network.get("bytesIn", 0)))
+
+
+def run_setting(docs: List[Dict[str, Any]], batch: int, compressor: str, w: str, pool: int) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"appname": "bench-mongo", "maxPoolSize": pool}
+    if compressor != "none":
+        if not available_compressors(compressor):
+            return {"compressor": compressor, "w": w, "error": "compressor unavailable"}
+        options["compressors"] = compressor
+    client = MongoClient(BENCH_MONGO_URI, **options)
+    try:
+        collection = client[BENCH_DB].get_collection(
+            f"articles_{compressor}_{w}", write_concern=build_write_concern(w=w, journal="", wtimeout_ms=None))
+        collection.drop()
+        # insert_many adds _id to the dicts; give each run its own copies.
+        payload = [dict(d) for d in docs]
+        before = _bytes_in(client)
+        started = time.perf_counter()
+        for start in range(0, len(payload), batch):
+            collection.insert_many(payload[start:start + batch], ordered=False)
+        elapsed = time.perf_counter() - started
+        wire = _bytes_in(client) - before
+        logical = collection.database.command("collStats", collection.name).get("size", 0)
+        collection.drop()
+        return {
+            "compressor": compressor,
+            "w": w,
+            "docs_per_s": round(len(payload) / elapsed, 1),
+            "seconds": round(elapsed, 3),
+            "wire_mb": round(wire / (1024 * 1024), 2),
+            "bson_mb": round(logical / (1024 * 1024), 2),
+            "wire_ratio": round(wire / logical, 3) if logical else None,
+        }
+    finally:
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark MongoDB insert throughput per client setting.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--text-words", type=int, default=900, help="words per article text (~6 KB)")
+    parser.add_argument("--pool", type=int, default=int(os.getenv("MONGO_MAX_POOL_SIZE", 100)))
+    parser.add_argument("--compressors", default="none,snappy,zstd,zlib")
+    parser.add_argument("--write-concerns", default="1")
+    args = parser.parse_args()
+
+    docs = make_articles(args.docs, args.text_words)
+    print(f"Benchmarking {args.docs} docs (batch {args.batch}) against {BENCH_MONGO_URI}/{BENCH_DB}")
+    print(f"{'compressor':<10} {'w':<9} {'docs/s':>9} {'secs':>8} {'wire MB':>9} {'bson MB':>9} {'ratio':>7}")
+    for w in [x.strip() for x in args.write_concerns.split(",") if x.strip()]:
+        for compressor in [c.strip() for c in args.compressors.split(",") if c.strip()]:
+            r = run_setting(docs, args.batch, compressor, w, args.pool)
+            if "error" in r:
+                print(f"{compressor:<10} {w:<9} {r['error']}")
+                continue
+            print(f"{r['compressor']:<10} {r['w']:<9} {r['docs_per_s']:>9} {r['seconds']:>8} "
+                  f"{r['wire_mb']:>9} {r['bson_mb']:>9} {str(r['wire_ratio']):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """
 Download all models your pipeline needs into the local cache (offline-ready).
+
+Each model is also written as a safetensors snapshot under MODEL_SNAPSHOT_DIR
+(see ingest/model_loading.py), which the pipeline memory-maps at startup.
+BOOTSTRAP_SNAPSHOT_DTYPE=bf16 stores the snapshots in bfloat16;
+BOOTSTRAP_SNAPSHOTS=0 skips them.
 """
 import os
+import sys
 from pathlib import Path
 
 _BASE_DIR = Path(__file__).resolve().parent
@@ -19,33 +25,61 @@ from transformers import (
     AutoModelForSeq2SeqLM,
 )
 
+# Allow `python scripts/bootstrap_models.py` to import the project packages.
+sys.path.insert(0, str(_BASE_DIR.parent))
+from ingest.model_loading import MODEL_SNAPSHOT_DIR, write_snapshot  # noqa: E402
+
+WRITE_SNAPSHOTS = os.getenv("BOOTSTRAP_SNAPSHOTS", "1").strip().lower() not in ("0", "false", "no")
+SNAPSHOT_DTYPE = os.getenv("BOOTSTRAP_SNAPSHOT_DTYPE", os.getenv("MODEL_DTYPE", "")).strip().lower()
+
+
+def _download(model_cls, name):
+    tokenizer = AutoTokenizer.from_pretrained(name, cache_dir=CACHE_DIR)
+    model = model_cls.from_pretrained(name, cache_dir=CACHE_DIR)
+    if WRITE_SNAPSHOTS:
+        target, size_mb = write_snapshot(model, tokenizer, name, SNAPSHOT_DTYPE)
+        print(f"   💾 snapshot {target} ({size_mb:.0f} MB, dtype={SNAPSHOT_DTYPE or 'fp32'})")
+
 
 def dl_sentiment():
     name = "distilbert-base-uncased-finetuned-sst-2-english"
     print(f"⬇️ {name}")
-    AutoTokenizer.from_pretrained(name, cache_dir=CACHE_DIR)
-    AutoModelForSequenceClassification.from_pretrained(name, cache_dir=CACHE_DIR)
+    _download(AutoModelForSequenceClassification, name)
 
 
 def dl_topic():
     name = "facebook/bart-large-mnli"
     print(f"⬇️ {name}")
-    AutoTokenizer.from_pretrained(name, cache_dir=CACHE_DIR)
-    AutoModelForSequenceClassification.from_pretrained(name, cache_dir=CACHE_DIR)
+    _download(AutoModelForSequenceClassification, name)
 
 
-def dl_summarizer():
-    name = "facebook/bart-large-cnn"
-    print(f"⬇️ {name}")
-    AutoTokenizer.from_pretrained(name, cache_dir=CACHE_DIR)
-    AutoModelForSeq2SeqLM.from_pretrained(name, cache_dir=CACHE_DIR)
+# Models per summarizer profile (see ingest/summarizer.SUMMARIZER_PROFILES);
+# "extractive" needs no model.
+SUMMARIZER_PROFILE_MODELS = {
+    "quality": "facebook/bart-large-cnn",
+    "fast": "sshleifer/distilbart-cnn-12-6",
+    "extractive": None,
+}
+
+
+def dl_summarizer(profiles=None):
+    for profile in profiles or SUMMARIZER_PROFILE_MODELS:
+        name = SUMMARIZER_PROFILE_MODELS[profile]
+        if not name:
+            continue
+        print(f"⬇️ {name} (summarizer profile '{profile}')")
+        _download(AutoModelForSeq2SeqLM, name)
 
 
 def main():
     dl_sentiment()
     dl_topic()
-    dl_summarizer()
+    # BOOTSTRAP_SUMMARIZER_PROFILES=quality,fast limits the download; default is every profile.
+    profiles = [p.strip() for p in os.getenv("BOOTSTRAP_SUMMARIZER_PROFILES", "").split(",") if p.strip()]
+    dl_summarizer(profiles)
     print("✅ All models cached.")
+    if WRITE_SNAPSHOTS:
+        print(f"✅ Snapshots written to {MODEL_SNAPSHOT_DIR}")
 
 
 if __name__ == "__main__":
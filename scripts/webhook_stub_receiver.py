@@ -0,0 +1,126 @@
+# scripts/webhook_stub_receiver.py
+"""
+Local stand-in for the webhook receivers, to exercise the outbox worker.
+
+    python scripts/webhook_stub_receiver.py --port 8099 --fail-rate 0.2 --delay-ms 50
+
+Then point the worker at it:
+
+    WEBHOOK_URL=http://localhost:8099/embedding \\
+    WEBHOOK_URL_THREAD_EVENTS=http://localhost:8099/thread-events \\
+    WEBHOOK_URL_BATCH=http://localhost:8099/embedding/batch \\
+    python -m ingest.webhook_dispatcher
+
+Single events are POSTed as a JSON object and batches as {"events": [...]} to
+a path ending in /batch. ``--fail-rate`` answers that share of requests with
+503 and ``--down-for`` answers everything with 503 for the first N seconds,
+which exercises the backoff and the dead letters. Every --report-every seconds
+it prints the requests and unique articles received per path. Counting
+duplicates shows the at-least-once redeliveries.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Set, Tuple
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.failed: Counter = Counter()
+        self.events: Counter = Counter()
+        self.articles: Dict[str, Set[str]] = defaultdict(set)
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {
+                path: {
+                    "requests": self.requests[path],
+                    "failed": self.failed[path],
+                    "events": self.events[path],
+                    "unique_articles": len(self.articles[path]),
+                    "duplicates": self.events[path] - len(self.articles[path]),
+                }
+                for path in self.requests
+            }
+
+
+def make_handler(stats: _Stats, fail_rate: float, delay_ms: float, down_until: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+            path = self.path.rstrip("/")
+            with stats.lock:
+                stats.requests[path] += 1
+            if time.monotonic() < down_until or random.random() < fail_rate:
+                with stats.lock:
+                    stats.failed[path] += 1
+                self._answer(503, {"error": "stub failure"})
+                return
+            try:
+                data = json.loads(body or b"{}")
+            except ValueError:
+                self._answer(400, {"error": "invalid json"})
+                return
+            events = data.get("events", []) if path.endswith("/batch") else [data]
+            with stats.lock:
+                stats.events[path] += len(events)
+                stats.articles[path].update(str(event.get("article_id")) for event in events)
+            self._answer(200, {"received": len(events)})
+
+        def _answer(self, status: int, body: Dict[str, object]) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return Handler
+
+
+def serve(port: int = 0, fail_rate: float = 0.0, delay_ms: float = 0.0,
+          down_for: float = 0.0) -> Tuple[ThreadingHTTPServer, _Stats]:
+    """Start the receiver on a background thread (port 0 picks a free one); stop it with server.shutdown()."""
+    stats = _Stats()
+    handler = make_handler(stats, fail_rate, delay_ms, time.monotonic() + down_for)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub webhook receiver for local delivery tests.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="latency added to every request")
+    parser.add_argument("--down-for", type=float, default=0.0, help="answer 503 to everything for N seconds")
+    parser.add_argument("--report-every", type=float, default=10.0)
+    args = parser.parse_args()
+
+    server, stats = serve(args.port, args.fail_rate, args.delay_ms, args.down_for)
+    print(f"Stub webhook receiver on http://127.0.0.1:{args.port} (fail rate {args.fail_rate}, delay {args.delay_ms} ms)")
+    try:
+        while True:
+            time.sleep(args.report_every)
+            print(stats.summary())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(f"Final: {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# tests/conftest.py
+import os
+import uuid
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from lib.db import mongo_client
+
+# Tests that need MongoDB run against this server and skip when it is not reachable.
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI", "mongodb://127.0.0.1:27017")
+
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    """A throwaway database, installed as the one get_db() returns; dropped afterwards."""
+    client = MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=1500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        client.close()
+        pytest.skip(f"MongoDB not reachable at {MONGO_TEST_URI}: {e}")
+    db = client[f"test_{uuid.uuid4().hex[:12]}"]
+    monkeypatch.setattr(mongo_client, "_db", db)
+    yield db
+    client.drop_database(db.name)
+    client.close()
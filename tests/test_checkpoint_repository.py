@@ -0,0 +1,23 @@
+# tests/test_checkpoint_repository.py
+"""Consumer checkpoints (needs MongoDB)."""
+from bson import ObjectId
+
+from lib.repositories.checkpoint_repository import CheckpointRepository
+
+
+def test_state_round_trip(mongo_db):
+    repo = CheckpointRepository()
+    assert repo.get_state("reclassify") == {}
+    repo.save_state("reclassify", {"target": "v2", "last_ids": {}})
+    repo.save_state("reclassify", {"last_ids.a": 3})
+    state = repo.get_state("reclassify")
+    assert state["target"] == "v2"
+    assert state["last_ids"] == {"a": 3}
+
+
+def test_checkpoint_from_the_legacy_collection_is_carried_over(mongo_db):
+    watermark = ObjectId()
+    mongo_db["dispatcher_state"].insert_one({"_id": "trends_materializer", "watermark": watermark})
+    repo = CheckpointRepository()
+    assert repo.get_state("trends_materializer")["watermark"] == watermark
+    assert repo.collection.find_one({"_id": "trends_materializer"})["watermark"] == watermark
@@ -0,0 +1,45 @@
+# tests/test_global_counters.py
+"""GlobalCounters batching, against an in-memory stand-in for GlobalMetadataRepository."""
+import atexit
+
+import pytest
+
+from ingest.global_counters import GlobalCounters
+
+
+class RecordingRepo:
+    def __init__(self):
+        self.updates = []
+
+    def increment_counters(self, selector, increments, array_filters=None):
+        self.updates.append((selector, increments, array_filters))
+
+
+def test_missing_document_id_is_an_error():
+    with pytest.raises(RuntimeError, match="GLOBAL_METADATA_ID"):
+        GlobalCounters(RecordingRepo(), document_id="", flush_interval=0)
+
+
+def test_counts_are_flushed_as_one_increment():
+    repo = RecordingRepo()
+    counters = GlobalCounters(repo, document_id="global", flush_interval=0)
+    counters.add_article("Economy")
+    counters.add_article("Economy")
+    counters.add_article(None)
+    counters.move_article("Economy", "Sports")
+    counters.close()
+    [(selector, increments, array_filters)] = repo.updates
+    assert selector == {"_id": "global"}
+    assert increments == {"total_articles": 3, "topics_data.$[t0].document_count": 1,
+                          "topics_data.$[t1].document_count": 1}
+    assert array_filters == [{"t0.topic": "Economy"}, {"t1.topic": "Sports"}]
+
+
+def test_close_drops_the_exit_flush(monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(atexit, "unregister", registered.remove)
+    counters = GlobalCounters(RecordingRepo(), document_id="global", flush_interval=0)
+    assert registered == [counters.flush]
+    counters.close()
+    assert registered == []
@@ -0,0 +1,42 @@
+# tests/test_inference_server.py
+"""Request validation of the inference server, with a stand-in batch function instead of the models."""
+import json
+import threading
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from ingest.inference_server import MicroBatcher, make_handler
+
+
+@pytest.fixture
+def server():
+    batchers = {"sentiment": MicroBatcher("sentiment", lambda items: [{"label": "POSITIVE"} for _ in items])}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(batchers))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(address, body: bytes):
+    conn = HTTPConnection(*address, timeout=5)
+    conn.request("POST", "/sentiment", body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    result = response.status, json.loads(response.read())
+    conn.close()
+    return result
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"text"', b"3", b"null"])
+def test_non_object_json_is_a_bad_request(server, body):
+    status, reply = post(server, body)
+    assert status == 400
+    assert "JSON object" in reply["error"]
+
+
+def test_valid_request_is_answered(server):
+    assert post(server, b'{"text": "good news"}') == (200, {"label": "POSITIVE"})
+    assert post(server, b"{}")[0] == 400
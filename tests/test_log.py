@@ -0,0 +1,35 @@
+# tests/test_log.py
+"""Forked children (inference pool workers) log without the parent's queue listener."""
+import logging
+import multiprocessing as mp
+import os
+
+import pytest
+
+from utils import log
+
+
+def _child_handlers(conn) -> None:
+    logging.getLogger("test").warning("from the child")
+    conn.send([type(handler).__name__ for handler in logging.getLogger().handlers])
+    conn.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="needs fork")
+def test_forked_child_logs_to_a_stream_handler(capfd):
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    log.setup_logging()
+    try:
+        parent_conn, child_conn = mp.Pipe()
+        child = mp.get_context("fork").Process(target=_child_handlers, args=(child_conn,))
+        child.start()
+        handlers = parent_conn.recv()
+        child.join(10)
+        assert child.exitcode == 0
+        assert handlers == ["StreamHandler"]
+        assert type(root.handlers[0]).__name__ == "_DroppingQueueHandler"
+    finally:
+        log.shutdown_logging()
+        root.handlers, root.level = saved_handlers, saved_level
+    assert "from the child" in capfd.readouterr().out
@@ -0,0 +1,28 @@
+# tests/test_query_shapes.py
+"""Every query shape a repository exports can start from a declared index (no server needed)."""
+import pytest
+
+from lib.db.indexes import INDEX_SPECS, repository_query_shapes
+
+SHAPES = repository_query_shapes()
+
+
+def _filter_fields(query):
+    for key, value in query.items():
+        if key in ("$or", "$and"):
+            for clause in value:
+                yield from _filter_fields(clause)
+        else:
+            yield key
+
+
+@pytest.mark.parametrize("label, collection, query, sort", SHAPES, ids=[shape[0] for shape in SHAPES])
+def test_shape_has_an_index_prefix(label, collection, query, sort):
+    fields = set(_filter_fields(query))
+    leading = {spec["keys"][0][0] for spec in INDEX_SPECS[collection]}
+    assert fields & leading, f"{label}: no index on {collection} starts with one of {sorted(fields)}"
+
+
+def test_every_repository_exports_shapes():
+    labels = {shape[0].split(".")[0] for shape in SHAPES}
+    assert {"ArticlesRepository", "LinkPoolRepository", "WebhookOutboxRepository", "WorkQueueRepository"} <= labels
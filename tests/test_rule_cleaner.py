@@ -0,0 +1,108 @@
+# tests/test_rule_cleaner.py
+"""fast_clean: boilerplate goes, prose that only resembles it stays."""
+import pytest
+
+from ingest.rule_cleaner import FAST_CLEAN_MIN_CONFIDENCE, fast_clean
+
+BODY = [
+    "The city council approved the new transit budget on Tuesday after a long debate.",
+    "Supporters said the plan would cut commute times for thousands of residents.",
+    "Opponents argued that the cost estimates were too optimistic and asked for an audit.",
+    "The budget now goes to the regional government, which is expected to sign it next month.",
+]
+
+
+def article(*extra_lines: str, before=(), after=()) -> str:
+    return "\n\n".join([*before, *BODY, *extra_lines, *after])
+
+
+@pytest.mark.parametrize("byline", [
+    "By John Smith",
+    "By Maria Garcia Lopez",
+    "Written by Jane Doe and John Smith",
+    "Reporting by John Smith; Editing by Jane Doe",
+])
+def test_bylines_at_the_edges_are_dropped(byline):
+    head, _ = fast_clean(article(before=[byline]))
+    tail, _ = fast_clean(article(after=[byline]))
+    assert byline not in head
+    assert byline not in tail
+    assert head.startswith(BODY[0])
+
+
+@pytest.mark.parametrize("notice", [
+    "Copyright 2024 Example News. All rights reserved.",
+    "© 2025 The Daily Paper",
+    "(c) 2023 Example Media",
+    "All rights reserved.",
+    "Terms of Use | Privacy Policy | Cookies",
+    "The BBC is not responsible for the content of external sites.",
+])
+def test_notice_lines_are_dropped(notice):
+    cleaned, confidence = fast_clean(article(after=[notice]))
+    assert notice not in cleaned
+    assert confidence >= FAST_CLEAN_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("sentence", [
+    "By Friday, officials said, the bridge would reopen to traffic.",
+    "By Monday Morning the queues had already reached the river.",
+    "The mayor agreed to the terms of use for the new public data portal.",
+    "Copyright holders say the bill would let platforms ignore takedown requests.",
+    "The museum said all rights reserved by the estate would expire in 2030.",
+    "(c) a fine of up to 500 euros for repeat offenders.",
+    "Privacy advocates criticised the cookie rules as too weak.",
+])
+def test_sentences_close_to_boilerplate_are_kept(sentence):
+    # In the middle of the text, and as the first line (where bylines are looked for).
+    middle, middle_confidence = fast_clean(article(sentence))
+    first, _ = fast_clean(article(before=[sentence]))
+    assert sentence in middle
+    assert sentence in first
+    assert middle_confidence >= FAST_CLEAN_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("sentence", [
+    "Related charges were filed against two former directors of the company.",
+    "Advertisement spending fell by a fifth in the first quarter, the agency said.",
+    "Listen to the experts, she said.",
+    "The figures were first reported by Reuters",
+])
+def test_prose_starting_or_ending_like_a_teaser_or_credit_is_kept(sentence):
+    cleaned, _ = fast_clean(article(sentence))
+    assert sentence in cleaned
+
+
+@pytest.mark.parametrize("line", [
+    "Read more: the budget explained",
+    "Related topics",
+    "Watch:",
+    "Subscribe to our newsletter",
+    "Advertisement",
+    "John Smith/Reuters",
+    "Getty Images",
+    "Photo: city council",
+])
+def test_teaser_and_credit_lines_are_dropped(line):
+    cleaned, _ = fast_clean(article(line))
+    assert line not in cleaned
+
+
+def test_name_line_in_the_middle_is_kept():
+    cleaned, _ = fast_clean("\n\n".join([BODY[0], BODY[1], "By Design", BODY[2], BODY[3]]))
+    assert "By Design" in cleaned
+
+
+def test_heavy_removal_goes_to_the_llm():
+    notices = ["Copyright 2024 Example News.", "Terms of Use | Privacy Policy", "Advertisement",
+               "Read more: the budget explained", "Subscribe to our newsletter", "Photo: city council"]
+    light, light_confidence = fast_clean(article(after=notices[:1]))
+    heavy, heavy_confidence = fast_clean(article(*notices))
+    assert light_confidence >= FAST_CLEAN_MIN_CONFIDENCE
+    assert heavy_confidence < FAST_CLEAN_MIN_CONFIDENCE
+    assert light_confidence > heavy_confidence
+
+
+def test_short_or_empty_text_is_never_confident():
+    assert fast_clean("") == ("", 0.0)
+    assert fast_clean("Short note.")[1] == 0.0
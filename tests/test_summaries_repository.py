@@ -0,0 +1,40 @@
+# tests/test_summaries_repository.py
+"""sample_date resolution on SummariesRepository.create_articles (needs MongoDB)."""
+from datetime import datetime, timezone
+
+import pytest
+
+from lib.repositories.summaries_repository import SummariesRepository
+
+
+@pytest.fixture
+def summaries(mongo_db):
+    return SummariesRepository()
+
+
+def test_legacy_sample_name_gives_date_and_batch(summaries):
+    summaries.create_articles({"sample": "3-2025-09-17", "title": "A"})
+    doc = summaries.collection.find_one({"title": "A"})
+    assert (doc["sample_date"], doc["sample_seq"]) == ("2025-09-17", 3)
+
+
+def test_sample_without_metadata_uses_the_first_scraped_at_for_all_its_summaries(summaries):
+    summaries.create_articles({"sample": "run-1", "title": "A",
+                               "scraped_at": datetime(2025, 9, 17, 23, 50, tzinfo=timezone.utc)})
+    summaries.create_articles({"sample": "run-1", "title": "B",
+                               "scraped_at": datetime(2025, 9, 18, 0, 10, tzinfo=timezone.utc)})
+    dates = {(doc["sample_date"], doc["sample_seq"]) for doc in summaries.collection.find({"sample": "run-1"})}
+    assert dates == {("2025-09-17", 0)}
+
+
+def test_unresolvable_sample_leaves_sample_date_unset_for_the_backfill(summaries):
+    summaries.create_articles({"sample": "run-2", "title": "A"})
+    doc = summaries.collection.find_one({"title": "A"})
+    assert "sample_date" not in doc
+    assert "sample_seq" not in doc
+
+    # Resolved once metadata exists: the unresolved case was not cached.
+    summaries._repo_metadata.collection.insert_one({"_id": "run-2", "sample_date": "2025-09-20", "sample_seq": 2})
+    summaries.create_articles({"sample": "run-2", "title": "B"})
+    doc = summaries.collection.find_one({"title": "B"})
+    assert (doc["sample_date"], doc["sample_seq"]) == ("2025-09-20", 2)
@@ -0,0 +1,35 @@
+# tests/test_summarizer_profiles.py
+"""'auto' follows the run's backlog, not the bounded inbox in front of the summarizer."""
+import pytest
+
+pytest.importorskip("transformers")
+
+from ingest import summarizer  # noqa: E402
+from ingest.summarizer import Backlog, select_profile  # noqa: E402
+
+
+@pytest.fixture
+def auto(monkeypatch):
+    monkeypatch.setattr(summarizer, "SUMMARIZER_PROFILE", "auto")
+    monkeypatch.setattr(summarizer, "SUMMARIZER_AUTO_FAST_DEPTH", 50)
+    monkeypatch.setattr(summarizer, "SUMMARIZER_AUTO_EXTRACTIVE_DEPTH", 300)
+
+
+def test_auto_switches_profile_as_the_backlog_grows_and_drains(auto):
+    backlog = Backlog()
+    assert select_profile(backlog.depth()) == "quality"
+    backlog.add(400)
+    assert select_profile(backlog.depth()) == "extractive"
+    backlog.done(150)
+    assert select_profile(backlog.depth()) == "fast"
+    backlog.done(220)
+    assert select_profile(backlog.depth()) == "quality"
+    backlog.done(100)
+    assert backlog.depth() == 0
+
+
+def test_explicit_profile_ignores_the_backlog(auto, monkeypatch):
+    assert select_profile(1000, profile="quality") == "quality"
+    monkeypatch.setattr(summarizer, "SUMMARIZER_PROFILE", "fast")
+    assert select_profile(1000) == "fast"
+    assert select_profile(0) == "fast"
@@ -0,0 +1,116 @@
+# tests/test_text_cleaner.py
+"""AsyncTextCleaner against a local stub of the Ollama /api/generate endpoint."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ingest.text_cleaner import CLEANING_PROMPT, AsyncTextCleaner
+
+
+class StubOllama(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.2, slow_delay: float = 2.0) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.delay = delay
+        self.slow_delay = slow_delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/generate"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubOllama
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        text = body["prompt"][len(CLEANING_PROMPT):]
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            time.sleep(self.server.slow_delay if text.startswith("SLOW") else self.server.delay)
+            payload = json.dumps({"response": f" cleaned {text} "}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The cleaner gave up on this request (deadline).
+            pass
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = StubOllama()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrency_stays_within_the_semaphore(stub):
+    with AsyncTextCleaner(api_url=stub.url, concurrency=2, deadline=5) as cleaner:
+        futures = [cleaner.submit(f"article {n}") for n in range(8)]
+        results = [future.result(timeout=10) for future in futures]
+
+    assert results == [f"cleaned article {n}" for n in range(8)]
+    assert stub.requests == 8
+    assert stub.max_in_flight == 2
+    assert cleaner.llm_calls == 8
+
+
+def test_repeated_text_is_served_from_the_cache(stub):
+    with AsyncTextCleaner(api_url=stub.url, concurrency=2, deadline=5) as cleaner:
+        first = cleaner.submit("same article").result(timeout=10)
+        second = cleaner.submit("same article").result(timeout=10)
+
+    assert first == second == "cleaned same article"
+    assert stub.requests == 1
+    assert cleaner.cache_hits == 1
+
+
+def test_cache_evicts_the_least_recently_used_text(stub):
+    with AsyncTextCleaner(api_url=stub.url, concurrency=1, deadline=5, cache_size=2) as cleaner:
+        for text in ("a", "b", "a", "c", "a", "b"):
+            cleaner.submit(text).result(timeout=10)
+
+    # "b" was evicted by "c" ("a" had been used more recently), so it is requested twice.
+    assert stub.requests == 4
+    assert cleaner.cache_hits == 2
+
+
+def test_deadline_falls_back_to_the_original_text(stub):
+    with AsyncTextCleaner(api_url=stub.url, concurrency=2, deadline=0.5) as cleaner:
+        slow = cleaner.submit("SLOW article")
+        fast = cleaner.submit("quick article")
+        assert slow.result(timeout=10) == "SLOW article"
+        assert fast.result(timeout=10) == "cleaned quick article"
+        # A timed-out text is not cached: the next submit asks the LLM again.
+        cleaner.submit("SLOW article").result(timeout=10)
+
+    assert cleaner.timeouts == 2
+    assert cleaner.llm_calls == 1
+
+
+def test_unreachable_endpoint_falls_back_to_the_original_text():
+    with AsyncTextCleaner(api_url="http://127.0.0.1:9/api/generate", deadline=2) as cleaner:
+        assert cleaner.submit("some article").result(timeout=10) == "some article"
+    assert cleaner.errors == 1
@@ -0,0 +1,35 @@
+# tests/test_validation.py
+from datetime import datetime
+
+import pytest
+
+from utils.validation import as_sample_date, parse_legacy_sample, parse_sample_str
+
+
+@pytest.mark.parametrize("sample_str, expected", [
+    ("3-2025-09-17", ("2025-09-17", 3)),
+    ("12-2025-09-17", ("2025-09-17", 12)),
+    ("-2025-09-17", ("2025-09-17", None)),
+    ("2025-09-17", ("2025-09-17", None)),
+    ("batch-2025-09-17", ("2025-09-17", None)),
+])
+def test_parse_sample_str(sample_str, expected):
+    assert parse_sample_str(sample_str) == expected
+
+
+def test_parse_sample_str_requires_a_date():
+    with pytest.raises(ValueError):
+        parse_sample_str("3-sample")
+
+
+def test_parse_legacy_sample():
+    assert parse_legacy_sample("3-2025-09-17") == (3, "2025-09-17")
+    assert parse_legacy_sample("3-2025-02-30") is None
+    assert parse_legacy_sample("0b9c1c2e-uuid") is None
+
+
+def test_as_sample_date():
+    assert as_sample_date(datetime(2025, 9, 17, 23, 59)) == "2025-09-17"
+    assert as_sample_date("2025-09-17T08:00:00Z") == "2025-09-17"
+    assert as_sample_date("17/09/2025") is None
+    assert as_sample_date(None) is None
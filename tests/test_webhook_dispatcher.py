@@ -0,0 +1,140 @@
+# tests/test_webhook_dispatcher.py
+"""WebhookDispatcher and the outbox repository against scripts/webhook_stub_receiver.py (needs MongoDB)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from ingest import webhook_dispatcher
+from ingest.webhook_dispatcher import WebhookDispatcher
+from lib.repositories.webhook_outbox_repository import DEAD, DELIVERED, PENDING, WebhookOutboxRepository
+from scripts.webhook_stub_receiver import serve
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    """Start a stub receiver and point the embedding target at it: receiver(**serve kwargs) -> stats."""
+    servers = []
+
+    def start(**kwargs):
+        server, stats = serve(**kwargs)
+        servers.append(server)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        monkeypatch.setenv("WEBHOOK_URL", f"{base}/embedding")
+        monkeypatch.setenv("WEBHOOK_URL_BATCH", f"{base}/embedding/batch")
+        return stats
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def outbox(mongo_db):
+    return WebhookOutboxRepository()
+
+
+@pytest.fixture
+def dispatcher(mongo_db):
+    instances = []
+
+    def make(**kwargs):
+        instances.append(WebhookDispatcher(concurrency=2, **kwargs))
+        return instances[-1]
+
+    yield make
+    for instance in instances:
+        instance.close()
+
+
+def _enqueue(outbox, count=1):
+    events = []
+    for _ in range(count):
+        article_id = ObjectId()
+        events.append(outbox.new_event(article_id, "embedding", {"article_id": str(article_id), "title": "t"}))
+    outbox.enqueue(events)
+    return [event["_id"] for event in events]
+
+
+def _event(outbox, event_id):
+    return outbox.collection.find_one({"_id": event_id})
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def test_2xx_marks_the_events_delivered(receiver, outbox, dispatcher, mongo_db):
+    stats = receiver()
+    ids = _enqueue(outbox, 3)
+    article_ids = [_event(outbox, event_id)["article_id"] for event_id in ids]
+    mongo_db["work_queue"].insert_many([{"url": f"https://example.com/{n}", "state": "classified", "article_id": a}
+                                        for n, a in enumerate(article_ids)])
+
+    assert dispatcher().deliver_round() == 3
+
+    for event_id in ids:
+        event = _event(outbox, event_id)
+        assert event["status"] == DELIVERED
+        assert event["attempts"] == 1
+        assert event["delivered_at"] is not None
+        assert "claimed_by" not in event
+    assert stats.summary()["/embedding/batch"]["unique_articles"] == 3
+    assert mongo_db["work_queue"].count_documents({"state": "delivered"}) == 3
+
+
+def test_5xx_backs_off_and_counts_the_attempt(receiver, outbox, dispatcher):
+    stats = receiver(down_for=3600)
+    [event_id] = _enqueue(outbox)
+    worker = dispatcher()
+    before = datetime.now(timezone.utc)
+
+    assert worker.deliver_round() == 1
+
+    event = _event(outbox, event_id)
+    assert event["status"] == PENDING
+    assert event["attempts"] == 1
+    assert "503" in event["last_error"]
+    # First retry waits WEBHOOK_BACKOFF_BASE seconds, halved at most by the jitter.
+    assert _aware(event["next_attempt_at"]) >= before + timedelta(seconds=webhook_dispatcher.WEBHOOK_BACKOFF_BASE * 0.5)
+    # Not due again until the backoff runs out.
+    assert worker.deliver_round() == 0
+    assert stats.summary()["/embedding"]["failed"] == 1
+
+
+def test_attempt_cap_moves_the_event_to_the_dead_letters(receiver, outbox, dispatcher, monkeypatch):
+    stats = receiver(down_for=3600)
+    monkeypatch.setattr(webhook_dispatcher, "WEBHOOK_BACKOFF_BASE", 0)
+    [event_id] = _enqueue(outbox)
+    worker = dispatcher(max_attempts=3)
+
+    assert worker.drain() == 3
+
+    event = _event(outbox, event_id)
+    assert event["status"] == DEAD
+    assert event["attempts"] == 3
+    assert event["dead_at"] is not None
+    assert stats.summary()["/embedding"]["requests"] == 3
+    assert worker.report()["embedding"]["dead"] == 1
+    assert worker.deliver_round() == 0
+
+
+def test_redelivery_of_a_stale_claim_is_idempotent(receiver, outbox, dispatcher):
+    stats = receiver()
+    [event_id] = _enqueue(outbox)
+    # A worker claims the event and stalls until its lease runs out.
+    stale = outbox.claim_due("embedding", 10, lease_seconds=0)
+    worker = dispatcher()
+
+    assert worker.deliver_round() == 1
+    delivered = _event(outbox, event_id)
+    assert delivered["status"] == DELIVERED
+    assert delivered["attempts"] == 2
+
+    # The stalled worker finishes late: the receiver sees a duplicate, the outbox does not change.
+    assert worker._send(("embedding", stale)) == 1
+    assert outbox.mark_failed(stale, "late failure", {event_id: None}) == 0
+    assert _event(outbox, event_id) == delivered
+    assert worker.deliver_round() == 0
+    assert stats.summary()["/embedding"]["duplicates"] == 1
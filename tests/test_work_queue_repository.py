@@ -0,0 +1,77 @@
+# tests/test_work_queue_repository.py
+"""Leases of WorkQueueRepository (needs MongoDB)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from lib.repositories.work_queue_repository import CLASSIFIED, FAILED, FETCHED, WorkQueueRepository
+
+
+@pytest.fixture
+def queue(mongo_db):
+    repo = WorkQueueRepository()
+    repo.discover([{"url": "https://example.com/a", "title": "A", "text": "body", "source": "test"}])
+    return repo
+
+
+def test_expired_leases_count_toward_the_attempt_cap(queue):
+    # Each worker dies holding the item: lease_seconds=0 expires right away, release is never called.
+    for attempt in (1, 2):
+        item = queue.claim(FETCHED, f"worker-{attempt}", lease_seconds=0, max_attempts=2)
+        assert item["attempts"] == attempt
+
+    assert queue.claim(FETCHED, "worker-3", lease_seconds=0, max_attempts=2) is None
+    item = queue.collection.find_one({"_id": "https://example.com/a"})
+    assert item["state"] == FAILED
+    assert item["failed_from"] == FETCHED
+    assert "lease expired" in item["last_error"]
+    assert "lease_owner" not in item
+
+    assert queue.retry_failed() == 1
+    assert queue.claim(FETCHED, "worker-4", lease_seconds=60, max_attempts=2)["attempts"] == 1
+
+
+def test_renew_extends_only_the_leases_still_held(queue):
+    item = queue.claim(FETCHED, "worker-1", lease_seconds=1)
+    before = datetime.now(timezone.utc)
+
+    assert queue.renew_many([item["_id"]], "worker-1", lease_seconds=60) == 1
+    lease_until = queue.collection.find_one({"_id": item["_id"]})["lease_until"].replace(tzinfo=timezone.utc)
+    assert lease_until >= before + timedelta(seconds=59)
+    # A renewed lease is not claimable by anyone else.
+    assert queue.claim(FETCHED, "worker-2", lease_seconds=60) is None
+
+    assert queue.renew_many([item["_id"]], "worker-2", lease_seconds=60) == 0
+    assert queue.advance(item["_id"], FETCHED, CLASSIFIED, "worker-1")
+    assert queue.renew_many([item["_id"]], "worker-1", lease_seconds=60) == 0
+
+
+def test_article_id_is_created_at_classify_time(queue):
+    # Discovered long before it is classified, as with a queued backlog.
+    queue.collection.update_one({"_id": "https://example.com/a"}, {"$set": {"article_id": ObjectId.from_datetime(
+        datetime.now(timezone.utc) - timedelta(hours=1))}})
+    item = queue.claim(FETCHED, "worker-1", lease_seconds=60)
+    before = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+    first = queue.assign_article_ids([item], "worker-1")[item["_id"]]
+    # Not below the trends watermark (now - TRENDS_WATERMARK_LAG_SECONDS) when it is inserted.
+    assert first.generation_time >= before
+    assert queue.collection.find_one({"_id": item["_id"]})["article_id"] == first
+
+    # A retry after the lease expired keeps the id the first attempt may have stored.
+    queue.collection.update_one({"_id": item["_id"]}, {"$set": {"lease_until": before}})
+    retry = queue.claim(FETCHED, "worker-2", lease_seconds=60)
+    assert queue.assign_article_ids([retry], "worker-2") == {item["_id"]: first}
+    # Only the lease holder gets an id.
+    assert queue.assign_article_ids([retry], "worker-1") == {}
+
+
+def test_released_item_without_a_stored_article_gets_a_fresh_id(queue):
+    item = queue.claim(FETCHED, "worker-1", lease_seconds=60)
+    first = queue.assign_article_ids([item], "worker-1")[item["_id"]]
+    queue.release(item["_id"], "worker-1", "inference failed", max_attempts=5, unset=["article_id"])
+
+    retry = queue.claim(FETCHED, "worker-2", lease_seconds=60)
+    assert retry["attempts"] == 2
+    assert queue.assign_article_ids([retry], "worker-2")[item["_id"]] != first
@@ -0,0 +1,189 @@
+# utils/log.py
+"""
+Leveled, queue-backed logging for the hot path.
+
+    from utils.log import get_logger, log_sampled, truncate
+    logger = get_logger(__name__)
+    logger.info("Stored %s", article_id, extra={"fields": {"topic": topic}})
+    log_sampled(logger, "url_already_processed", logging.DEBUG, "%s already processed", url)
+
+Importing a module never touches the logging configuration: entry points
+(cli.py and the ``python -m`` mains) call setup_logging() once. Until then,
+records go wherever the host process routes the root logger.
+
+Calling threads only build a LogRecord and put it on a bounded queue
+(LOG_QUEUE_SIZE). A QueueListener thread formats it and writes it to stdout. If
+the queue is full the record is dropped and counted, so a slow terminal never
+blocks the pipeline. Records are not pre-formatted on the calling thread:
+pass values as ``%`` arguments (not f-strings), and they are only rendered if
+the level is enabled.
+
+A process forked after setup_logging() (the inference pool workers) has no
+listener thread to drain the inherited queue, and may have inherited one of
+its locks held. Forked children therefore drop the queue and log straight to
+stdout with the same formatter.
+
+LOG_FORMAT=json writes one JSON object per line, with the ``fields`` given in
+``extra`` as top-level keys. ``text`` (the default) appends them as key=value.
+String fields and arguments longer than LOG_MAX_FIELD_CHARS are truncated.
+log_sampled emits the first occurrence of a key and then every LOG_SAMPLE_EVERY-th
+one, together with the running count.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").strip().lower()  # text | json
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 100))
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", 300))
+
+_setup_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_handler: Optional["_DroppingQueueHandler"] = None
+_formatter: Optional[logging.Formatter] = None
+_fork_hook_registered = False
+_sample_lock = threading.Lock()
+_sample_counts: Counter = Counter()
+
+
+def truncate(value: Any, limit: int = LOG_MAX_FIELD_CHARS) -> Any:
+    """Shorten long strings (also inside dicts and lists) for logging."""
+    if isinstance(value, str):
+        return value if len(value) <= limit else f"{value[:limit]}…(+{len(value) - limit} chars)"
+    if isinstance(value, dict):
+        return {k: truncate(v, limit) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [truncate(v, limit) for v in value[:20]] + ([f"…(+{len(value) - 20} items)"] if len(value) > 20 else [])
+    return value
+
+
+def _truncate_args(record: logging.LogRecord) -> None:
+    if isinstance(record.args, tuple):
+        record.args = tuple(truncate(arg) for arg in record.args)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def __init__(self, q: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue stays in-process, so the record is passed as is and all
+        # formatting happens on the listener thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        _truncate_args(record)
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={truncate(v)}" for k, v in fields.items())
+        return line
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        _truncate_args(record)
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        entry.update(truncate(getattr(record, "fields", None) or {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """Route the root logger through the queue. Idempotent; only entry points call it."""
+    global _listener, _handler, _formatter, _fork_hook_registered
+    with _setup_lock:
+        if _listener is not None:
+            return
+        _formatter = _JsonFormatter() if fmt == "json" else _TextFormatter()
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(_formatter)
+        _handler = _DroppingQueueHandler(queue.Queue(maxsize=max(1, LOG_QUEUE_SIZE)))
+        root = logging.getLogger()
+        root.handlers = [_handler]
+        root.setLevel(level)
+        _listener = QueueListener(_handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        if not _fork_hook_registered and hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_log_directly_after_fork)
+            _fork_hook_registered = True
+
+
+def _log_directly_after_fork() -> None:
+    """In a forked child: replace the queue handler (its listener stayed in the parent) with a stdout handler."""
+    global _setup_lock, _sample_lock, _listener, _handler
+    _setup_lock = threading.Lock()
+    _sample_lock = threading.Lock()
+    if _handler is None or _formatter is None:
+        return
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(_formatter)
+    root = logging.getLogger()
+    root.handlers = [stream if handler is _handler else handler for handler in root.handlers]
+    _listener = None
+    _handler = None
+
+
+def shutdown_logging() -> None:
+    """Write out what is still queued and stop the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        if _handler is not None and _handler.dropped:
+            print(f"⚠️ {_handler.dropped} log records were dropped (LOG_QUEUE_SIZE={LOG_QUEUE_SIZE})")
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def log_sampled(logger: logging.Logger, key: str, level: int, msg: str, *args: Any,
+                every: int = LOG_SAMPLE_EVERY, **kwargs: Any) -> None:
+    """Log the 1st, (every+1)-th, (2*every+1)-th ... occurrence of ``key``."""
+    if not logger.isEnabledFor(level):
+        return
+    with _sample_lock:
+        _sample_counts[key] += 1
+        count = _sample_counts[key]
+    if every <= 1 or count % every == 1:
+        extra = kwargs.pop("extra", None) or {}
+        fields = {**extra.get("fields", {}), "occurrences": count}
+        logger.log(level, msg, *args, extra={**extra, "fields": fields}, **kwargs)
+
+
+def sample_counts() -> Dict[str, int]:
+    with _sample_lock:
+        return dict(_sample_counts)
@@ -1,10 +1,12 @@
 # utils/validation.py
 import re
 from datetime import datetime
+from typing import Any, Optional, Tuple
 
 # batch-YYYY-MM-DD (batch is numeric)
 _PATTERN = r'^(\d+)-(202[5-9]|20[3-9]\d)-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])$'
 _rx = re.compile(_PATTERN)
+_DATE_SEARCH_RX = re.compile(r"\d{4}-\d{2}-\d{2}")
 
 
 def is_valid_sample(sample: str) -> bool:
@@ -17,3 +19,35 @@ def is_valid_sample(sample: str) -> bool:
         return True
     except ValueError:
         return False
+
+
+def parse_sample_str(sample_str: str) -> Tuple[str, Optional[int]]:
+    """
+    ("YYYY-MM-DD", batch) from a get_distinct_samples argument: "3-2025-09-17"
+    is batch 3 of that day, "-2025-09-17" (or a bare date) every sample of it.
+    """
+    match = _DATE_SEARCH_RX.search(sample_str or "")
+    if not match:
+        raise ValueError(f"'{sample_str}' does not contain a YYYY-MM-DD date")
+    batch = sample_str[:match.start()].rstrip("-")
+    return match.group(0), int(batch) if batch.isdigit() else None
+
+
+def parse_legacy_sample(sample: str) -> Optional[Tuple[int, str]]:
+    """Split a legacy 'batch-YYYY-MM-DD' sample into (batch, 'YYYY-MM-DD'); None if it is not one."""
+    if not isinstance(sample, str) or not is_valid_sample(sample):
+        return None
+    batch, year, month, day = _rx.match(sample).groups()
+    return int(batch), f"{year}-{month}-{day}"
+
+
+def as_sample_date(value: Any) -> Optional[str]:
+    """'YYYY-MM-DD' of a datetime or of a string starting with a date; None otherwise."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return datetime.strptime(value[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+    return None